@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Pool de API Keys do Google AI
+Saraiva Vision - Vazão somada de vários projetos com orçamento e saúde por chave
+
+Cada chave tem um token bucket próprio (requisições/imagens por minuto) e um
+estado de saúde. Cada chamada vai para a chave com mais folga; chaves com 429
+ou erros seguidos da API saem de rotação por um cooldown crescente (erros
+locais dentro do bloco não contam). acquire() espera no máximo `timeout`
+segundos por uma chave. O uso por chave é reportado ao fim da execução.
+
+Chaves:
+    export GOOGLE_GEMINI_API_KEYS='chave-projeto-a,chave-projeto-b'
+    (GOOGLE_GEMINI_API_KEY / GOOGLE_API_KEY continuam valendo como chave única)
+
+Uso:
+    pool = ApiKeyPool(load_api_keys(), rate_per_minute=10)
+    with pool.acquire(cost=4) as key:
+        response = key.client.models.generate_images(...)
+    print(pool.report())
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from google import genai
+from google.genai import errors
+
+DEFAULT_RATE_PER_MINUTE = 10
+COOLDOWN_SECONDS = 60.0
+MAX_COOLDOWN_SECONDS = 600.0
+ERRORS_BEFORE_COOLDOWN = 3
+# Espera máxima por uma chave quando quem chama não informa deadline
+DEFAULT_ACQUIRE_TIMEOUT = 180.0
+
+
+def load_api_keys() -> List[str]:
+    """Chaves de GOOGLE_GEMINI_API_KEYS (separadas por vírgula) + chave única legada, sem repetição"""
+    keys = []
+    for raw in (os.environ.get('GOOGLE_GEMINI_API_KEYS', '').split(',')
+                + [os.environ.get('GOOGLE_GEMINI_API_KEY', ''), os.environ.get('GOOGLE_API_KEY', '')]):
+        key = raw.strip()
+        if key and key not in keys:
+            keys.append(key)
+    return keys
+
+
+def is_throttle_error(error: Exception) -> bool:
+    """429 / RESOURCE_EXHAUSTED da API: a chave está sem cota, não com defeito"""
+    if not isinstance(error, errors.APIError):
+        return False
+    return error.code == 429 or error.status == 'RESOURCE_EXHAUSTED'
+
+
+def is_key_error(error: Exception) -> bool:
+    """Falha atribuível à chave/projeto (resposta de erro da API), não ao código local"""
+    return isinstance(error, errors.APIError)
+
+
+class KeyState:
+    """Orçamento (token bucket) e saúde de uma chave"""
+
+    def __init__(self, api_key: str, rate_per_minute: float):
+        self.api_key = api_key
+        self.label = f"…{api_key[-4:]}"
+        self.capacity = float(rate_per_minute)
+        self.tokens = float(rate_per_minute)
+        self.refill_per_second = rate_per_minute / 60.0
+        self.updated = time.monotonic()
+        self.cooldown_until = 0.0
+        self.cooldown_seconds = COOLDOWN_SECONDS
+        self.consecutive_errors = 0
+        self.in_flight = 0
+        # Uso para o relatório
+        self.requests = 0
+        self.units = 0.0
+        self.throttled = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self._client = None
+
+    @property
+    def client(self) -> 'genai.Client':
+        if self._client is None:
+            self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    def headroom(self, now: float) -> float:
+        """Tokens livres descontando chamadas em andamento (negativo = fora de rotação)"""
+        if now < self.cooldown_until:
+            return -1.0
+        return self.tokens - self.in_flight
+
+    def seconds_until(self, cost: float, now: float) -> float:
+        if now < self.cooldown_until:
+            return self.cooldown_until - now
+        missing = min(cost, self.capacity) - self.tokens
+        return max(0.0, missing / self.refill_per_second) if self.refill_per_second else COOLDOWN_SECONDS
+
+
+class ApiKeyPool:
+    """Distribui chamadas entre chaves pela folga de cota e saúde de cada uma"""
+
+    def __init__(self, api_keys: List[str], rate_per_minute: float = DEFAULT_RATE_PER_MINUTE):
+        """
+        Args:
+            api_keys: Uma chave por projeto (cotas independentes)
+            rate_per_minute: Orçamento por chave (requisições ou imagens/minuto)
+        """
+        if not api_keys:
+            raise ValueError("Nenhuma API key informada")
+        self.keys = [KeyState(key, rate_per_minute) for key in api_keys]
+        self._condition = threading.Condition()
+
+    @property
+    def primary(self) -> KeyState:
+        """Chave fixa para operações com estado no projeto (ex.: uploads da Files API)"""
+        return self.keys[0]
+
+    def _pick(self, cost: float) -> Optional[KeyState]:
+        now = time.monotonic()
+        ready = []
+        for key in self.keys:
+            key.refill(now)
+            # Custo maior que a capacidade do bucket passa com o bucket cheio (senão travaria)
+            if now >= key.cooldown_until and key.tokens >= min(cost, key.capacity):
+                ready.append(key)
+        if not ready:
+            return None
+        return max(ready, key=lambda k: k.headroom(now))
+
+    @contextmanager
+    def acquire(self, cost: float = 1.0, timeout: Optional[float] = DEFAULT_ACQUIRE_TIMEOUT):
+        """
+        Reserva cota na chave com mais folga (bloqueia até alguma liberar)
+
+        Args:
+            cost: Unidades de cota (requisições ou imagens)
+            timeout: Espera máxima em segundos (None: sem limite)
+
+        Raises:
+            TimeoutError: nenhuma chave liberou dentro de `timeout`
+
+        Erros da API dentro do bloco atualizam a saúde da chave; toda exceção é relançada.
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        with self._condition:
+            while True:
+                key = self._pick(cost)
+                if key is not None:
+                    break
+                now = time.monotonic()
+                wait = min(k.seconds_until(cost, now) for k in self.keys)
+                if deadline is not None:
+                    if now >= deadline:
+                        raise TimeoutError(f"nenhuma chave com cota livre em {timeout:g}s")
+                    wait = min(wait, deadline - now)
+                self._condition.wait(timeout=max(0.05, min(wait, 5.0)))
+            key.tokens -= min(cost, key.capacity)
+            key.in_flight += 1
+            key.requests += 1
+            key.units += cost
+
+        started = time.monotonic()
+        try:
+            yield key
+        except Exception as e:
+            if is_key_error(e):
+                self._record_failure(key, e)
+            raise
+        else:
+            with self._condition:
+                key.consecutive_errors = 0
+                key.cooldown_seconds = COOLDOWN_SECONDS
+        finally:
+            with self._condition:
+                key.in_flight -= 1
+                key.busy_seconds += time.monotonic() - started
+                self._condition.notify_all()
+
+    def _record_failure(self, key: KeyState, error: Exception) -> None:
+        with self._condition:
+            now = time.monotonic()
+            if is_throttle_error(error):
+                key.throttled += 1
+                key.tokens = 0.0
+                self._cool_down(key, now, 'cota esgotada (429)')
+                return
+
+            key.errors += 1
+            key.consecutive_errors += 1
+            if key.consecutive_errors >= ERRORS_BEFORE_COOLDOWN:
+                self._cool_down(key, now, f'{key.consecutive_errors} erros seguidos')
+                key.consecutive_errors = 0
+
+    def _cool_down(self, key: KeyState, now: float, reason: str) -> None:
+        if now < key.cooldown_until:
+            return  # outras chamadas em andamento na mesma chave já a tiraram de rotação
+        key.cooldown_until = now + key.cooldown_seconds
+        print(f"⏸️  Chave {key.label} fora de rotação por {key.cooldown_seconds:.0f}s: {reason}")
+        key.cooldown_seconds = min(key.cooldown_seconds * 2, MAX_COOLDOWN_SECONDS)
+
+    def stats(self) -> List[Dict]:
+        now = time.monotonic()
+        return [{
+            'key': k.label,
+            'requests': k.requests,
+            'units': k.units,
+            'throttled': k.throttled,
+            'errors': k.errors,
+            'busy_seconds': round(k.busy_seconds, 1),
+            'cooling_down': now < k.cooldown_until,
+        } for k in self.keys]
+
+    def report(self) -> str:
+        lines = [f"🔑 Uso por chave ({len(self.keys)}):"]
+        for s in self.stats():
+            status = ' (em cooldown)' if s['cooling_down'] else ''
+            lines.append(f"   {s['key']}: {s['requests']} req, {s['units']:.0f} unid., "
+                         f"{s['throttled']} x 429, {s['errors']} erros, {s['busy_seconds']}s{status}")
+        return '\n'.join(lines)
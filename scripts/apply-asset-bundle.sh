@@ -0,0 +1,138 @@
+#!/bin/bash
+
+###############################################################################
+# Aplicar Bundle Delta de Assets
+# Descrição: Aplica bundle gerado por scripts/asset_manifest.py --bundle
+#            (somente capas/variantes novas ou alteradas + remoções)
+# Uso: sudo ./scripts/apply-asset-bundle.sh <bundle.tar> [current_link]
+#
+# Se o destino for o symlink "current" (deploy atômico), uma nova release é
+# criada com hardlinks da atual, o delta é aplicado nela e o symlink é trocado
+# com rename atômico. Em diretórios comuns, cada arquivo é promovido por rename.
+# Releases .assets_<ts> antigas são removidas (mantém KEEP_RELEASES, padrão 3).
+###############################################################################
+
+set -euo pipefail
+
+# Cores
+RED='\033[0;31m'
+GREEN='\033[0;32m'
+YELLOW='\033[1;33m'
+BLUE='\033[0;34m'
+NC='\033[0m'
+
+BUNDLE="${1:-}"
+CURRENT_LINK="${2:-/var/www/saraivavision/current}"
+TIMESTAMP=$(date +%Y%m%d_%H%M%S)
+KEEP_RELEASES="${KEEP_RELEASES:-3}"
+
+log() {
+    echo -e "${BLUE}[$(date +'%H:%M:%S')]${NC} $*"
+}
+
+log_success() {
+    echo -e "${GREEN}[✓]${NC} $*"
+}
+
+log_warning() {
+    echo -e "${YELLOW}[⚠]${NC} $*"
+}
+
+log_error() {
+    echo -e "${RED}[✗]${NC} $*"
+}
+
+if [[ -z "$BUNDLE" || ! -f "$BUNDLE" ]]; then
+    log_error "Bundle não encontrado: ${BUNDLE:-<vazio>}"
+    echo "Uso: $0 <bundle.tar> [current_link]"
+    exit 1
+fi
+
+if [[ ! -e "$CURRENT_LINK" ]]; then
+    log_error "Destino não encontrado: $CURRENT_LINK"
+    exit 1
+fi
+
+# Extrair bundle em staging no mesmo filesystem do destino (rename atômico)
+TARGET_PARENT=$(dirname "$(readlink -f "$CURRENT_LINK")")
+STAGING_DIR=$(mktemp -d "${TARGET_PARENT}/.asset-bundle.XXXXXX")
+trap 'rm -rf "$STAGING_DIR"' EXIT
+
+log "Extraindo bundle: $BUNDLE"
+# --no-same-owner: arquivos extraídos como root não herdam o uid de quem gerou o bundle
+tar --no-same-owner -xf "$BUNDLE" -C "$STAGING_DIR"
+
+if [[ ! -f "$STAGING_DIR/bundle.json" ]]; then
+    log_error "bundle.json ausente - bundle inválido"
+    exit 1
+fi
+
+# Verificar hashes antes de tocar no destino
+log "Verificando integridade (sha256)..."
+python3 - "$STAGING_DIR" <<'PYEOF'
+import hashlib, json, sys
+from pathlib import Path
+
+staging = Path(sys.argv[1])
+meta = json.loads((staging / "bundle.json").read_text(encoding="utf-8"))
+for rel, expected in meta["files"].items():
+    path = staging / "files" / rel
+    digest = hashlib.sha256(path.read_bytes()).hexdigest()
+    if digest != expected:
+        sys.exit(f"hash divergente: {rel}")
+print(f"{len(meta['files'])} arquivos, {len(meta['deleted'])} remoções")
+PYEOF
+
+apply_delta() {
+    local target="$1"
+    if [[ -d "$STAGING_DIR/files" ]]; then
+        (cd "$STAGING_DIR/files" && find . -type d -exec mkdir -p "$target/{}" \;)
+        # mv no mesmo filesystem = rename atômico por arquivo (nunca meio-escrito)
+        (cd "$STAGING_DIR/files" && find . -type f -print0) | while IFS= read -r -d '' rel; do
+            # Dono e permissões do destino antes do rename: o arquivo já aparece legível pelo nginx
+            chown --reference="$target" "$STAGING_DIR/files/$rel" 2>/dev/null || true
+            chmod 644 "$STAGING_DIR/files/$rel"
+            mv -f "$STAGING_DIR/files/$rel" "$target/$rel"
+        done
+        (cd "$STAGING_DIR/files" && find . -mindepth 1 -type d -print0) | while IFS= read -r -d '' rel; do
+            chown --reference="$target" "$target/$rel" 2>/dev/null || true
+        done
+    fi
+    while IFS= read -r rel; do
+        [[ -z "$rel" ]] && continue
+        rm -f -- "$target/$rel"
+    done < "$STAGING_DIR/DELETED"
+}
+
+if [[ -L "$CURRENT_LINK" ]]; then
+    CURRENT_TARGET=$(readlink -f "$CURRENT_LINK")
+    # dist -> dist.assets_<ts> (sem empilhar sufixos em bundles consecutivos)
+    NEW_TARGET="${CURRENT_TARGET%%.assets_*}.assets_${TIMESTAMP}"
+
+    log "Criando release com hardlinks: $NEW_TARGET"
+    cp -al "$CURRENT_TARGET" "$NEW_TARGET"
+
+    apply_delta "$NEW_TARGET"
+    chown -R --reference="$CURRENT_TARGET" "$NEW_TARGET" 2>/dev/null || true
+
+    # Troca atômica do symlink (rename de um symlink temporário)
+    ln -sfn "$NEW_TARGET" "${CURRENT_LINK}.tmp_${TIMESTAMP}"
+    mv -Tf "${CURRENT_LINK}.tmp_${TIMESTAMP}" "$CURRENT_LINK"
+
+    log_success "current -> $NEW_TARGET"
+    log "Release anterior preservada para rollback: $CURRENT_TARGET"
+
+    # Releases de bundles antigos: mantém as KEEP_RELEASES mais recentes (nunca a atual nem a anterior)
+    RELEASE_BASE="${CURRENT_TARGET%%.assets_*}"
+    ls -1d "${RELEASE_BASE}".assets_* 2>/dev/null | sort -r | tail -n +$((KEEP_RELEASES + 1)) | \
+        while IFS= read -r old_release; do
+            [[ "$old_release" == "$NEW_TARGET" || "$old_release" == "$CURRENT_TARGET" ]] && continue
+            rm -rf -- "$old_release"
+            log "Release antiga removida: $(basename "$old_release")"
+        done
+else
+    log_warning "Destino não é symlink - promovendo arquivo a arquivo"
+    apply_delta "$CURRENT_LINK"
+fi
+
+log_success "Bundle aplicado: $(basename "$BUNDLE")"
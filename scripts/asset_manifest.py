@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Manifesto de Assets com Hash e Bundles Delta
+Saraiva Vision - Deploy incremental das imagens geradas
+
+Mantém um manifesto (sha256, tamanho, mtime) de tudo que os geradores gravam em
+public/Blog e emite um bundle delta com apenas os arquivos novos/alterados e a
+lista de remoções desde o último deploy. O bundle é aplicado no servidor por
+scripts/apply-asset-bundle.sh, que troca a release de forma atômica.
+
+Uso:
+    python asset_manifest.py --status
+    python asset_manifest.py --bundle
+    python asset_manifest.py --bundle /tmp/covers.tar --mark-deployed
+"""
+
+import os
+import sys
+import json
+import fcntl
+import hashlib
+import tarfile
+import threading
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+# Diretórios
+PROJECT_ROOT = Path(__file__).parent.parent
+PUBLIC_DIR = PROJECT_ROOT / "public"
+BLOG_DIR = PUBLIC_DIR / "Blog"
+STATE_DIR = PROJECT_ROOT / ".cache" / "blog-assets"
+MANIFEST_PATH = STATE_DIR / "asset-manifest.json"
+DEPLOYED_MANIFEST_PATH = STATE_DIR / "deployed-manifest.json"
+MANIFEST_LOCK_PATH = STATE_DIR / "asset-manifest.lock"
+# Arquivos gravados ainda não aplicados ao public/image-manifest.json (image_manifest.py --pending)
+IMAGE_MANIFEST_PENDING_PATH = STATE_DIR / "image-manifest.pending"
+BUNDLE_DIR = STATE_DIR / "bundles"
+
+# Diretórios onde os geradores gravam (capas do blog e dos podcasts)
+ASSET_ROOTS = (BLOG_DIR, PUBLIC_DIR / "Podcasts")
+
+# Extensões rastreadas (masters, variantes e metadados gerados)
+TRACKED_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.avif', '.json'}
+
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Geradores concorrentes gravam no mesmo manifesto (e no mesmo .tmp)
+_RECORD_LOCK = threading.Lock()
+
+
+@contextmanager
+def manifest_lock():
+    """Leitura-modificação-gravação exclusiva do manifesto entre threads e processos"""
+    MANIFEST_LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with _RECORD_LOCK, open(MANIFEST_LOCK_PATH, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def hash_file(path: Path) -> str:
+    """Calcula sha256 do arquivo em blocos de 1 MB"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def empty_manifest() -> Dict:
+    return {'version': MANIFEST_VERSION, 'updated': None, 'files': {}}
+
+
+def load_manifest(path: Path = MANIFEST_PATH) -> Dict:
+    """Carrega manifesto do disco (vazio se não existir ou estiver corrompido)"""
+    if not path.exists():
+        return empty_manifest()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Manifesto ilegível ({path.name}): {e} - recriando")
+        return empty_manifest()
+    if manifest.get('version') != MANIFEST_VERSION:
+        return empty_manifest()
+    return manifest
+
+
+def save_manifest(manifest: Dict, path: Path = MANIFEST_PATH) -> None:
+    """Grava manifesto de forma atômica (arquivo temporário + rename)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    manifest['updated'] = datetime.now().isoformat(timespec='seconds')
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_cache(path: Path) -> Dict:
+    """Estado JSON em .cache/blog-assets (vazio se não existir ou estiver ilegível)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_json_atomic(data: Dict, path: Path, indent: Optional[int] = 2) -> None:
+    """Grava JSON via arquivo temporário + rename (leitores nunca veem meio arquivo)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=indent, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def relative_key(path: Path) -> str:
+    """Chave do manifesto: caminho relativo a public/ com separador '/'"""
+    return Path(path).resolve().relative_to(PUBLIC_DIR.resolve()).as_posix()
+
+
+def _entry_for(path: Path, previous: Optional[Dict]) -> Dict:
+    """Reaproveita o hash se tamanho e mtime não mudaram"""
+    stat = path.stat()
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns:
+        return previous
+    return {
+        'sha256': hash_file(path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+    }
+
+
+def cached_hash(path: Path, files: Dict) -> str:
+    """sha256 do manifesto quando tamanho/mtime batem; senão relê o arquivo"""
+    try:
+        entry = files.get(relative_key(path))
+    except ValueError:
+        entry = None
+    if entry:
+        stat = Path(path).stat()
+        if entry.get('size') == stat.st_size and entry.get('mtime_ns') == stat.st_mtime_ns:
+            return entry['sha256']
+    return hash_file(path)
+
+
+def _is_tracked(name: str) -> bool:
+    return not name.startswith('.') and Path(name).suffix.lower() in TRACKED_EXTENSIONS
+
+
+def refresh_manifest(manifest: Dict, roots: Iterable[Path] = ASSET_ROOTS) -> Dict:
+    """
+    Sincroniza o manifesto com o disco
+
+    Apenas arquivos com tamanho/mtime diferentes são re-hasheados, então um
+    refresh após gerar poucas capas custa O(arquivos alterados) em I/O.
+    Entradas gravadas por record_assets() fora das raízes (ex.:
+    public/image-manifest.json) são conferidas uma a uma.
+
+    Returns:
+        Contadores {'hashed': n, 'removed': n, 'total': n}
+    """
+    files = manifest['files']
+    seen = set()
+    hashed = 0
+    removed = 0
+    roots = [Path(root) for root in roots]
+    prefixes = tuple(relative_key(root) + '/' for root in roots)
+
+    for root in roots:
+        if not root.exists():
+            continue
+        prefix = relative_key(root)
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+            for name in filenames:
+                if not _is_tracked(name):
+                    continue
+                path = Path(dirpath) / name
+                key = relative_key(path)
+                previous = files.get(key)
+                entry = _entry_for(path, previous)
+                if entry is not previous:
+                    hashed += 1
+                files[key] = entry
+                seen.add(key)
+
+        removed_keys = [k for k in files if k.startswith(prefix + '/') and k not in seen]
+        for key in removed_keys:
+            del files[key]
+        removed += len(removed_keys)
+
+    for key in [k for k in files if not k.startswith(prefixes)]:
+        path = PUBLIC_DIR / key
+        if not path.is_file():
+            del files[key]
+            removed += 1
+            continue
+        previous = files[key]
+        files[key] = _entry_for(path, previous)
+        if files[key] is not previous:
+            hashed += 1
+
+    return {'hashed': hashed, 'removed': removed, 'total': len(files)}
+
+
+def record_assets(paths: Iterable[str], manifest_path: Path = MANIFEST_PATH) -> int:
+    """
+    Atualiza o manifesto apenas com os arquivos informados
+
+    Chamado pelos geradores logo após salvar capas/variantes. Caminhos fora de
+    public/ são ignorados; caminhos inexistentes são removidos do manifesto.
+    Os caminhos também entram na fila do manifesto público de imagens, aplicada
+    depois por `image_manifest.py --pending` (a gravação não espera por ele).
+
+    Returns:
+        Número de entradas atualizadas
+    """
+    paths = list(paths)
+    with manifest_lock():
+        manifest = load_manifest(manifest_path)
+        touched = []
+        for raw_path in paths:
+            path = Path(raw_path)
+            try:
+                key = relative_key(path)
+            except ValueError:
+                continue
+            if path.exists():
+                manifest['files'][key] = _entry_for(path, manifest['files'].get(key))
+            else:
+                manifest['files'].pop(key, None)
+            touched.append(str(path))
+
+        if touched:
+            save_manifest(manifest, manifest_path)
+            with open(IMAGE_MANIFEST_PENDING_PATH, 'a', encoding='utf-8') as f:
+                f.writelines(f"{path}\n" for path in touched)
+    return len(touched)
+
+
+def diff_manifests(current: Dict, deployed: Dict) -> Dict[str, List[str]]:
+    """Compara manifestos e retorna chaves adicionadas, alteradas e removidas"""
+    cur_files = current['files']
+    old_files = deployed['files']
+
+    added = sorted(k for k in cur_files if k not in old_files)
+    changed = sorted(
+        k for k in cur_files
+        if k in old_files and cur_files[k]['sha256'] != old_files[k]['sha256']
+    )
+    deleted = sorted(k for k in old_files if k not in cur_files)
+
+    return {'added': added, 'changed': changed, 'deleted': deleted}
+
+
+def build_delta_bundle(current: Dict, deployed: Dict, bundle_path: Path) -> Optional[Dict]:
+    """
+    Gera bundle tar com os arquivos novos/alterados e a lista de remoções
+
+    Layout do bundle:
+        bundle.json   metadados (arquivos, hashes, remoções)
+        DELETED       um caminho relativo a public/ por linha
+        files/<rel>   conteúdo dos arquivos adicionados/alterados
+
+    Returns:
+        Metadados do bundle, ou None se não houver mudanças
+    """
+    delta = diff_manifests(current, deployed)
+    upload = delta['added'] + delta['changed']
+
+    if not upload and not delta['deleted']:
+        return None
+
+    metadata = {
+        'version': MANIFEST_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'added': delta['added'],
+        'changed': delta['changed'],
+        'deleted': delta['deleted'],
+        'files': {k: current['files'][k]['sha256'] for k in upload},
+        'bytes': sum(current['files'][k]['size'] for k in upload),
+    }
+
+    bundle_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = bundle_path.with_suffix(bundle_path.suffix + '.tmp')
+
+    # PNG/JPEG/WebP já são comprimidos: tar sem gzip evita CPU desperdiçada
+    with tarfile.open(tmp_path, 'w') as tar:
+        for name, payload in (
+            ('bundle.json', json.dumps(metadata, indent=2).encode('utf-8')),
+            ('DELETED', ''.join(f"{k}\n" for k in delta['deleted']).encode('utf-8')),
+        ):
+            info = tarfile.TarInfo(name)
+            info.size = len(payload)
+            info.mtime = int(datetime.now().timestamp())
+            tar.addfile(info, BytesIO(payload))
+
+        for key in upload:
+            source = PUBLIC_DIR / key
+            if hash_file(source) != current['files'][key]['sha256']:
+                raise RuntimeError(f"Arquivo alterado durante o bundle: {key}")
+            tar.add(str(source), arcname=f"files/{key}", recursive=False)
+
+    os.replace(tmp_path, bundle_path)
+    return metadata
+
+
+def mark_deployed(manifest_path: Path = MANIFEST_PATH,
+                  deployed_path: Path = DEPLOYED_MANIFEST_PATH) -> None:
+    """Registra o manifesto atual como estado do último deploy"""
+    with manifest_lock():
+        save_manifest(load_manifest(manifest_path), deployed_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Manifesto de assets e bundles delta para deploy',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Fluxo típico:
+  %(prog)s --bundle                      # gera bundle desde o último deploy
+  sudo ./scripts/apply-asset-bundle.sh .cache/blog-assets/bundles/<bundle>.tar
+  %(prog)s --mark-deployed               # após aplicar com sucesso
+        """
+    )
+
+    parser.add_argument('--status', action='store_true', help='Mostrar mudanças pendentes de deploy')
+    parser.add_argument('--bundle', nargs='?', const='', default=None,
+                        help='Gerar bundle delta (caminho opcional do .tar)')
+    parser.add_argument('--mark-deployed', action='store_true',
+                        help='Marcar manifesto atual como implantado')
+    parser.add_argument('--full', action='store_true',
+                        help='Ignorar último deploy e incluir todos os arquivos')
+
+    args = parser.parse_args()
+
+    if args.bundle is None and not args.status and not args.mark_deployed:
+        parser.print_help()
+        sys.exit(1)
+
+    with manifest_lock():
+        manifest = load_manifest()
+        stats = refresh_manifest(manifest)
+        save_manifest(manifest)
+    print(f"✓ Manifesto: {stats['total']} arquivos ({stats['hashed']} re-hasheados, "
+          f"{stats['removed']} removidos)")
+
+    deployed = empty_manifest() if args.full else load_manifest(DEPLOYED_MANIFEST_PATH)
+
+    if args.status:
+        delta = diff_manifests(manifest, deployed)
+        print("\n📊 Pendentes de deploy:")
+        for label, key in (('➕ Novos', 'added'), ('✏️  Alterados', 'changed'), ('🗑️  Removidos', 'deleted')):
+            print(f"   {label}: {len(delta[key])}")
+            for item in delta[key][:20]:
+                print(f"      {item}")
+
+    if args.bundle is not None:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        bundle_path = Path(args.bundle) if args.bundle else BUNDLE_DIR / f"assets_{timestamp}.tar"
+        metadata = build_delta_bundle(manifest, deployed, bundle_path)
+        if metadata is None:
+            print("\n✓ Nenhuma mudança desde o último deploy - bundle não gerado")
+        else:
+            count = len(metadata['files'])
+            print(f"\n📦 Bundle: {bundle_path}")
+            print(f"   Arquivos: {count} ({metadata['bytes']:,} bytes)")
+            print(f"   Remoções: {len(metadata['deleted'])}")
+
+    if args.mark_deployed:
+        mark_deployed()
+        print("\n✓ Manifesto atual registrado como implantado")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Auditoria Rápida das Imagens do Blog
+Saraiva Vision - Cabeçalhos, variantes, órfãos e orçamento de bytes por página
+
+Cruza o campo `image` de cada post em src/data/blogPosts.js com public/Blog,
+lendo apenas os cabeçalhos (e os últimos bytes) de cada arquivo em um pool de
+threads. Sinaliza imagens referenciadas ausentes, variantes responsivas
+faltando (as que o OptimizedImage pede no srcset), arquivos truncados,
+arquivos órfãos e posts cujas variantes de capa excedem o orçamento.
+
+Uso:
+    python audit_blog_images.py
+    python audit_blog_images.py --budget-kb 150 --strict
+    python audit_blog_images.py --json > relatorio.json
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import struct
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+from blog_data import load_blog_posts
+
+# Diretórios
+PUBLIC_DIR = Path(__file__).parent.parent / "public"
+BLOG_DIR = PUBLIC_DIR / "Blog"
+
+# Espelha src/components/blog/OptimizedImage.jsx (responsiveSizes e <source>)
+RESPONSIVE_WIDTHS = (480, 768, 1200)
+RESPONSIVE_FORMATS = ('avif', 'webp')
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp', '.avif', '.gif'}
+DEFAULT_BUDGET_KB = 200
+HEAD_BYTES = 64 * 1024
+TAIL_BYTES = 16
+
+_JPEG_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+_WIDTH_SUFFIX_RE = re.compile(r'-(\d+)w$')
+
+
+# ============================================================================
+# PROBE DE CABEÇALHOS
+# ============================================================================
+
+def _probe_png(head: bytes, tail: bytes, size: int) -> Dict:
+    width, height = struct.unpack('>II', head[16:24])
+    return {'format': 'png', 'width': width, 'height': height,
+            'truncated': tail[-8:-4] != b'IEND'}
+
+
+def _probe_jpeg(f, head: bytes, tail: bytes, size: int) -> Dict:
+    result = {'format': 'jpeg', 'width': None, 'height': None,
+              'truncated': not tail.rstrip(b'\x00').endswith(b'\xff\xd9')}
+    offset = 2
+    # Percorre segmentos até o SOF (EXIF/ICC grandes podem empurrá-lo além do head)
+    while offset + 9 < size:
+        f.seek(offset)
+        segment = f.read(9)
+        if len(segment) < 4 or segment[0] != 0xFF:
+            break
+        marker = segment[1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker in _JPEG_SOF:
+            result['height'], result['width'] = struct.unpack('>HH', segment[5:9])
+            break
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            offset += 2
+            continue
+        offset += 2 + struct.unpack('>H', segment[2:4])[0]
+    return result
+
+
+def _probe_webp(head: bytes, tail: bytes, size: int) -> Dict:
+    riff_size = struct.unpack('<I', head[4:8])[0]
+    chunk = head[12:16]
+    width = height = None
+    if chunk == b'VP8X':
+        width = 1 + int.from_bytes(head[24:27], 'little')
+        height = 1 + int.from_bytes(head[27:30], 'little')
+    elif chunk == b'VP8 ':
+        width = struct.unpack('<H', head[26:28])[0] & 0x3FFF
+        height = struct.unpack('<H', head[28:30])[0] & 0x3FFF
+    elif chunk == b'VP8L':
+        bits = struct.unpack('<I', head[21:25])[0]
+        width = (bits & 0x3FFF) + 1
+        height = ((bits >> 14) & 0x3FFF) + 1
+    return {'format': 'webp', 'width': width, 'height': height,
+            'truncated': riff_size + 8 > size}
+
+
+def _probe_avif(f, head: bytes, tail: bytes, size: int) -> Dict:
+    width = height = None
+    ispe = head.find(b'ispe')
+    if ispe != -1 and ispe + 16 <= len(head):
+        width, height = struct.unpack('>II', head[ispe + 8:ispe + 16])
+
+    # Caixas de topo (ftyp, meta, mdat...) devem somar exatamente o tamanho do arquivo
+    offset = 0
+    while offset + 8 <= size:
+        f.seek(offset)
+        box_header = f.read(16)
+        box_size = struct.unpack('>I', box_header[:4])[0]
+        if box_size == 1 and len(box_header) >= 16:
+            box_size = struct.unpack('>Q', box_header[8:16])[0]
+        elif box_size == 0:
+            box_size = size - offset
+        if box_size < 8:
+            break
+        offset += box_size
+    return {'format': 'avif', 'width': width, 'height': height, 'truncated': offset != size}
+
+
+def probe_image(path: Path) -> Dict:
+    """Formato, dimensões e integridade lendo só cabeçalho e cauda do arquivo"""
+    result = {'name': path.name, 'size': 0, 'format': None, 'width': None,
+              'height': None, 'truncated': False, 'error': None}
+    try:
+        size = path.stat().st_size
+        result['size'] = size
+        with open(path, 'rb') as f:
+            head = f.read(HEAD_BYTES)
+            f.seek(max(0, size - TAIL_BYTES))
+            tail = f.read(TAIL_BYTES)
+
+            if head.startswith(b'\x89PNG\r\n\x1a\n'):
+                result.update(_probe_png(head, tail, size))
+            elif head.startswith(b'\xff\xd8'):
+                result.update(_probe_jpeg(f, head, tail, size))
+            elif head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+                result.update(_probe_webp(head, tail, size))
+            elif head[4:8] == b'ftyp' and head[8:12] in (b'avif', b'avis', b'mif1', b'msf1'):
+                result.update(_probe_avif(f, head, tail, size))
+            elif head[:6] in (b'GIF87a', b'GIF89a'):
+                width, height = struct.unpack('<HH', head[6:10])
+                result.update({'format': 'gif', 'width': width, 'height': height,
+                               'truncated': not tail.endswith(b'\x3b')})
+            elif head.lstrip()[:5] in (b'<svg ', b'<?xml'):
+                result.update({'format': 'svg', 'error': f"SVG com extensão {path.suffix}"})
+            else:
+                result['error'] = 'formato desconhecido'
+    except (OSError, struct.error) as e:
+        result['error'] = str(e)
+
+    if result['size'] == 0:
+        result['truncated'] = True
+    return result
+
+
+# ============================================================================
+# AUDITORIA
+# ============================================================================
+
+def variant_base(image_name: str) -> str:
+    """Base usada pelo OptimizedImage: 'x-optimized-1200w.webp' -> 'x-optimized'"""
+    stem = Path(image_name).stem
+    return _WIDTH_SUFFIX_RE.sub('', stem)
+
+
+def expected_variants(image_name: str) -> List[str]:
+    """Arquivos que o srcset do OptimizedImage vai pedir para esta imagem"""
+    base = variant_base(image_name)
+    return [f"{base}-{w}w.{fmt}" for fmt in RESPONSIVE_FORMATS for w in RESPONSIVE_WIDTHS]
+
+
+def belongs_to(name: str, base: str) -> bool:
+    """Arquivo pertence ao grupo da capa (master, variantes, recortes)?"""
+    master = base[:-len('-optimized')] if base.endswith('-optimized') else base
+    stem = Path(name).stem
+    for candidate in {base, master}:
+        if stem == candidate or stem.startswith(candidate + '-optimized') \
+                or stem.startswith(candidate + '-crop-') or _WIDTH_SUFFIX_RE.sub('', stem) == candidate:
+            return True
+    return False
+
+
+def run_audit(budget_bytes: int, workers: int = 16) -> Dict:
+    posts = load_blog_posts()
+    files = {
+        entry.name: entry.path
+        for entry in os.scandir(BLOG_DIR)
+        if entry.is_file() and Path(entry.name).suffix.lower() in IMAGE_EXTENSIONS
+    }
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        probes = {p['name']: p for p in executor.map(probe_image, (Path(f) for f in files.values()))}
+
+    report = {'posts': [], 'missing': [], 'missing_variants': [], 'truncated': [],
+              'unknown': [], 'over_budget': [], 'orphans': []}
+    claimed = set()
+
+    for post in posts:
+        image = post.get('image') or ''
+        image_name = image.split('/')[-1]
+        base = variant_base(image_name)
+        entry = {'id': post.get('id'), 'image': image, 'variants': {}, 'missing_variants': []}
+
+        if not image.startswith('/Blog/'):
+            entry['external'] = True
+            report['posts'].append(entry)
+            continue
+
+        if image_name not in files:
+            report['missing'].append({'id': post.get('id'), 'image': image})
+
+        served = [image_name] + expected_variants(image_name)
+        for name in dict.fromkeys(served):
+            if name in probes:
+                probe = probes[name]
+                entry['variants'][name] = probe['size']
+            elif name != image_name:
+                entry['missing_variants'].append(name)
+
+        if entry['missing_variants']:
+            report['missing_variants'].append({'id': post.get('id'), 'missing': entry['missing_variants']})
+
+        largest = max(entry['variants'].values(), default=0)
+        entry['largest_variant'] = largest
+        if largest > budget_bytes:
+            worst = max(entry['variants'], key=entry['variants'].get)
+            report['over_budget'].append({'id': post.get('id'), 'file': worst, 'bytes': largest})
+
+        claimed.update(name for name in files if belongs_to(name, base))
+        report['posts'].append(entry)
+
+    for name, probe in sorted(probes.items()):
+        if probe['truncated']:
+            report['truncated'].append(name)
+        if probe['error']:
+            report['unknown'].append({'file': name, 'error': probe['error']})
+
+    report['orphans'] = sorted(name for name in files if name not in claimed)
+    report['files'] = len(files)
+    report['bytes'] = sum(p['size'] for p in probes.values())
+    report['budget_bytes'] = budget_bytes
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Auditoria rápida das imagens do blog (cabeçalhos + orçamento)',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--budget-kb', type=int, default=DEFAULT_BUDGET_KB,
+                        help=f'Maior variante de capa permitida por página (padrão: {DEFAULT_BUDGET_KB} KB)')
+    parser.add_argument('--strict', action='store_true', help='Variantes faltando também reprovam')
+    parser.add_argument('--json', action='store_true', help='Saída JSON')
+    parser.add_argument('--workers', type=int, default=16, help='Threads de leitura')
+
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    report = run_audit(args.budget_kb * 1024, args.workers)
+    report['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+    failures = len(report['missing']) + len(report['truncated']) + len(report['over_budget'])
+    if args.strict:
+        failures += len(report['missing_variants'])
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        sys.exit(1 if failures else 0)
+
+    print("\n" + "="*70)
+    print("🔍 AUDITORIA DE IMAGENS DO BLOG")
+    print("="*70)
+    print(f"📂 {report['files']} arquivos ({report['bytes'] / 1024 / 1024:.1f} MB) | "
+          f"{len(report['posts'])} posts | {report['elapsed_ms']} ms")
+
+    print(f"\n❌ Imagens referenciadas ausentes: {len(report['missing'])}")
+    for item in report['missing']:
+        print(f"   Post {item['id']:3d}: {item['image']}")
+
+    print(f"\n⚠️  Posts com variantes faltando: {len(report['missing_variants'])}")
+    for item in report['missing_variants']:
+        print(f"   Post {item['id']:3d}: {len(item['missing'])} faltando (ex.: {item['missing'][0]})")
+
+    print(f"\n💥 Arquivos truncados: {len(report['truncated'])}")
+    for name in report['truncated']:
+        print(f"   {name}")
+
+    for item in report['unknown']:
+        print(f"   ❓ {item['file']}: {item['error']}")
+
+    print(f"\n📦 Acima do orçamento ({args.budget_kb} KB): {len(report['over_budget'])}")
+    for item in report['over_budget']:
+        print(f"   Post {item['id']:3d}: {item['file']} ({item['bytes'] / 1024:.0f} KB)")
+
+    print(f"\n🗑️  Arquivos órfãos: {len(report['orphans'])}")
+    for name in report['orphans'][:30]:
+        print(f"   {name}")
+    if len(report['orphans']) > 30:
+        print(f"   ... e mais {len(report['orphans']) - 30}")
+
+    print("\n" + "="*70)
+    print("✅ Auditoria aprovada" if not failures else f"✗ Auditoria reprovada ({failures} problema(s))")
+    print("="*70 + "\n")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Carregador de Dados do Blog e Podcasts
+Saraiva Vision - Parser de literais JavaScript para src/data/*.js
+
+Substitui as regex frágeis dos geradores (que não reconhecem chaves entre
+aspas como "id": 31) por um tokenizador de literais JS: objetos, arrays,
+strings com aspas simples/duplas/crase, números, booleanos, null, comentários
+e vírgulas finais. Lê os arrays exportados sem executar Node.
+
+Uso:
+    from blog_data import load_blog_posts_data, load_podcast_episodes
+    posts = load_blog_posts_data()
+"""
+
+import re
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Fontes de dados
+DATA_DIR = Path(__file__).parent.parent / "src" / "data"
+BLOG_IMAGES_DIR = Path(__file__).parent.parent / "public" / "Blog"
+BLOG_POSTS_PATH = DATA_DIR / "blogPosts.js"
+PODCAST_EPISODES_PATH = DATA_DIR / "podcastEpisodes.js"
+
+# Campos usados pelos geradores de capa (o restante do post fica disponível)
+POST_SUMMARY_FIELDS = ('id', 'slug', 'title', 'excerpt', 'category')
+
+_TOKEN_RE = re.compile(r'''
+      (?P<ws>\s+|//[^\n]*|/\*.*?\*/)
+    | (?P<string>"(?:[^"\\]|\\.)*"|'(?:[^'\\]|\\.)*'|`(?:[^`\\]|\\.)*`)
+    | (?P<number>-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    | (?P<ident>[A-Za-z_$][\w$]*)
+    | (?P<punct>[{}\[\]:,])
+''', re.VERBOSE | re.DOTALL)
+
+_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v', '0': '\0'}
+_ESCAPE_RE = re.compile(r'\\(u\{[0-9a-fA-F]+\}|u[0-9a-fA-F]{4}|x[0-9a-fA-F]{2}|\r\n|.)', re.DOTALL)
+_VARIANT_SUFFIX_RE = re.compile(r'(-optimized)?(-\d+w)?$')
+_MASTER_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+_LITERALS = {'true': True, 'false': False, 'null': None, 'undefined': None}
+
+
+class JSLiteralError(ValueError):
+    """Literal JavaScript não suportado ou malformado"""
+
+
+def _unescape(match: 're.Match') -> str:
+    seq = match.group(1)
+    if seq[0] == 'u':
+        return chr(int(seq[2:-1] if seq[1] == '{' else seq[1:], 16))
+    if seq[0] == 'x':
+        return chr(int(seq[1:], 16))
+    if seq in ('\n', '\r\n'):
+        return ''  # continuação de linha
+    return _ESCAPES.get(seq, seq)
+
+
+def _decode_string(token: str) -> str:
+    # Strings com aspas duplas do JSON.stringify (maioria em blogPosts.js): json é mais rápido
+    if token[0] == '"':
+        try:
+            return json.loads(token)
+        except ValueError:
+            pass
+    return _ESCAPE_RE.sub(_unescape, token[1:-1])
+
+
+def _tokenize(source: str, start: int):
+    pos = start
+    length = len(source)
+    match_at = _TOKEN_RE.match
+    while pos < length:
+        match = match_at(source, pos)
+        if match is None:
+            raise JSLiteralError(f"Token inesperado na posição {pos}: {source[pos:pos + 30]!r}")
+        pos = match.end()
+        kind = match.lastgroup
+        if kind != 'ws':
+            yield kind, match.group(kind), match.start()
+
+
+def _parse_value(tokens, token) -> Any:
+    kind, value, pos = token
+
+    if kind == 'punct':
+        if value == '{':
+            result = {}
+            while True:
+                kind, value, pos = next(tokens)
+                if value == '}':
+                    return result
+                if value == ',':
+                    continue
+                if kind == 'string':
+                    key = _decode_string(value)
+                elif kind in ('ident', 'number'):
+                    key = value
+                else:
+                    raise JSLiteralError(f"Chave inválida na posição {pos}: {value!r}")
+                colon = next(tokens)
+                if colon[1] != ':':
+                    raise JSLiteralError(f"Esperado ':' na posição {colon[2]}")
+                result[key] = _parse_value(tokens, next(tokens))
+        if value == '[':
+            result = []
+            while True:
+                token = next(tokens)
+                if token[1] == ']':
+                    return result
+                if token[1] == ',':
+                    continue
+                result.append(_parse_value(tokens, token))
+        raise JSLiteralError(f"Pontuação inesperada na posição {pos}: {value!r}")
+
+    if kind == 'string':
+        if value[0] == '`' and '${' in value:
+            raise JSLiteralError(f"Template literal com interpolação na posição {pos}")
+        return _decode_string(value)
+    if kind == 'number':
+        number = float(value)
+        return int(number) if number.is_integer() and '.' not in value and 'e' not in value.lower() else number
+    if kind == 'ident' and value in _LITERALS:
+        return _LITERALS[value]
+
+    raise JSLiteralError(f"Valor não literal na posição {pos}: {value!r}")
+
+
+def parse_js_literal(source: str, start: int = 0) -> Any:
+    """Faz parse do literal JS que começa em source[start:]"""
+    tokens = _tokenize(source, start)
+    try:
+        return _parse_value(tokens, next(tokens))
+    except StopIteration:
+        raise JSLiteralError("Fim inesperado do arquivo") from None
+
+
+def extract_export(source: str, name: str) -> Any:
+    """Valor de `export const <name> = <literal>` em um módulo JS"""
+    match = re.search(rf'export\s+const\s+{re.escape(name)}\s*=\s*', source)
+    if match is None:
+        raise JSLiteralError(f"export const {name} não encontrado")
+    return parse_js_literal(source, match.end())
+
+
+def load_js_export(path: Path, name: str) -> Any:
+    with open(path, 'r', encoding='utf-8') as f:
+        return extract_export(f.read(), name)
+
+
+def load_blog_posts(path: Path = BLOG_POSTS_PATH) -> List[Dict]:
+    """Todos os posts de blogPosts.js com todos os campos (content, image, seo...)"""
+    return load_js_export(path, 'blogPosts')
+
+
+def load_blog_posts_data(path: Path = BLOG_POSTS_PATH, full: bool = False) -> List[Dict]:
+    """
+    Carrega dados dos posts para os geradores de capa
+
+    Args:
+        path: Arquivo JS com `export const blogPosts = [...]`
+        full: Retornar todos os campos (padrão: id, slug, title, excerpt, category)
+
+    Returns:
+        Lista de dicionários com dados dos posts
+    """
+    if not path.exists():
+        print(f"✗ Arquivo não encontrado: {path}")
+        return []
+
+    try:
+        posts = load_blog_posts(path)
+    except (OSError, JSLiteralError) as e:
+        print(f"✗ Erro ao carregar posts: {str(e)}")
+        return []
+
+    if not full:
+        posts = [{field: post.get(field) for field in POST_SUMMARY_FIELDS} for post in posts]
+
+    print(f"✓ {len(posts)} posts carregados")
+    return posts
+
+
+def load_podcast_episodes(path: Path = PODCAST_EPISODES_PATH) -> List[Dict]:
+    """Todos os episódios de podcastEpisodes.js"""
+    return load_js_export(path, 'podcastEpisodes')
+
+
+def find_post(posts: List[Dict], post_id: int) -> Optional[Dict]:
+    return next((p for p in posts if p.get('id') == post_id), None)
+
+
+def find_cover_source(post: Dict, images_dir: Path = BLOG_IMAGES_DIR) -> Optional[Path]:
+    """
+    Melhor arquivo local para a capa de um post
+
+    O campo `image` aponta para a variante servida (ex.: x-optimized-1200w.webp),
+    que nem sempre existe no repositório. Prefere o master (x.png), depois o
+    arquivo referenciado e por fim qualquer variante do mesmo grupo.
+    """
+    image = post.get('image')
+    if not image:
+        return None
+
+    referenced = images_dir / Path(image).name
+    master_stem = _VARIANT_SUFFIX_RE.sub('', referenced.stem)
+
+    for ext in _MASTER_EXTENSIONS:
+        candidate = images_dir / f"{master_stem}{ext}"
+        if candidate.exists():
+            return candidate
+    if referenced.exists():
+        return referenced
+
+    variants = sorted(images_dir.glob(f"{master_stem}-optimized*"))
+    return variants[0] if variants else None
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Contact Sheets para Revisão de Capas
+Saraiva Vision - Candidatas _opt1/_opt2 e saídas Gemini lado a lado
+
+Monta folhas paginadas (grade de miniaturas com post, modelo e nota de paleta)
+para uma execução, uma categoria ou todo o public/Blog. As miniaturas vêm de
+um cache LRU em disco indexado pelo hash do conteúdo, com limite de tamanho:
+refazer as folhas depois de uma nova execução só decodifica as imagens novas.
+
+Uso:
+    python contact_sheet.py --run 20251019_14
+    python contact_sheet.py --category "Tecnologia"
+    python contact_sheet.py --all --cols 6 --rows 4
+    python contact_sheet.py --since 90
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+from asset_manifest import STATE_DIR, BLOG_DIR, cached_hash, load_manifest
+from blog_data import load_blog_posts, find_cover_source
+from palette_check import REPORTS_DIR
+from pixel_cache import get_pixel_cache
+
+THUMB_CACHE_DIR = STATE_DIR / "thumbnails"
+SHEETS_DIR = STATE_DIR / "contact-sheets"
+
+THUMB_SIZE = (320, 180)
+THUMB_QUALITY = 80
+CACHE_MAX_MB = 64
+LABEL_HEIGHT = 34
+PADDING = 8
+
+IMAGE_EXTENSIONS = {'.png', '.jpg', '.jpeg', '.webp'}
+_POST_ID_RE = re.compile(r'capa_post_(\d+)_')
+_TIMESTAMP_RE = re.compile(r'(\d{8}_\d{6})')
+_MODEL_RE = re.compile(r'_(imagen4_opt\d+|gemini_flash|gemini_edited|gemini_session|gemini)_')
+
+
+class ThumbnailCache:
+    """
+    Miniaturas JPEG em disco indexadas pelo sha256 do arquivo de origem
+
+    O hash vem do manifesto de assets quando tamanho/mtime batem (sem reler o
+    arquivo). LRU pelo mtime da miniatura: cada acerto renova o mtime e a
+    limpeza remove as mais antigas até caber em max_mb.
+    """
+
+    def __init__(self, cache_dir: Path = THUMB_CACHE_DIR, max_mb: float = CACHE_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_files = load_manifest()['files']
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def content_hash(self, path: Path) -> str:
+        return cached_hash(path, self.manifest_files)
+
+    def get(self, path: Path) -> Optional[Path]:
+        """Caminho da miniatura (gerada se ainda não estiver no cache)"""
+        try:
+            digest = self.content_hash(path)
+        except OSError:
+            return None
+        thumb_path = self.cache_dir / digest[:2] / f"{digest}.jpeg"
+
+        if thumb_path.exists():
+            os.utime(thumb_path)  # renova posição no LRU
+            with self._lock:
+                self.hits += 1
+            return thumb_path
+
+        try:
+            thumb = self.decode_small(path, digest)
+            thumb.thumbnail(THUMB_SIZE, Image.LANCZOS)
+        except (OSError, ValueError):
+            return None
+
+        thumb_path.parent.mkdir(exist_ok=True)
+        tmp_path = thumb_path.with_suffix('.tmp')
+        thumb.save(tmp_path, format='JPEG', quality=THUMB_QUALITY)
+        os.replace(tmp_path, thumb_path)
+        with self._lock:
+            self.misses += 1
+        return thumb_path
+
+    def decode_small(self, path: Path, digest: str) -> Image.Image:
+        """
+        Pixels para a miniatura: pirâmide do pixel cache se já existir; senão
+        decodificação direta (draft do JPEG), sem gravar a imagem inteira no cache
+        """
+        width, height = THUMB_SIZE[0] * 2, THUMB_SIZE[1] * 2
+        cached = get_pixel_cache().peek(digest)
+        if cached is not None:
+            return cached.image_at_least(width, height).convert('RGB')
+        with Image.open(path) as opened:
+            opened.draft('RGB', (width, height))
+            return opened.convert('RGB')
+
+    def prune(self) -> int:
+        """Remove as miniaturas menos usadas até o cache caber no limite"""
+        entries = []
+        for thumb in self.cache_dir.glob('*/*.jpeg'):
+            stat = thumb.stat()
+            entries.append((stat.st_mtime, stat.st_size, thumb))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, thumb in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            thumb.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def load_palette_scores() -> Dict[str, float]:
+    """Cobertura de paleta por arquivo (relatório mais recente vence)"""
+    scores = {}
+    if not REPORTS_DIR.exists():
+        return scores
+    for report_path in sorted(REPORTS_DIR.glob('palette-*.json')):
+        try:
+            with open(report_path, 'r', encoding='utf-8') as f:
+                for cover in json.load(f).get('covers', []):
+                    scores[cover['file']] = cover['coverage']
+        except (OSError, ValueError, KeyError):
+            continue
+    return scores
+
+
+def describe(path: Path, post_ids: Dict[str, int], scores: Dict[str, float]) -> Tuple[str, str]:
+    """Duas linhas de legenda: '#22 imagen4_opt1' e 'paleta 74% · 20251019_1412'"""
+    name = path.name
+    post_match = _POST_ID_RE.match(name)
+    post_id = int(post_match.group(1)) if post_match else post_ids.get(name)
+    model_match = _MODEL_RE.search(name)
+    model = model_match.group(1) if model_match else 'capa publicada'
+
+    first = f"#{post_id} {model}" if post_id is not None else f"{path.stem[:30]}"
+    details = []
+    if name in scores:
+        details.append(f"paleta {scores[name]:.0%}")
+    stamp = _TIMESTAMP_RE.search(name)
+    if stamp:
+        details.append(stamp.group(1))
+    return first, ' · '.join(details) or name[:36]
+
+
+def select_images(args, posts: List[Dict]) -> List[Path]:
+    files = sorted(p for p in BLOG_DIR.iterdir()
+                   if p.suffix.lower() in IMAGE_EXTENSIONS and '-crop-' not in p.name)
+
+    if args.run:
+        return [p for p in files if args.run in p.name]
+    if args.since:
+        cutoff = time.time() - args.since * 60
+        return [p for p in files if p.stat().st_mtime >= cutoff]
+    if args.category:
+        ids = {p['id'] for p in posts if p.get('category') == args.category}
+        selected = [p for p in files if (m := _POST_ID_RE.match(p.name)) and int(m.group(1)) in ids]
+        covers = {find_cover_source(p) for p in posts if p['id'] in ids}
+        return sorted(set(selected) | {c for c in covers if c is not None})
+    # --all: masters e candidatas (variantes -optimized/-NNNw repetem a mesma imagem)
+    return [p for p in files if '-optimized' not in p.name and not re.search(r'-\d+w$', p.stem)]
+
+
+def build_sheets(images: List[Path], cache: ThumbnailCache, title: str, cols: int, rows: int,
+                 post_ids: Dict[str, int], scores: Dict[str, float], workers: int = 8) -> List[Path]:
+    """Grava as folhas paginadas e retorna seus caminhos"""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        thumbs = list(executor.map(cache.get, images))
+
+    items = [(img, thumb) for img, thumb in zip(images, thumbs) if thumb is not None]
+    per_page = cols * rows
+    pages = max(1, -(-len(items) // per_page))
+    try:
+        font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 12)
+    except (IOError, OSError):
+        font = ImageFont.load_default()
+
+    cell_w = THUMB_SIZE[0] + PADDING
+    cell_h = THUMB_SIZE[1] + LABEL_HEIGHT + PADDING
+    SHEETS_DIR.mkdir(parents=True, exist_ok=True)
+    ascii_title = unicodedata.normalize('NFKD', title).encode('ascii', 'ignore').decode('ascii')
+    slug = re.sub(r'[^A-Za-z0-9_-]+', '-', ascii_title).strip('-').lower() or 'sheet'
+
+    saved = []
+    for page in range(pages):
+        chunk = items[page * per_page:(page + 1) * per_page]
+        used_rows = max(1, -(-len(chunk) // cols))
+        sheet = Image.new('RGB', (cols * cell_w + PADDING, used_rows * cell_h + PADDING + 24), 'white')
+        draw = ImageDraw.Draw(sheet)
+        draw.text((PADDING, 6), f"{title} - página {page + 1}/{pages} ({len(items)} imagens)",
+                  fill='black', font=font)
+
+        for i, (image_path, thumb_path) in enumerate(chunk):
+            x = PADDING + (i % cols) * cell_w
+            y = 24 + PADDING + (i // cols) * cell_h
+            with Image.open(thumb_path) as thumb:
+                offset = ((THUMB_SIZE[0] - thumb.width) // 2, (THUMB_SIZE[1] - thumb.height) // 2)
+                sheet.paste(thumb, (x + offset[0], y + offset[1]))
+            line1, line2 = describe(image_path, post_ids, scores)
+            draw.text((x, y + THUMB_SIZE[1] + 3), line1, fill='black', font=font)
+            draw.text((x, y + THUMB_SIZE[1] + 17), line2, fill='#555555', font=font)
+
+        output = SHEETS_DIR / f"{slug}-{page + 1:02d}.jpeg"
+        sheet.save(output, format='JPEG', quality=85)
+        saved.append(output)
+
+    # Páginas de uma montagem anterior maior não devem sobrar
+    for stale in SHEETS_DIR.glob(f"{slug}-[0-9][0-9].jpeg"):
+        if stale not in saved:
+            stale.unlink()
+
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Contact sheets paginadas para revisar capas geradas',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--run', type=str, help='Execução: prefixo do timestamp (ex.: 20251019_14)')
+    parser.add_argument('--since', type=int, help='Imagens modificadas nos últimos N minutos')
+    parser.add_argument('--category', type=str, help='Capas e candidatas de uma categoria')
+    parser.add_argument('--all', action='store_true', help='Todo o public/Blog (sem variantes)')
+    parser.add_argument('--cols', type=int, default=5, help='Colunas por folha (padrão: 5)')
+    parser.add_argument('--rows', type=int, default=4, help='Linhas por folha (padrão: 4)')
+    parser.add_argument('--cache-mb', type=float, default=CACHE_MAX_MB,
+                       help=f'Limite do cache de miniaturas (padrão: {CACHE_MAX_MB} MB)')
+
+    args = parser.parse_args()
+
+    if not (args.run or args.since or args.category or args.all):
+        print("✗ Use --run, --since, --category ou --all")
+        parser.print_help()
+        sys.exit(1)
+
+    posts = load_blog_posts()
+    post_ids = {}
+    for post in posts:
+        cover = find_cover_source(post)
+        if cover is not None:
+            post_ids.setdefault(cover.name, post['id'])
+
+    images = select_images(args, posts)
+    if not images:
+        print("✗ Nenhuma imagem selecionada")
+        sys.exit(1)
+
+    title = args.run or args.category or (f"ultimos-{args.since}min" if args.since else 'public-blog')
+    print(f"\n🗂️  {len(images)} imagem(ns) → folhas {args.cols}x{args.rows}")
+
+    started = time.perf_counter()
+    cache = ThumbnailCache(max_mb=args.cache_mb)
+    sheets = build_sheets(images, cache, title, args.cols, args.rows, post_ids, load_palette_scores())
+    pruned = cache.prune()
+    elapsed = time.perf_counter() - started
+
+    for sheet in sheets:
+        print(f"   ✓ {sheet}")
+    print(f"\n⚡ Miniaturas: {cache.hits} do cache, {cache.misses} decodificadas"
+          f"{f', {pruned} removidas (LRU)' if pruned else ''} — {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
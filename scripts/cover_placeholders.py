@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Placeholders BlurHash/LQIP para as Capas
+Saraiva Vision - Algo para mostrar enquanto a capa AVIF/WebP carrega
+
+Para cada imagem do manifesto público (public/image-manifest.json) calcula:
+- blurhash: string BlurHash (4x3 componentes) de um array reduzido em numpy
+- lqip: prévia WebP minúscula (16 px de largura) em data URI base64
+
+Os resultados ficam em cache por sha256 do arquivo (.cache/blog-assets/
+placeholders.json): cada execução só decodifica capas novas ou alteradas e
+grava o campo `placeholder` ao lado das variantes de cada entrada.
+
+Com --posts grava também src/data/coverPlaceholders.json, um mapa
+{campo image do post: lqip} só com as capas usadas pelos posts. O
+OptimizedImage do blog o importa no build: a prévia borrada entra no
+primeiro render, sem esperar o download do manifesto inteiro (que carrega
+hashes e variantes que o cliente não usa).
+
+Uso:
+    python cover_placeholders.py
+    python cover_placeholders.py --files ../public/Blog/capa-catarata.png
+    python cover_placeholders.py --posts               # só o mapa dos posts (antes do build)
+    python cover_placeholders.py --dry-run
+"""
+
+import sys
+import json
+import math
+import base64
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from asset_manifest import (PROJECT_ROOT, PUBLIC_DIR, STATE_DIR, cached_hash, load_cache, load_manifest,
+                            write_json_atomic)
+from blog_data import find_cover_source, load_blog_posts_data
+from pixel_cache import decode
+
+IMAGE_MANIFEST_PATH = PUBLIC_DIR / "image-manifest.json"
+PLACEHOLDER_CACHE_PATH = STATE_DIR / "placeholders.json"
+POST_PLACEHOLDERS_PATH = PROJECT_ROOT / "src" / "data" / "coverPlaceholders.json"
+
+# BlurHash é calculado sobre uma amostra pequena: o resultado só tem 4x3 frequências
+SAMPLE_WIDTH = 32
+BLURHASH_COMPONENTS = (4, 3)
+LQIP_WIDTH = 16
+LQIP_QUALITY = 40
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def _encode83(value: int, length: int) -> str:
+    return ''.join(_BASE83[(value // 83 ** (length - i)) % 83] for i in range(1, length + 1))
+
+
+def srgb_to_linear(values: np.ndarray) -> np.ndarray:
+    v = values / 255.0
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def _linear_to_srgb(value: float) -> int:
+    v = min(1.0, max(0.0, value))
+    if v <= 0.0031308:
+        return int(v * 12.92 * 255 + 0.5)
+    return int((1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash_encode(rgb: np.ndarray, components: tuple = BLURHASH_COMPONENTS) -> str:
+    """
+    BlurHash de um array RGB uint8 (altura x largura x 3)
+
+    As somas de cossenos de todas as componentes saem de um único einsum
+    sobre as bases horizontais e verticais, sem laço por pixel.
+    """
+    x_components, y_components = components
+    height, width = rgb.shape[:2]
+    linear = srgb_to_linear(rgb.astype(np.float64))
+
+    basis_x = np.cos(np.pi * np.arange(x_components)[:, None] * np.arange(width)[None, :] / width)
+    basis_y = np.cos(np.pi * np.arange(y_components)[:, None] * np.arange(height)[None, :] / height)
+    # factors[j, i] = média de linear * cos_x(i) * cos_y(j); componentes AC valem o dobro
+    normalization = np.full((y_components, x_components, 1), 2.0)
+    normalization[0, 0] = 1.0
+    factors = np.einsum('jy,ix,yxc->jic', basis_y, basis_x, linear) * normalization / (width * height)
+    factors = factors.reshape(-1, 3)
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if len(ac):
+        quantised_max = int(max(0, min(82, math.floor(np.abs(ac).max() * 166 - 0.5))))
+        maximum = (quantised_max + 1) / 166
+        result += _encode83(quantised_max, 1)
+    else:
+        maximum = 1.0
+        result += _encode83(0, 1)
+
+    r, g, b = (_linear_to_srgb(c) for c in dc)
+    result += _encode83((r << 16) + (g << 8) + b, 4)
+
+    scaled = ac / maximum
+    quantised = np.floor(np.clip(np.sign(scaled) * np.abs(scaled) ** 0.5 * 9 + 9.5, 0, 18)).astype(int)
+    for qr, qg, qb in quantised:
+        result += _encode83(int(qr) * 19 * 19 + int(qg) * 19 + int(qb), 2)
+    return result
+
+
+def load_sample(path: Path, width: int = SAMPLE_WIDTH) -> Tuple[Image.Image, Tuple[int, int]]:
+    """Amostra na largura pedida a partir da pirâmide do cache de pixels + tamanho original"""
+    decoded = decode(path)
+    sample = decoded.image_at_least(width * 4).convert('RGB')
+    height = max(1, round(sample.height * width / sample.width))
+    return sample.resize((width, height), Image.BOX, reducing_gap=3.0), decoded.size
+
+
+def lqip_data_uri(sample: Image.Image, width: int = LQIP_WIDTH, quality: int = LQIP_QUALITY) -> str:
+    height = max(1, round(sample.height * width / sample.width))
+    buffer = BytesIO()
+    sample.resize((width, height), Image.BOX).save(buffer, format='WEBP', quality=quality, method=6)
+    return 'data:image/webp;base64,' + base64.b64encode(buffer.getvalue()).decode('ascii')
+
+
+def compute_placeholder(path: Path) -> Dict:
+    sample, (width, height) = load_sample(path)
+    return {
+        'blurhash': blurhash_encode(np.asarray(sample)),
+        'lqip': lqip_data_uri(sample),
+        'width': width,
+        'height': height,
+    }
+
+
+class PlaceholderStore:
+    """Cache de placeholders por sha256 do arquivo de origem"""
+
+    def __init__(self, cache_path: Path = PLACEHOLDER_CACHE_PATH):
+        self.cache_path = cache_path
+        self.cache = load_cache(cache_path)
+        self.manifest_files = load_manifest()['files']
+        self.computed = 0
+        self.reused = 0
+
+    def get_many(self, paths: Iterable[Path], workers: int = 8) -> Dict[Path, Dict]:
+        """Placeholders dos arquivos; só decodifica os que não estão no cache"""
+        digests = {}
+        for path in paths:
+            try:
+                digests[path] = cached_hash(path, self.manifest_files)
+            except OSError:
+                continue
+
+        missing = sorted({d for d in digests.values() if d not in self.cache})
+        sources = {}
+        for path, digest in digests.items():
+            sources.setdefault(digest, path)
+
+        def compute(digest: str):
+            try:
+                return digest, compute_placeholder(sources[digest])
+            except (OSError, ValueError) as e:
+                print(f"⚠️  {sources[digest].name}: {e}")
+                return digest, None
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for digest, placeholder in executor.map(compute, missing):
+                if placeholder is not None:
+                    self.cache[digest] = placeholder
+                    self.computed += 1
+
+        self.reused += len(digests) - len(missing)
+        return {path: self.cache[d] for path, d in digests.items() if d in self.cache}
+
+    def save(self) -> None:
+        if self.computed:
+            write_json_atomic(self.cache, self.cache_path, indent=None)
+
+
+def update_image_manifest(store: PlaceholderStore, only: Optional[List[Path]] = None,
+                          manifest_path: Path = IMAGE_MANIFEST_PATH, dry_run: bool = False) -> int:
+    """
+    Grava `placeholder` nas entradas do manifesto público
+
+    Args:
+        only: Limitar às entradas cujo arquivo original está na lista
+
+    Returns:
+        Número de entradas alteradas
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    entries = data.get('manifest', {})
+
+    targets = {}
+    wanted = {p.resolve() for p in only} if only is not None else None
+    for basename, entry in entries.items():
+        source = PUBLIC_DIR / entry['path'].lstrip('/')
+        if wanted is None or source.resolve() in wanted:
+            targets[basename] = source
+
+    placeholders = store.get_many(targets.values())
+    changed = 0
+    for basename, source in targets.items():
+        placeholder = placeholders.get(source)
+        if placeholder is not None and entries[basename].get('placeholder') != placeholder:
+            entries[basename]['placeholder'] = placeholder
+            changed += 1
+
+    if changed and not dry_run:
+        write_json_atomic(data, manifest_path)
+    return changed
+
+
+def update_post_placeholders(store: PlaceholderStore, path: Path = POST_PLACEHOLDERS_PATH,
+                             dry_run: bool = False) -> int:
+    """
+    Grava o mapa {image do post: lqip} importado pelo OptimizedImage
+
+    Só as capas referenciadas por blogPosts.js entram (o mapa vai no bundle).
+    O arquivo só é reescrito quando muda, para não sujar o build.
+
+    Returns:
+        Número de capas no mapa
+    """
+    sources = {}
+    for post in load_blog_posts_data(full=True):
+        image = post.get('image')
+        source = find_cover_source(post) if image else None
+        if source is not None:
+            sources[image] = source
+
+    placeholders = store.get_many(set(sources.values()))
+    mapping = {image: placeholders[source]['lqip']
+               for image, source in sorted(sources.items()) if source in placeholders}
+
+    if not dry_run and load_cache(path) != mapping:
+        write_json_atomic(mapping, path)
+    return len(mapping)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Placeholders BlurHash/LQIP no manifesto de imagens',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--files', nargs='+', help='Somente estas imagens (padrão: todo o manifesto)')
+    parser.add_argument('--posts', action='store_true',
+                        help=f'Só gravar o mapa das capas dos posts ({POST_PLACEHOLDERS_PATH.name})')
+    parser.add_argument('--dry-run', action='store_true', help='Calcular sem gravar o manifesto')
+
+    args = parser.parse_args()
+
+    if args.posts:
+        store = PlaceholderStore()
+        count = update_post_placeholders(store, dry_run=args.dry_run)
+        if not args.dry_run:
+            store.save()
+        print(f"✓ Placeholders: {count} capa(s) de posts em {POST_PLACEHOLDERS_PATH.relative_to(PROJECT_ROOT)} "
+              f"({store.computed} calculados, {store.reused} do cache)")
+        return
+
+    if not IMAGE_MANIFEST_PATH.exists():
+        print(f"✗ {IMAGE_MANIFEST_PATH} não encontrado (rode npm run generate:manifest)")
+        sys.exit(1)
+
+    only = [Path(f) for f in args.files] if args.files else None
+    store = PlaceholderStore()
+    changed = update_image_manifest(store, only=only, dry_run=args.dry_run)
+    if not args.dry_run:
+        store.save()
+
+    print(f"✓ Placeholders: {store.computed} calculados, {store.reused} do cache, "
+          f"{changed} entrada(s) atualizadas em {IMAGE_MANIFEST_PATH.name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Agendador de Capas por Cota e Prioridade
+Saraiva Vision - Backlog de gerações que cabe na cota diária
+
+`--all` nos geradores ignora a cota do dia (esgota no meio ou sobra) e segue a
+ordem do arquivo. Aqui cada post vira um job com prioridade calculada dos
+metadados (capa ausente ou genérica, destaque, data de publicação, dias
+adiados) e cada rodada leva só o que cabe:
+- na cota restante do dia, de um ledger persistente de unidades usadas por
+  modelo e por dia (.cache/blog-assets/quota-ledger.json; o dia da cota vira
+  à meia-noite do Pacífico, como na API)
+- no --deadline da rodada, estimado pelo p50 de latência observado
+
+O restante fica no backlog (.cache/blog-assets/cover-backlog.json) para a
+próxima rodada, com bônus de prioridade por dia adiado.
+
+Uso:
+    python cover_scheduler.py --enqueue --all
+    python cover_scheduler.py --plan
+    python cover_scheduler.py --run --deadline 18:30
+    python cover_scheduler.py --run --generator flash --deadline 45 --daily-quota 50
+"""
+
+import re
+import sys
+import math
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from api_key_pool import DEFAULT_RATE_PER_MINUTE
+from asset_manifest import STATE_DIR, load_cache, write_json_atomic
+from blog_data import find_cover_source, load_blog_posts_data
+from hedged_requests import LatencyTracker
+
+LEDGER_PATH = STATE_DIR / "quota-ledger.json"
+BACKLOG_PATH = STATE_DIR / "cover-backlog.json"
+
+# A cota diária da API reinicia à meia-noite do horário do Pacífico
+QUOTA_TIMEZONE = ZoneInfo('America/Los_Angeles')
+LEDGER_RETENTION_DAYS = 30
+
+GENERATORS = {
+    'imagen': 'imagen-4.0-generate-001',
+    'flash': 'gemini-2.5-flash-image-preview',
+}
+# Unidades por chave e por dia (imagens no Imagen, requisições no Flash); ajuste ao tier com --daily-quota
+DEFAULT_DAILY_QUOTA = {
+    'imagen': 70,
+    'flash': 100,
+}
+# Duração estimada de um job sem latências observadas (segundos)
+DEFAULT_JOB_SECONDS = 40.0
+
+# Pesos da prioridade
+WEIGHT_MISSING = 40.0
+WEIGHT_GENERIC = 30.0
+WEIGHT_FEATURED = 20.0
+WEIGHT_RECENT = 25.0
+RECENCY_HALF_LIFE_DAYS = 60.0
+WEIGHT_PER_DEFERRED_DAY = 2.0
+MAX_DEFERRED_BONUS = 20.0
+
+_GENERIC_NAME_RE = re.compile(r'(placeholder|default|generic|gen[eé]rica?|blog-cover|sem-capa)', re.IGNORECASE)
+_NAME_WORD_RE = re.compile(r'[a-z]{4,}')
+_NAME_NOISE = {'capa', 'optimized', 'imagen', 'gemini', 'flash', 'post', 'blog'}
+
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    """Dia da cota (meia-noite do Pacífico) em ISO"""
+    return (now or datetime.now(QUOTA_TIMEZONE)).astimezone(QUOTA_TIMEZONE).date().isoformat()
+
+
+def parse_deadline(value: str, now: Optional[datetime] = None) -> datetime:
+    """'HH:MM' (hoje, ou amanhã se já passou), minutos ('90') ou ISO completo"""
+    now = now or datetime.now()
+    if re.fullmatch(r'\d+(\.\d+)?', value):
+        return now + timedelta(minutes=float(value))
+    if re.fullmatch(r'\d{1,2}:\d{2}', value):
+        hour, minute = map(int, value.split(':'))
+        target = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        return target if target > now else target + timedelta(days=1)
+    return datetime.fromisoformat(value)
+
+
+class QuotaLedger:
+    """Unidades de cota usadas por dia e por modelo, gravadas após cada job"""
+
+    def __init__(self, path: Path = LEDGER_PATH):
+        self.path = path
+        self.data: Dict[str, Dict[str, Dict]] = load_cache(path)
+        self._lock = threading.Lock()
+
+    def used(self, model: str, day: Optional[str] = None) -> float:
+        return self.data.get(day or quota_day(), {}).get(model, {}).get('units', 0.0)
+
+    def charge(self, model: str, units: float, requests: int = 1, day: Optional[str] = None) -> None:
+        with self._lock:
+            entry = self.data.setdefault(day or quota_day(), {}).setdefault(
+                model, {'units': 0.0, 'requests': 0})
+            entry['units'] += units
+            entry['requests'] += requests
+            self._save()
+
+    def _save(self) -> None:
+        cutoff = (date.fromisoformat(quota_day()) - timedelta(days=LEDGER_RETENTION_DAYS)).isoformat()
+        self.data = {day: models for day, models in sorted(self.data.items()) if day >= cutoff}
+        write_json_atomic(self.data, self.path)
+
+
+def is_generic_cover(post: Dict, image_counts: Dict[str, int]) -> bool:
+    """Capa compartilhada com outro post, de nome genérico ou sem relação com o slug"""
+    image = post.get('image') or ''
+    if image_counts.get(image, 0) > 1 or _GENERIC_NAME_RE.search(image):
+        return True
+    name_words = set(_NAME_WORD_RE.findall(Path(image).stem.lower())) - _NAME_NOISE
+    slug_words = set(_NAME_WORD_RE.findall((post.get('slug') or '').lower()))
+    return bool(name_words) and not (name_words & slug_words)
+
+
+def score_post(post: Dict, image_counts: Dict[str, int], deferred_days: int = 0,
+               today: Optional[date] = None) -> Tuple[float, List[str]]:
+    """
+    Prioridade do post (maior primeiro) e os motivos
+
+    Capa ausente > capa genérica > destaque; a data dá um bônus que decai com
+    meia-vida de RECENCY_HALF_LIFE_DAYS; jobs adiados ganham pontos por dia.
+    """
+    today = today or date.today()
+    score, reasons = 0.0, []
+    if find_cover_source(post) is None:
+        score += WEIGHT_MISSING
+        reasons.append('sem capa')
+    elif is_generic_cover(post, image_counts):
+        score += WEIGHT_GENERIC
+        reasons.append('capa genérica')
+    if post.get('featured'):
+        score += WEIGHT_FEATURED
+        reasons.append('destaque')
+    try:
+        age = max(0, (today - date.fromisoformat(str(post.get('date'))[:10])).days)
+        score += WEIGHT_RECENT * 0.5 ** (age / RECENCY_HALF_LIFE_DAYS)
+        if age <= 30:
+            reasons.append(f'publicado há {age}d')
+    except ValueError:
+        pass
+    if deferred_days:
+        score += min(MAX_DEFERRED_BONUS, WEIGHT_PER_DEFERRED_DAY * deferred_days)
+        reasons.append(f'adiado {deferred_days}d')
+    return round(score, 2), reasons
+
+
+class CoverBacklog:
+    """Jobs pendentes (um por post) que sobrevivem entre rodadas"""
+
+    def __init__(self, path: Path = BACKLOG_PATH):
+        self.path = path
+        data = load_cache(path)
+        self.jobs: Dict[str, Dict] = data.get('jobs', {})
+        self.done: Dict[str, str] = data.get('done', {})
+
+    def enqueue(self, posts: List[Dict], generator: str) -> int:
+        added = 0
+        for post in posts:
+            key = str(post['id'])
+            if key not in self.jobs:
+                self.jobs[key] = {'post_id': post['id'], 'generator': generator,
+                                  'enqueued': date.today().isoformat(), 'attempts': 0}
+                added += 1
+        return added
+
+    def complete(self, post_id: int) -> None:
+        self.jobs.pop(str(post_id), None)
+        self.done[str(post_id)] = datetime.now().isoformat(timespec='seconds')
+
+    def fail(self, post_id: int) -> None:
+        job = self.jobs.get(str(post_id))
+        if job is not None:
+            job['attempts'] += 1
+
+    def ranked(self, posts: List[Dict], generator: str) -> List[Dict]:
+        """Jobs do gerador com prioridade atual, do maior para o menor"""
+        by_id = {p['id']: p for p in posts}
+        image_counts: Dict[str, int] = {}
+        for post in posts:
+            image_counts[post.get('image') or ''] = image_counts.get(post.get('image') or '', 0) + 1
+
+        today = date.today()
+        ranked = []
+        for job in self.jobs.values():
+            post = by_id.get(job['post_id'])
+            if post is None or job['generator'] != generator:
+                continue
+            deferred = (today - date.fromisoformat(job['enqueued'])).days
+            score, reasons = score_post(post, image_counts, deferred, today)
+            ranked.append({**job, 'post': post, 'score': score, 'reasons': reasons})
+        return sorted(ranked, key=lambda j: (-j['score'], j['post_id']))
+
+    def save(self) -> None:
+        write_json_atomic({'jobs': self.jobs, 'done': self.done}, self.path)
+
+
+def estimate_job_seconds(model: str, tracker: Optional[LatencyTracker] = None) -> float:
+    """p50 observado do modelo (latency.json) ou o padrão"""
+    observed = (tracker or LatencyTracker.load()).percentile(model, 0.5)
+    return observed if observed is not None else DEFAULT_JOB_SECONDS
+
+
+def pack_jobs(ranked: List[Dict], units_left: float, cost: float, job_seconds: float,
+              seconds_left: Optional[float], concurrency: int) -> Tuple[List[Dict], List[Dict]]:
+    """
+    Seleciona jobs por prioridade até a cota ou o tempo acabarem
+
+    O tempo é medido em slots: concurrency jobs em paralelo durante
+    seconds_left. Retorna (rodada de hoje, adiados).
+    """
+    slots = math.inf if seconds_left is None else int(seconds_left * max(1, concurrency) // job_seconds)
+    today, deferred = [], []
+    for job in ranked:
+        if cost <= units_left and len(today) < slots:
+            today.append(job)
+            units_left -= cost
+        else:
+            deferred.append(job)
+    return today, deferred
+
+
+def build_generator(name: str, key_pool, hedger, output_dir: Optional[Path] = None):
+    """Gerador existente (Imagen ou Flash) com o pool de chaves e o hedger da rodada"""
+    from api_key_pool import load_api_keys
+    api_key = load_api_keys()[0]
+    if name == 'imagen':
+        from generate_covers_imagen import ImagenCoverGenerator
+        return ImagenCoverGenerator(api_key, model=GENERATORS[name], key_pool=key_pool, hedger=hedger,
+                                    output_dir=output_dir)
+    from generate_covers_gemini_flash import GeminiFlashCoverGenerator
+    return GeminiFlashCoverGenerator(api_key, key_pool=key_pool, hedger=hedger, output_dir=output_dir)
+
+
+def run_jobs(jobs: List[Dict], args, ledger: QuotaLedger, backlog: CoverBacklog, budget: float,
+             cost: float, deadline: Optional[datetime], job_seconds: float) -> Dict[str, int]:
+    """Executa a rodada; cada worker confere deadline e cota antes de começar"""
+    from api_key_pool import ApiKeyPool, load_api_keys
+    from hedged_requests import HedgedCaller
+
+    model = GENERATORS[args.generator]
+    key_pool = ApiKeyPool(load_api_keys(), rate_per_minute=args.rate_per_key)
+    hedger = HedgedCaller()
+    generator = build_generator(args.generator, key_pool, hedger)
+    counts = {'done': 0, 'failed': 0, 'deferred': 0}
+    lock = threading.Lock()
+
+    def work(job: Dict) -> None:
+        with lock:
+            late = deadline is not None and datetime.now() + timedelta(seconds=job_seconds) > deadline
+            over = ledger.used(model) + cost > budget
+            if late or over:
+                counts['deferred'] += 1
+                return
+            ledger.charge(model, cost)
+
+        post = job['post']
+        if args.generator == 'imagen':
+            files = generator.generate_cover(post, num_variations=args.variations)
+        else:
+            files = generator.generate_cover(post)
+        with lock:
+            if files:
+                backlog.complete(post['id'])
+                counts['done'] += 1
+            else:
+                backlog.fail(post['id'])
+                counts['failed'] += 1
+            backlog.save()
+
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        list(executor.map(work, jobs))
+
+    # Hedges e retentativas também gastam cota: o pool sabe o total real
+    extra = sum(s['units'] for s in key_pool.stats()) - cost * (counts['done'] + counts['failed'])
+    if extra > 0:
+        ledger.charge(model, extra, requests=0)
+    print(key_pool.report())
+    print(hedger.report())
+    hedger.close()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Backlog de capas priorizado e limitado pela cota diária',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--enqueue', action='store_true', help='Adicionar posts ao backlog')
+    parser.add_argument('--all', action='store_true', help='Com --enqueue: todos os posts')
+    parser.add_argument('--category', type=str, help='Com --enqueue: posts da categoria')
+    parser.add_argument('--post-id', type=int, nargs='+', help='Com --enqueue: posts específicos')
+    parser.add_argument('--plan', action='store_true', help='Mostrar a rodada de hoje sem gerar')
+    parser.add_argument('--run', action='store_true', help='Executar a rodada de hoje')
+    parser.add_argument('--generator', choices=sorted(GENERATORS), default='imagen', help='Gerador dos jobs')
+    parser.add_argument('--daily-quota', type=float, default=None,
+                        help='Unidades por chave e por dia (padrão: imagen 70, flash 100)')
+    parser.add_argument('--deadline', type=str,
+                        help='Fim da rodada: HH:MM, minutos a partir de agora ou ISO')
+    parser.add_argument('--variations', type=int, default=2, help='Imagens por post (Imagen)')
+    parser.add_argument('--concurrency', type=int, default=2, help='Jobs em paralelo')
+    parser.add_argument('--rate-per-key', type=float, default=DEFAULT_RATE_PER_MINUTE, help='Requisições/imagens por minuto por chave')
+
+    args = parser.parse_args()
+    if args.daily_quota is None:
+        args.daily_quota = DEFAULT_DAILY_QUOTA[args.generator]
+
+    if not (args.enqueue or args.plan or args.run):
+        parser.print_help()
+        sys.exit(1)
+
+    posts = load_blog_posts_data(full=True)
+    if not posts:
+        sys.exit(1)
+    backlog = CoverBacklog()
+
+    if args.enqueue:
+        if args.post_id:
+            selected = [p for p in posts if p['id'] in args.post_id]
+        elif args.category:
+            selected = [p for p in posts if p['category'] == args.category]
+        elif args.all:
+            selected = posts
+        else:
+            print("✗ --enqueue requer --all, --category ou --post-id")
+            sys.exit(1)
+        added = backlog.enqueue(selected, args.generator)
+        backlog.save()
+        print(f"✓ {added} job(s) adicionados ({len(backlog.jobs)} no backlog)")
+
+    if not (args.plan or args.run):
+        return
+
+    from api_key_pool import load_api_keys
+    ledger = QuotaLedger()
+    model = GENERATORS[args.generator]
+    keys = max(1, len(load_api_keys()))
+    budget = args.daily_quota * keys
+    units_left = max(0.0, budget - ledger.used(model))
+    cost = float(args.variations if args.generator == 'imagen' else 1)
+    deadline = parse_deadline(args.deadline) if args.deadline else None
+    seconds_left = max(0.0, (deadline - datetime.now()).total_seconds()) if deadline else None
+    job_seconds = estimate_job_seconds(model)
+
+    ranked = backlog.ranked(posts, args.generator)
+    today, deferred = pack_jobs(ranked, units_left, cost, job_seconds, seconds_left, args.concurrency)
+
+    print("\n" + "="*70)
+    print(f"🗓️  Cota de {quota_day()} ({model}): {ledger.used(model):.0f} de {budget:.0f} unidades usadas "
+          f"({keys} chave(s))")
+    if deadline:
+        print(f"⏰ Deadline {deadline:%H:%M} ({seconds_left / 60:.0f} min, ~{job_seconds:.0f}s por job, "
+              f"{args.concurrency} em paralelo)")
+    print(f"📋 Rodada: {len(today)} job(s), {len(today) * cost:.0f} unidades | adiados: {len(deferred)}")
+    print("="*70)
+    for job in today:
+        print(f"  ▶ {job['score']:6.1f}  #{job['post_id']:3d} {job['post']['title'][:50]:50s} "
+              f"{', '.join(job['reasons'])}")
+    for job in deferred[:10]:
+        print(f"  ⏭ {job['score']:6.1f}  #{job['post_id']:3d} {job['post']['title'][:50]}")
+    if len(deferred) > 10:
+        print(f"  ... e mais {len(deferred) - 10} adiado(s)")
+
+    if not args.run or not today:
+        return
+
+    started = time.monotonic()
+    counts = run_jobs(today, args, ledger, backlog, budget, cost, deadline, job_seconds)
+    print("\n" + "="*70)
+    print(f"✅ {counts['done']} concluído(s), {counts['failed']} falha(s), "
+          f"{counts['deferred']} adiado(s) em execução, {time.monotonic() - started:.0f}s")
+    print(f"🗓️  Cota usada hoje: {ledger.used(model):.0f} de {budget:.0f} | "
+          f"{len(backlog.jobs)} job(s) seguem no backlog")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
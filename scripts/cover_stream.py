@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Resultados em Streaming dos Geradores de Capa
+Saraiva Vision - Reagir a cada capa assim que ela é gravada
+
+generate_cover() só devolve a lista de arquivos quando o post inteiro
+termina. stream_covers() roda os posts em paralelo e entrega um CoverResult
+por imagem no momento em que ela é salva (caminho, post, dimensões, bytes,
+tempos de prompt/request/gravação): variantes, upload ou deploy podem começar
+na primeira capa em vez de esperar o lote.
+
+Os geradores chamam `self.on_result(result)` após gravar cada imagem; o
+padrão é None (sem custo). Com --jsonl, os CLIs escrevem uma linha JSON por
+imagem no stdout e o log humano vai para o stderr.
+
+Uso:
+    from cover_stream import stream_covers
+    for result in stream_covers(generator, posts, concurrency=4, num_variations=2):
+        print(result.path, result.post_id, result.width, result.height)
+
+    python generate_covers_imagen.py --all --jsonl | jq -r .path
+"""
+
+import sys
+import json
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, TextIO
+
+_JOB_DONE = object()
+
+
+class CoverResult:
+    """Uma imagem gravada por um gerador"""
+
+    __slots__ = ('path', 'post_id', 'generator', 'model', 'width', 'height', 'bytes', 'timings', 'saved_at')
+
+    def __init__(self, path: str, post_id: int, generator: str, model: str, width: int, height: int,
+                 bytes: int, timings: Optional[Dict[str, float]] = None):
+        self.path = str(path)
+        self.post_id = post_id
+        self.generator = generator
+        self.model = model
+        self.width = width
+        self.height = height
+        self.bytes = bytes
+        self.timings = {k: round(v, 3) for k, v in (timings or {}).items()}
+        self.saved_at = datetime.now().isoformat(timespec='milliseconds')
+
+    def to_dict(self) -> Dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __repr__(self) -> str:
+        return (f"CoverResult(post_id={self.post_id}, path={self.path!r}, "
+                f"{self.width}x{self.height}, {self.bytes:,} bytes)")
+
+
+def stream_covers(generator, posts: List[Dict], concurrency: int = 1, **cover_kwargs) -> Iterator[CoverResult]:
+    """
+    Executa generator.generate_cover para cada post e entrega as imagens à medida que são gravadas
+
+    Args:
+        generator: Gerador com generate_cover(post, ...) e o atributo on_result
+        posts: Posts a gerar
+        concurrency: Posts em paralelo
+        **cover_kwargs: Repassados a generate_cover (ex.: num_variations)
+
+    Se o consumidor parar de iterar, posts ainda não iniciados são cancelados.
+    """
+    results: 'queue.Queue' = queue.Queue()
+    previous = generator.on_result
+    generator.on_result = results.put
+    executor = ThreadPoolExecutor(max_workers=max(1, concurrency))
+    futures = []
+    try:
+        for post in posts:
+            future = executor.submit(generator.generate_cover, post, **cover_kwargs)
+            # Depois dos resultados do próprio post: a fila preserva a ordem
+            future.add_done_callback(lambda _: results.put(_JOB_DONE))
+            futures.append(future)
+
+        pending = len(futures)
+        while pending:
+            item = results.get()
+            if item is _JOB_DONE:
+                pending -= 1
+                continue
+            yield item
+        for future in futures:
+            future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=True)
+        generator.on_result = previous
+
+
+def open_jsonl(enabled: bool) -> Optional[TextIO]:
+    """Com --jsonl: devolve o stdout real para as linhas JSON e manda os prints para o stderr"""
+    if not enabled:
+        return None
+    stream = sys.stdout
+    sys.stdout = sys.stderr
+    return stream
+
+
+def write_jsonl(stream: Optional[TextIO], result: CoverResult) -> None:
+    if stream is None:
+        return
+    stream.write(json.dumps(result.to_dict(), ensure_ascii=False) + '\n')
+    stream.flush()
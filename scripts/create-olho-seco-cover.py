@@ -8,6 +8,20 @@ from PIL import Image, ImageDraw, ImageFont
 from datetime import datetime
 from pathlib import Path
 
+def render_gradient(width, height):
+    """Blue background with a vertical gradient to lighter blue"""
+    image = Image.new('RGB', (width, height), color='#1e40af')  # Blue background
+    draw = ImageDraw.Draw(image)
+
+    for y in range(height):
+        # Create gradient from blue to lighter blue
+        r = int(30 + (y / height) * 50)
+        g = int(64 + (y / height) * 100)
+        b = int(175 + (y / height) * 50)
+        draw.line([(0, y), (width, y)], fill=(r, g, b))
+
+    return image
+
 def create_podcast_cover():
     """Create a podcast cover for Olho Seco episode"""
 
@@ -15,21 +29,13 @@ def create_podcast_cover():
     OUTPUT_DIR = Path(__file__).parent.parent / "public" / "Podcasts" / "Covers"
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    # Create a 512x512 image
+    # Create a 512x512 image with the gradient background
     width, height = 512, 512
-    image = Image.new('RGB', (width, height), color='#1e40af')  # Blue background
+    image = render_gradient(width, height)
 
     # Create drawing context
     draw = ImageDraw.Draw(image)
 
-    # Add gradient effect
-    for y in range(height):
-        # Create gradient from blue to lighter blue
-        r = int(30 + (y / height) * 50)
-        g = int(64 + (y / height) * 100)
-        b = int(175 + (y / height) * 50)
-        draw.line([(0, y), (width, y)], fill=(r, g, b))
-
     # Add medical cross symbol
     cross_size = 40
     cross_x, cross_y = width // 2 - cross_size // 2, 100
@@ -1,7 +1,8 @@
 #!/bin/bash
 # Deploy Local - Saraiva Vision
 # Execute DENTRO do VPS, sem necessidade de SSH
-# Uso: sudo ./scripts/deploy-local.sh [--quick|--full]
+# Uso: sudo ./scripts/deploy-local.sh [--quick|--full|--assets]
+#   --assets  envia apenas capas/variantes alteradas (bundle delta, sem build)
 
 set -e
 
@@ -37,6 +38,26 @@ if [ "$EUID" -ne 0 ]; then
     exit 1
 fi
 
+# Assets-only mode: bundle delta de public/ aplicado atomicamente, sem build
+if [ "$MODE" == "--assets" ]; then
+    echo -e "${BLUE}🖼️  MODO ASSETS (bundle delta de imagens)${NC}"
+    cd "$PROJECT_DIR"
+    BUNDLE_PATH="$PROJECT_DIR/.cache/blog-assets/bundles/assets_$TIMESTAMP.tar"
+    python3 scripts/image_manifest.py --pending
+    python3 scripts/asset_manifest.py --bundle "$BUNDLE_PATH"
+
+    if [ ! -f "$BUNDLE_PATH" ]; then
+        echo -e "${GREEN}✅ Nenhuma imagem alterada desde o último deploy${NC}"
+        exit 0
+    fi
+
+    ./scripts/apply-asset-bundle.sh "$BUNDLE_PATH" "$PROD_DIR"
+    python3 scripts/asset_manifest.py --mark-deployed
+    systemctl reload nginx
+    echo -e "${GREEN}✅ Assets deployed${NC}"
+    exit 0
+fi
+
 # Mode confirmation
 if [ "$MODE" == "--quick" ]; then
     echo -e "${YELLOW}⚡ MODO RÁPIDO (sem backup)${NC}"
@@ -55,6 +76,10 @@ echo "━━━━━━━━━━━━━━━━━━━━━━━━
 echo ""
 echo -e "${BLUE}📦 STEP 1/6: Building application...${NC}"
 cd "$PROJECT_DIR"
+# Entradas do public/image-manifest.json gravadas pelos scripts de capas desde o último build
+python3 scripts/image_manifest.py --pending
+# LQIP das capas dos posts embutido no bundle (src/data/coverPlaceholders.json)
+python3 scripts/cover_placeholders.py --posts
 npm run build:vite
 
 if [ $? -ne 0 ]; then
@@ -90,7 +115,9 @@ if [ -f "$PROD_DIR/.htaccess" ]; then
 fi
 
 # Robust cleanup using find - handles all files including hidden ones
-find "$PROD_DIR" -mindepth 1 -delete 2>/dev/null || {
+# (trailing slash: follows the current symlink left by --assets releases, so
+# hardlinks shared with older releases are unlinked instead of overwritten)
+find "$PROD_DIR/" -mindepth 1 -delete 2>/dev/null || {
     # Fallback to comprehensive rm if find fails
     shopt -s dotglob nullglob
     rm -rf "$PROD_DIR"/*
@@ -186,6 +213,13 @@ else
     echo -e "${YELLOW}   ⚠️  HTTP $HTTP_STATUS${NC}"
 fi
 
+# Build completo publicou public/ inteiro: o próximo --assets parte deste estado
+if python3 "$PROJECT_DIR/scripts/asset_manifest.py" --mark-deployed > /dev/null; then
+    echo "   ✓ Asset manifest marked as deployed"
+else
+    echo -e "${YELLOW}   ⚠️  Could not mark asset manifest as deployed (next --assets bundle may be larger)${NC}"
+fi
+
 # Success banner
 echo ""
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Ajuste de Encoder por Imagem (Rate-Distortion com alvo SSIM)
+Saraiva Vision - Variantes -optimized-1200w com o menor tamanho sem perda visível
+
+Para cada capa e formato de saída (JPEG/WebP), faz busca binária da qualidade
+(e testa configurações do encoder, como subamostragem de croma) contra um alvo
+de SSIM calculado de forma vetorizada em numpy. Metadados são removidos e as
+configurações escolhidas ficam registradas para reuso nas próximas execuções.
+
+Uso:
+    python encoder_tuning.py --all
+    python encoder_tuning.py --files ../public/Blog/capa-catarata.png
+    python encoder_tuning.py --all --formats webp --target-ssim 0.98 --dry-run
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from asset_manifest import STATE_DIR, hash_file, record_assets
+from pixel_cache import decode
+from staged_writes import StagedOutputs
+
+# Diretórios
+BLOG_DIR = Path(__file__).parent.parent / "public" / "Blog"
+SETTINGS_PATH = STATE_DIR / "encoder-settings.json"
+
+# Variante responsiva padrão do blog
+VARIANT_WIDTH = 1200
+VARIANT_SUFFIX = "-optimized-{width}w"
+# Variantes responsivas e otimizadas: nunca são masters
+DERIVED_NAME_RE = re.compile(r'-(\d+w|optimized.*)\.[a-z]+$', re.IGNORECASE)
+
+# Alvos de qualidade: SSIM médio e percentil 1 do mapa SSIM (pior região,
+# aproximação do critério "max-norm" do butteraugli para artefatos locais)
+DEFAULT_TARGET_SSIM = 0.97
+DEFAULT_TARGET_SSIM_P01 = 0.85
+SSIM_WINDOW = 7
+
+# Espaço de busca por formato: (qualidade mínima, máxima, variações de encoder)
+ENCODER_SEARCH_SPACE = {
+    'jpeg': {
+        'quality': (40, 95),
+        'settings': [
+            {'subsampling': 2, 'progressive': True},   # 4:2:0
+            {'subsampling': 0, 'progressive': True},   # 4:4:4 (bordas coloridas nítidas)
+        ],
+        'extension': 'jpeg',
+        'pil_format': 'JPEG',
+    },
+    'webp': {
+        'quality': (40, 95),
+        'settings': [
+            {'method': 6},
+            {'method': 6, 'use_sharp_yuv': True},
+        ],
+        'extension': 'webp',
+        'pil_format': 'WEBP',
+    },
+}
+
+
+# ============================================================================
+# MÉTRICA (SSIM vetorizado)
+# ============================================================================
+
+def to_luma(image: Image.Image) -> np.ndarray:
+    """Converte para luminância float32 (BT.601)"""
+    rgb = np.asarray(image.convert('RGB'), dtype=np.float32)
+    return rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+
+
+def _box_filter(values: np.ndarray, window: int) -> np.ndarray:
+    """Média em janela quadrada via imagem integral (O(1) por pixel)"""
+    integral = np.pad(values, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    total = (integral[window:, window:] - integral[:-window, window:]
+             - integral[window:, :-window] + integral[:-window, :-window])
+    return total / float(window * window)
+
+
+def ssim_map(reference: np.ndarray, candidate: np.ndarray, window: int = SSIM_WINDOW) -> np.ndarray:
+    """Mapa SSIM (Wang et al.) entre duas imagens de luminância"""
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+
+    x = reference.astype(np.float64)
+    y = candidate.astype(np.float64)
+
+    mu_x = _box_filter(x, window)
+    mu_y = _box_filter(y, window)
+    sigma_x = _box_filter(x * x, window) - mu_x * mu_x
+    sigma_y = _box_filter(y * y, window) - mu_y * mu_y
+    sigma_xy = _box_filter(x * y, window) - mu_x * mu_y
+
+    numerator = (2 * mu_x * mu_y + c1) * (2 * sigma_xy + c2)
+    denominator = (mu_x * mu_x + mu_y * mu_y + c1) * (sigma_x + sigma_y + c2)
+    return numerator / denominator
+
+
+def score(reference: np.ndarray, candidate: np.ndarray) -> Tuple[float, float]:
+    """Retorna (SSIM médio, percentil 1 do mapa SSIM)"""
+    values = ssim_map(reference, candidate)
+    return float(values.mean()), float(np.percentile(values, 1))
+
+
+# ============================================================================
+# ENCODING
+# ============================================================================
+
+def strip_metadata(image: Image.Image) -> Image.Image:
+    """Recria a imagem só com pixels (sem EXIF, ICC, XMP ou chunks de texto)"""
+    mode = 'RGBA' if image.mode in ('RGBA', 'LA') or 'transparency' in image.info else 'RGB'
+    return Image.fromarray(np.asarray(image.convert(mode)))
+
+
+def encode(image: Image.Image, fmt: str, quality: int, settings: Dict) -> bytes:
+    """Codifica a imagem em memória com as configurações informadas"""
+    spec = ENCODER_SEARCH_SPACE[fmt]
+    if spec['pil_format'] == 'JPEG' and image.mode != 'RGB':
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format=spec['pil_format'], quality=quality, optimize=True, **settings)
+    return buffer.getvalue()
+
+
+def search_quality(image: Image.Image, reference: np.ndarray, fmt: str, settings: Dict,
+                   target_ssim: float, target_p01: float) -> Optional[Dict]:
+    """
+    Busca binária da menor qualidade que atende o alvo SSIM
+
+    Assume tamanho/qualidade monotônicos na qualidade do encoder, o que vale na
+    prática para libjpeg e libwebp. Retorna None se nem a qualidade máxima passar.
+    """
+    low, high = ENCODER_SEARCH_SPACE[fmt]['quality']
+    best = None
+    evaluations = 0
+
+    while low <= high:
+        quality = (low + high) // 2
+        data = encode(image, fmt, quality, settings)
+        with Image.open(BytesIO(data)) as decoded:
+            mean_ssim, p01 = score(reference, to_luma(decoded))
+        evaluations += 1
+
+        if mean_ssim >= target_ssim and p01 >= target_p01:
+            best = {'quality': quality, 'bytes': len(data), 'ssim': round(mean_ssim, 5),
+                    'ssim_p01': round(p01, 5), 'data': data}
+            high = quality - 1
+        else:
+            low = quality + 1
+
+    if best is not None:
+        best['evaluations'] = evaluations
+    return best
+
+
+def variant_path(source: Path, fmt: str, width: int = VARIANT_WIDTH) -> Path:
+    """capa-x.png -> capa-x-optimized-1200w.jpeg"""
+    extension = ENCODER_SEARCH_SPACE[fmt]['extension']
+    return source.with_name(f"{source.stem}{VARIANT_SUFFIX.format(width=width)}.{extension}")
+
+
+def tune_image(source_path: str, formats: List[str], width: int, target_ssim: float,
+               target_p01: float, dry_run: bool = False) -> Dict:
+    """
+    Ajusta e grava as variantes de uma capa (executa em processo worker)
+
+    Returns:
+        Registro com as configurações escolhidas por formato
+    """
+    source = Path(source_path)
+    result = {'source': source.name, 'sha256': hash_file(source), 'formats': {}}
+
+    # Pixels do cache compartilhado (já sem metadados), no menor nível da pirâmide que cobre a largura
+    pixels = decode(source)
+    image = strip_metadata(pixels.image_at_least(width))
+
+    if image.width > width:
+        height = round(pixels.size[1] * width / pixels.size[0])
+        image = image.resize((width, height), Image.LANCZOS)
+
+    reference = to_luma(image)
+
+    # Variantes de todos os formatos em staging: promovidas juntas ao final
+    outputs = StagedOutputs(record=False)
+    for fmt in formats:
+        output = variant_path(source, fmt, width)
+        previous_bytes = output.stat().st_size if output.exists() else None
+
+        candidates = []
+        for settings in ENCODER_SEARCH_SPACE[fmt]['settings']:
+            found = search_quality(image, reference, fmt, settings, target_ssim, target_p01)
+            if found is not None:
+                found['settings'] = settings
+                candidates.append(found)
+
+        if not candidates:
+            # Nenhuma configuração atinge o alvo: usar qualidade máxima 4:4:4
+            settings = ENCODER_SEARCH_SPACE[fmt]['settings'][-1]
+            quality = ENCODER_SEARCH_SPACE[fmt]['quality'][1]
+            data = encode(image, fmt, quality, settings)
+            with Image.open(BytesIO(data)) as decoded:
+                mean_ssim, p01 = score(reference, to_luma(decoded))
+            candidates.append({'quality': quality, 'bytes': len(data), 'ssim': round(mean_ssim, 5),
+                               'ssim_p01': round(p01, 5), 'data': data, 'settings': settings,
+                               'evaluations': 1, 'below_target': True})
+
+        chosen = min(candidates, key=lambda c: c['bytes'])
+        data = chosen.pop('data')
+
+        if not dry_run:
+            outputs.write_bytes(output, data, variant=True)
+
+        chosen['output'] = output.name
+        chosen['previous_bytes'] = previous_bytes
+        chosen['size'] = list(image.size)
+        result['formats'][fmt] = chosen
+
+    outputs.commit()
+    return result
+
+
+# ============================================================================
+# REGISTRO DE CONFIGURAÇÕES
+# ============================================================================
+
+def load_settings() -> Dict:
+    if not SETTINGS_PATH.exists():
+        return {}
+    try:
+        with open(SETTINGS_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_settings(settings: Dict) -> None:
+    SETTINGS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = SETTINGS_PATH.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(settings, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, SETTINGS_PATH)
+
+
+def find_masters() -> List[Path]:
+    """Masters PNG (e WebP lossless sem PNG irmão) de public/Blog, exceto variantes derivadas"""
+    pngs = [p for p in BLOG_DIR.glob('*.png') if '-optimized' not in p.stem and not p.name.startswith('.')]
+    stems = {p.stem for p in pngs}
+    webps = [
+        p for p in BLOG_DIR.glob('*.webp')
+        if p.stem not in stems and not DERIVED_NAME_RE.search(p.name) and not p.name.startswith('.')
+    ]
+    return sorted(pngs + webps)
+
+
+def is_up_to_date(record: Optional[Dict], source: Path, formats: List[str], width: int,
+                  target_ssim: float) -> bool:
+    """Pula capas cujo master, alvo e variantes não mudaram desde o último ajuste"""
+    if not record or record.get('target_ssim') != target_ssim or record.get('width') != width:
+        return False
+    if record.get('sha256') != hash_file(source):
+        return False
+    return all(fmt in record['formats'] and variant_path(source, fmt, width).exists() for fmt in formats)
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ajuste rate-distortion das variantes de capa contra alvo SSIM',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--all', action='store_true', help='Todas as capas PNG de public/Blog')
+    parser.add_argument('--files', nargs='+', help='Masters específicos')
+    parser.add_argument('--formats', nargs='+', default=['jpeg', 'webp'],
+                        choices=sorted(ENCODER_SEARCH_SPACE), help='Formatos de saída')
+    parser.add_argument('--width', type=int, default=VARIANT_WIDTH, help='Largura da variante')
+    parser.add_argument('--target-ssim', type=float, default=DEFAULT_TARGET_SSIM,
+                        help=f'SSIM médio mínimo (padrão: {DEFAULT_TARGET_SSIM})')
+    parser.add_argument('--target-ssim-p01', type=float, default=DEFAULT_TARGET_SSIM_P01,
+                        help=f'SSIM mínimo no percentil 1 (padrão: {DEFAULT_TARGET_SSIM_P01})')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Processos paralelos')
+    parser.add_argument('--force', action='store_true', help='Reajustar mesmo sem mudanças')
+    parser.add_argument('--dry-run', action='store_true', help='Não gravar variantes')
+
+    args = parser.parse_args()
+
+    if args.files:
+        sources = [Path(f) for f in args.files]
+    elif args.all:
+        sources = find_masters()
+    else:
+        print("✗ Use --all ou --files")
+        parser.print_help()
+        sys.exit(1)
+
+    settings = load_settings()
+    pending = [
+        s for s in sources
+        if args.force or not is_up_to_date(settings.get(s.name), s, args.formats, args.width, args.target_ssim)
+    ]
+
+    print(f"\n🎛️  Ajuste de encoder: {len(pending)} de {len(sources)} capa(s) | "
+          f"alvo SSIM {args.target_ssim} | {args.workers} processo(s)")
+
+    bytes_before = 0
+    bytes_after = 0
+    written = []
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            executor.submit(tune_image, str(s), args.formats, args.width, args.target_ssim,
+                            args.target_ssim_p01, args.dry_run): s
+            for s in pending
+        }
+        for future in as_completed(futures):
+            source = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"✗ {source.name}: {e}")
+                continue
+
+            for fmt, chosen in result['formats'].items():
+                flag = ' ⚠️ abaixo do alvo' if chosen.get('below_target') else ''
+                previous = chosen['previous_bytes']
+                print(f"✓ {chosen['output']}: q={chosen['quality']} {chosen['settings']} "
+                      f"{chosen['bytes']:,} bytes (SSIM {chosen['ssim']}){flag}")
+                if previous:
+                    bytes_before += previous
+                    bytes_after += chosen['bytes']
+                written.append(str(source.parent / chosen['output']))
+
+            result.update({'target_ssim': args.target_ssim, 'width': args.width,
+                           'tuned': datetime.now().isoformat(timespec='seconds')})
+            settings[source.name] = result
+
+    if not args.dry_run:
+        save_settings(settings)
+        record_assets(written)
+
+    print("\n" + "="*70)
+    print(f"📊 Variantes ajustadas: {len(written)}")
+    if bytes_before:
+        saved = bytes_before - bytes_after
+        print(f"💾 Antes: {bytes_before:,} bytes | Depois: {bytes_after:,} bytes "
+              f"({saved / bytes_before:.1%} de economia)")
+    print(f"📝 Configurações: {SETTINGS_PATH}")
+    print("="*70 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,9 +8,12 @@ import sys
 import time
 from pathlib import Path
 from PIL import Image
-from io import BytesIO
 from google import genai
 
+sys.path.insert(0, str(Path(__file__).parent))
+from master_format import save_master
+from safety_rewrite import PromptRelaxer, SAFETY_DIAGNOSTICS_CONFIG, first_image, safety_block_reason
+
 # Configure API
 API_KEY = os.environ.get('GOOGLE_GEMINI_API_KEY')
 if not API_KEY:
@@ -203,6 +206,10 @@ def generate_cover(cover_data: dict, client: genai.Client, max_retries: int = 3)
         print(f"⏭️  Already exists, skipping...")
         return True
 
+    # Safety-filtered prompts are rewritten (never resent unchanged)
+    relaxer = PromptRelaxer(cover_data['prompt'], key=cover_data['filename'], title=cover_data['title'])
+    prompt = relaxer.prompt
+
     for attempt in range(max_retries):
         try:
             print(f"\n📸 Attempt {attempt + 1}/{max_retries}")
@@ -212,21 +219,25 @@ def generate_cover(cover_data: dict, client: genai.Client, max_retries: int = 3)
             # Generate image with Imagen 4
             response = client.models.generate_images(
                 model='imagen-4.0-generate-001',
-                prompt=cover_data['prompt'],
+                prompt=prompt,
                 config={
                     'number_of_images': 1,
                     'aspect_ratio': '16:9',
                     'safety_filter_level': 'block_low_and_above',
-                    'person_generation': 'allow_adult'
+                    'person_generation': 'allow_adult',
+                    **SAFETY_DIAGNOSTICS_CONFIG,
                 }
             )
 
-            if not response.generated_images:
-                print(f"   ⚠️  No images in response")
+            reason = safety_block_reason(response)
+            if reason is not None:
+                prompt = relaxer.relax(reason)
+                if prompt is None:
+                    break
                 continue
 
             # Get image data
-            image_data = response.generated_images[0]
+            image_data = first_image(response)
 
             # Convert to PIL Image
             if hasattr(image_data, 'image'):
@@ -235,13 +246,9 @@ def generate_cover(cover_data: dict, client: genai.Client, max_retries: int = 3)
             else:
                 img_bytes = image_data._pil_image
 
-            # Save as PNG
-            if isinstance(img_bytes, Image.Image):
-                img_bytes.save(output_path, 'PNG', optimize=True)
-            else:
-                # If bytes, convert first
-                img = Image.open(BytesIO(img_bytes))
-                img.save(output_path, 'PNG', optimize=True)
+            # Save lossless master (fixed .png name: palette PNG or tuned zlib, no optimize pass)
+            source = img_bytes if isinstance(img_bytes, Image.Image) else getattr(img_bytes, 'image_bytes', img_bytes)
+            save_master(source, output_path, allow_webp=False)
 
             # Verify saved
             if output_path.exists():
@@ -249,6 +256,7 @@ def generate_cover(cover_data: dict, client: genai.Client, max_retries: int = 3)
                 print(f"\n✅ Success!")
                 print(f"   File: {output_path.name}")
                 print(f"   Size: {size_mb:.2f} MB")
+                relaxer.succeeded()
                 return True
 
         except Exception as e:
@@ -262,7 +270,8 @@ def generate_cover(cover_data: dict, client: genai.Client, max_retries: int = 3)
                 print(f"   ⏳ Retrying in {wait_time}s...")
                 time.sleep(wait_time)
 
-    print(f"\n❌ Failed after {max_retries} attempts")
+    relaxer.failed()
+    print(f"\n❌ Failed after {attempt + 1} attempt(s)")
     return False
 
 def main():
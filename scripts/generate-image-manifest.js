@@ -3,6 +3,9 @@
  * Generate Image Manifest
  * Scans /public/Blog for available image variants and creates manifest.json
  * This ensures OptimizedImage only generates srcsets for existing files
+ *
+ * Full rescan. The Python cover pipeline keeps the same file up to date
+ * incrementally (scripts/image_manifest.py, called from record_assets).
  */
 
 import fs from 'fs';
@@ -107,6 +110,31 @@ function scanImages() {
   return manifest;
 }
 
+/**
+ * Carry over placeholders (BlurHash/LQIP) written by scripts/cover_placeholders.py
+ * for entries whose original file did not change name
+ */
+function preservePlaceholders(manifest) {
+  if (!fs.existsSync(MANIFEST_PATH)) return 0;
+
+  let previous;
+  try {
+    previous = JSON.parse(fs.readFileSync(MANIFEST_PATH, 'utf8')).manifest || {};
+  } catch (error) {
+    return 0;
+  }
+
+  let preserved = 0;
+  Object.entries(manifest).forEach(([basename, data]) => {
+    const old = previous[basename];
+    if (old?.placeholder && old.original === data.original) {
+      data.placeholder = old.placeholder;
+      preserved++;
+    }
+  });
+  return preserved;
+}
+
 /**
  * Generate statistics
  */
@@ -205,6 +233,7 @@ function main() {
   console.log('🔍 Scanning /public/Blog for images...\n');
 
   const manifest = scanImages();
+  const preserved = preservePlaceholders(manifest);
   const stats = generateStats(manifest);
   const issues = validateNames(manifest);
 
@@ -219,7 +248,8 @@ function main() {
   console.log(`✅ Total images: ${stats.totalImages}`);
   console.log(`🎨 With AVIF variants: ${stats.withAvif} (${Math.round(stats.withAvif / stats.totalImages * 100)}%)`);
   console.log(`🖼️  With WebP variants: ${stats.withWebp} (${Math.round(stats.withWebp / stats.totalImages * 100)}%)`);
-  console.log(`⚠️  Without modern variants: ${stats.withoutVariants}\n`);
+  console.log(`⚠️  Without modern variants: ${stats.withoutVariants}`);
+  console.log(`🌫️  Placeholders preserved: ${preserved} (refresh: python3 scripts/cover_placeholders.py)\n`);
 
   if (stats.warnings.length > 0) {
     console.log('⚠️  Warnings:');
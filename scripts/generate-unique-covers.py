@@ -10,7 +10,10 @@ import time
 from pathlib import Path
 from google import genai
 from PIL import Image
-from io import BytesIO
+
+sys.path.insert(0, str(Path(__file__).parent))
+from master_format import save_master
+from safety_rewrite import PromptRelaxer, SAFETY_DIAGNOSTICS_CONFIG, first_image, safety_block_reason
 
 # Configuration
 # ⚠️ SECURITY: API key MUST be set as environment variable - NO FALLBACK!
@@ -82,6 +85,10 @@ def generate_cover(config: dict, max_retries: int = 3) -> bool:
         print(f"⏭️  Already exists, skipping...")
         return True
 
+    # Safety-filtered prompts are rewritten (never resent unchanged)
+    relaxer = PromptRelaxer(config['prompt'], key=config['filename'], title=config['title'])
+    prompt = relaxer.prompt
+
     for attempt in range(max_retries):
         try:
             print(f"\n📸 Attempt {attempt + 1}/{max_retries}")
@@ -91,21 +98,25 @@ def generate_cover(config: dict, max_retries: int = 3) -> bool:
             # Generate image with Imagen 4
             response = client.models.generate_images(
                 model='imagen-4.0-generate-001',
-                prompt=config['prompt'],
+                prompt=prompt,
                 config={
                     'number_of_images': 1,
                     'aspect_ratio': '16:9',
                     'safety_filter_level': 'block_low_and_above',
-                    'person_generation': 'allow_adult'
+                    'person_generation': 'allow_adult',
+                    **SAFETY_DIAGNOSTICS_CONFIG,
                 }
             )
 
-            if not response.generated_images:
-                print(f"   ⚠️  No images in response")
+            reason = safety_block_reason(response)
+            if reason is not None:
+                prompt = relaxer.relax(reason)
+                if prompt is None:
+                    break
                 continue
 
             # Get image data
-            image_data = response.generated_images[0]
+            image_data = first_image(response)
 
             # Convert to PIL Image
             if hasattr(image_data, 'image'):
@@ -114,13 +125,9 @@ def generate_cover(config: dict, max_retries: int = 3) -> bool:
             else:
                 img_bytes = image_data._pil_image
 
-            # Save as PNG
-            if isinstance(img_bytes, Image.Image):
-                img_bytes.save(output_path, 'PNG', optimize=True)
-            else:
-                # If bytes, convert first
-                img = Image.open(BytesIO(img_bytes))
-                img.save(output_path, 'PNG', optimize=True)
+            # Save lossless master (fixed .png name: palette PNG or tuned zlib, no optimize pass)
+            source = img_bytes if isinstance(img_bytes, Image.Image) else getattr(img_bytes, 'image_bytes', img_bytes)
+            save_master(source, output_path, allow_webp=False)
 
             # Verify saved
             if output_path.exists():
@@ -128,6 +135,7 @@ def generate_cover(config: dict, max_retries: int = 3) -> bool:
                 print(f"\n✅ Success!")
                 print(f"   File: {output_path.name}")
                 print(f"   Size: {size_mb:.2f} MB")
+                relaxer.succeeded()
                 return True
 
         except Exception as e:
@@ -141,7 +149,8 @@ def generate_cover(config: dict, max_retries: int = 3) -> bool:
                 print(f"   ⏳ Retrying in {wait_time}s...")
                 time.sleep(wait_time)
 
-    print(f"\n❌ Failed after {max_retries} attempts")
+    relaxer.failed()
+    print(f"\n❌ Failed after {attempt + 1} attempt(s)")
     return False
 
 def main():
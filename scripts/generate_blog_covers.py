@@ -18,14 +18,19 @@ Uso:
 import os
 import sys
 import json
+import time
 import argparse
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 from google import genai
 from google.genai import types
-from PIL import Image
-from io import BytesIO
+
+from blog_data import load_blog_posts_data
+from cover_stream import CoverResult, open_jsonl, stream_covers, write_jsonl
+from memory_budget import MemoryBudget, estimate_response_mb, save_inline_image
+from profiling import add_profile_arguments, start_profiling, stop_profiling, span, stage
+from staged_writes import StagedOutputs
 
 
 # ============================================================================
@@ -96,16 +101,21 @@ Generate the visual image now."""
 class BlogCoverGenerator:
     """Gerador de capas para posts do blog usando Google Gemini API"""
 
-    def __init__(self, api_key: str, model: str = "gemini-flash"):
+    def __init__(self, api_key: str, model: str = "gemini-flash", on_result=None,
+                 memory_budget: Optional[MemoryBudget] = None):
         """
         Inicializa o gerador de imagens
 
         Args:
             api_key: Chave da API do Google
             model: Modelo a usar ("gemini-flash" ou "gemini-pro")
+            on_result: Chamado com um CoverResult a cada imagem gravada (ver cover_stream)
+            memory_budget: Orçamento de RSS compartilhado entre requisições
         """
         self.api_key = api_key
         self.model_type = model
+        self.on_result = on_result
+        self.memory_budget = memory_budget or MemoryBudget()
 
         # Usar novo cliente GenAI
         self.client = genai.Client(api_key=api_key)
@@ -150,7 +160,8 @@ class BlogCoverGenerator:
 
         return prompt
 
-    def generate_with_gemini(self, prompt: str, post_id: int, post_data: Dict = None) -> List[str]:
+    def generate_with_gemini(self, prompt: str, post_id: int, post_data: Dict = None,
+                             timings: Optional[Dict[str, float]] = None) -> List[str]:
         """
         Gera imagens usando Gemini 2.5 Flash Image Preview
 
@@ -158,6 +169,7 @@ class BlogCoverGenerator:
             prompt: Prompt de geração
             post_id: ID do post para naming
             post_data: Dados completos do post (opcional)
+            timings: Tempos já medidos (ex.: prompt), repassados nos CoverResult
 
         Returns:
             Lista de caminhos dos arquivos salvos
@@ -170,42 +182,56 @@ class BlogCoverGenerator:
             post_data = {'title': 'Blog Post', 'category': 'General'}
 
         try:
-            # Gerar conteúdo usando novo cliente GenAI
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=[prompt],
-            )
-
-            saved_files = []
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            image_count = 0
-
-            # Processar resposta
-            print(f"📊 Resposta recebida. Candidatos: {len(response.candidates)}")
-
-            for candidate in response.candidates:
-                for part in candidate.content.parts:
-                    # Verificar se há texto
-                    if part.text is not None:
-                        print(f"💬 Descrição gerada pelo modelo:")
-                        print("-"*70)
-                        print(part.text[:300] + "..." if len(part.text) > 300 else part.text)
-                        print("-"*70)
-
-                    # Verificar se há imagem
-                    elif part.inline_data is not None:
-                        image_count += 1
-                        filename = f"capa_post_{post_id}_gemini_{timestamp}_{image_count}.png"
-                        filepath = OUTPUT_DIR / filename
-
-                        # Usar PIL para processar imagem
-                        image = Image.open(BytesIO(part.inline_data.data))
-                        image.save(str(filepath))
-
-                        file_size = filepath.stat().st_size
-                        print(f"✓ Imagem {image_count} salva: {filename} ({file_size:,} bytes)")
-                        print(f"   Dimensões: {image.size[0]}x{image.size[1]}")
-                        saved_files.append(str(filepath))
+            with self.memory_budget.reserve(estimate_response_mb(1, '1K')):
+                # Gerar conteúdo usando novo cliente GenAI
+                started = time.perf_counter()
+                with span('request', model=self.model_name, post_id=post_id):
+                    response = self.client.models.generate_content(
+                        model=self.model_name,
+                        contents=[prompt],
+                    )
+                request_seconds = time.perf_counter() - started
+
+                saved_files = []
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+                image_count = 0
+
+                # Processar resposta
+                print(f"📊 Resposta recebida. Candidatos: {len(response.candidates or [])}")
+
+                # Uma parte por vez: gravar no disco e descartar antes da próxima
+                for candidate in response.candidates or []:
+                    parts = candidate.content.parts if candidate.content else []
+                    for part in parts or []:
+                        # Verificar se há texto
+                        if part.text is not None:
+                            print(f"💬 Descrição gerada pelo modelo:")
+                            print("-"*70)
+                            print(part.text[:300] + "..." if len(part.text) > 300 else part.text)
+                            print("-"*70)
+
+                        # Verificar se há imagem
+                        elif part.inline_data is not None:
+                            image_count += 1
+                            filename = f"capa_post_{post_id}_gemini_{timestamp}_{image_count}.png"
+                            filepath = OUTPUT_DIR / filename
+
+                            # Staging + rename atômico; o commit também registra no manifesto de assets
+                            started = time.perf_counter()
+                            with StagedOutputs() as outputs:
+                                filepath, file_size, (width, height) = save_inline_image(
+                                    part.inline_data, filepath, outputs=outputs)
+                            part.inline_data = None
+                            if self.on_result is not None:
+                                self.on_result(CoverResult(
+                                    filepath, post_id, 'gemini', self.model_name, width, height, file_size,
+                                    {**(timings or {}), 'request': request_seconds,
+                                     'save': time.perf_counter() - started}))
+
+                            self.memory_budget.sample()
+                            print(f"✓ Imagem {image_count} salva: {filepath.name} ({file_size:,} bytes)")
+                            print(f"   Dimensões: {width}x{height}")
+                            saved_files.append(str(filepath))
 
             if image_count == 0:
                 print("\n⚠️  Nenhuma imagem foi gerada.")
@@ -247,68 +273,22 @@ class BlogCoverGenerator:
         print("="*70)
 
         # Criar prompt
+        started = time.perf_counter()
         prompt = self.create_prompt(post_data)
+        prompt_seconds = time.perf_counter() - started
 
         # Mostrar prompt (truncado)
         print(f"\n🤖 Prompt gerado (preview):")
         print(prompt[:300] + "..." if len(prompt) > 300 else prompt)
 
         # Gerar descrição usando Gemini
-        return self.generate_with_gemini(prompt, post_id, post_data)
+        return self.generate_with_gemini(prompt, post_id, post_data, timings={'prompt': prompt_seconds})
 
 
 # ============================================================================
 # FUNÇÕES AUXILIARES
 # ============================================================================
 
-def load_blog_posts_data() -> List[Dict]:
-    """
-    Carrega dados dos posts do blog do arquivo JavaScript
-
-    Returns:
-        Lista de dicionários com dados dos posts
-    """
-    blog_data_path = Path(__file__).parent.parent / "src" / "data" / "blogPosts.js"
-
-    if not blog_data_path.exists():
-        print(f"✗ Arquivo de dados não encontrado: {blog_data_path}")
-        return []
-
-    # Parse básico do arquivo JS para extrair dados dos posts
-    # Nota: Para produção, considere usar um parser JS adequado
-    posts = []
-
-    try:
-        with open(blog_data_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-            # Extrair posts (parsing simplificado)
-            # Em produção, use um parser JS apropriado
-            import re
-
-            # Pattern para encontrar posts
-            post_pattern = r'\{[\s\S]*?id:\s*(\d+)[\s\S]*?slug:\s*[\'"]([^\'"]+)[\'"][\s\S]*?title:\s*[\'"]([^\'"]+)[\'"][\s\S]*?excerpt:\s*[\'"]([^\'"]+)[\'"][\s\S]*?category:\s*[\'"]([^\'"]+)[\'"][\s\S]*?\}'
-
-            matches = re.finditer(post_pattern, content)
-
-            for match in matches:
-                post = {
-                    'id': int(match.group(1)),
-                    'slug': match.group(2),
-                    'title': match.group(3),
-                    'excerpt': match.group(4),
-                    'category': match.group(5)
-                }
-                posts.append(post)
-
-        print(f"✓ {len(posts)} posts carregados do banco de dados")
-        return posts
-
-    except Exception as e:
-        print(f"✗ Erro ao carregar posts: {str(e)}")
-        return []
-
-
 def get_api_key() -> Optional[str]:
     """
     Obtém a chave da API do Google das variáveis de ambiente
@@ -356,8 +336,13 @@ Exemplos de uso:
                        choices=['gemini-flash', 'gemini-pro'],
                        help='Modelo de IA a usar (padrão: gemini-flash)')
     parser.add_argument('--list', action='store_true', help='Listar posts disponíveis')
+    parser.add_argument('--jsonl', action='store_true',
+                       help='Uma linha JSON por imagem gravada no stdout (log vai para o stderr)')
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
+    jsonl = open_jsonl(args.jsonl)
+    start_profiling(args.profile, 'gemini', top=args.profile_top)
 
     # Banner
     print("\n" + "="*70)
@@ -371,7 +356,8 @@ Exemplos de uso:
 
     # Carregar posts
     print("\n📚 Carregando posts do blog...")
-    posts = load_blog_posts_data()
+    with stage('load'):
+        posts = load_blog_posts_data()
 
     if not posts:
         print("✗ Nenhum post encontrado!")
@@ -410,21 +396,26 @@ Exemplos de uso:
 
     # Inicializar gerador
     print(f"\n🚀 Inicializando gerador com modelo: {args.model}")
-    generator = BlogCoverGenerator(api_key, model=args.model)
+    # Uma requisição por vez: o orçamento só acompanha o pico de RSS (sem limite)
+    memory_budget = MemoryBudget()
+    generator = BlogCoverGenerator(api_key, model=args.model, memory_budget=memory_budget)
 
     # Gerar capas
     print(f"\n🎨 Gerando capas para {len(selected_posts)} post(s)...")
 
     total_generated = 0
-    for post in selected_posts:
-        generated_files = generator.generate_cover(post)
-        total_generated += len(generated_files)
+    with stage('generate'):
+        for result in stream_covers(generator, selected_posts):
+            total_generated += 1
+            write_jsonl(jsonl, result)
 
     # Resumo
     print("\n" + "="*70)
     print("✅ GERAÇÃO COMPLETA!")
     print(f"📊 Total de imagens geradas: {total_generated}")
     print(f"📂 Diretório de saída: {OUTPUT_DIR}")
+    print(f"🧠 {memory_budget.report()}")
+    stop_profiling()
     print("="*70 + "\n")
 
 
@@ -14,23 +14,54 @@ Uso:
     python generate_covers_gemini_flash.py --post-id 22
     python generate_covers_gemini_flash.py --category "Tecnologia"
     python generate_covers_gemini_flash.py --post-id 16 --edit mode
+    python generate_covers_gemini_flash.py --edit-glob "capa-lentes-*.png" --edit-instruction "..."
+    python generate_covers_gemini_flash.py --category "Tratamento" --edit-instruction "..." --concurrency 6
+    python generate_covers_gemini_flash.py --edit capa.png --edit-instruction "..." --edit-instruction "..." --chain
 """
 
-import os
+import re
 import sys
+import time
 import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional
-from google import genai
+from typing import Dict, List, Optional, Tuple
 from google.genai import types
 from PIL import Image
 from io import BytesIO
 
+from api_key_pool import ApiKeyPool, load_api_keys, DEFAULT_RATE_PER_MINUTE
+from blog_data import load_blog_posts_data, find_cover_source
+from cover_stream import CoverResult, open_jsonl, stream_covers, write_jsonl
+from hedged_requests import HedgedCaller, DEFAULT_DEADLINE_SECONDS, DEFAULT_BUDGET_RATIO, time_left
+from master_format import MASTER_FORMATS, DEFAULT_MASTER_FORMAT
+from memory_budget import MemoryBudget, estimate_response_mb, save_inline_image
+from profiling import add_profile_arguments, start_profiling, stop_profiling, span, stage
+from smart_crop import derive_crops
+from staged_writes import StagedOutputs
+from palette_check import PaletteGate
+from post_similarity import CoverPlanner, DEFAULT_SIMILARITY_MODE, SIMILARITY_MODES, apply_plan
+
 # Diretório de saída
 OUTPUT_DIR = Path(__file__).parent.parent / "public" / "Blog"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# Entrada de edição: o modelo trabalha em ~1024px, enviar mais é só upload desperdiçado
+EDIT_INPUT_MAX_SIDE = 1024
+EDIT_INPUT_JPEG_QUALITY = 90
+EDIT_DEFAULT_CONCURRENCY = 4
+
+# Formatos aceitos inline pela API (AVIF/GIF são recodificados)
+EDIT_ACCEPTED_MIME = {'image/png', 'image/jpeg', 'image/webp'}
+
+EDIT_PROMPT_TEMPLATE = """{instruction}
+
+Maintain the original style and quality.
+Keep 16:9 landscape format.
+NO text or words in the image."""
+
 # Estilos por categoria (otimizados para Gemini Flash)
 CATEGORY_STYLES_GEMINI = {
     'Prevenção': {
@@ -92,14 +123,97 @@ CONTEXT: This is a blog cover for "{title_context}" about {excerpt_summary}
 Generate the visual image now. Focus on symbolic representation that captures the essence without literal interpretation."""
 
 
+def detect_mime(data: bytes) -> Optional[str]:
+    """MIME real pelos magic bytes (a extensão dos arquivos em public/Blog nem sempre bate)"""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data.startswith(b'\xff\xd8'):
+        return 'image/jpeg'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[4:8] == b'ftyp' and data[8:12] in (b'avif', b'avis', b'mif1', b'msf1'):
+        return 'image/avif'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    return None
+
+
+def prepare_edit_input(image_path: str, max_side: int = EDIT_INPUT_MAX_SIDE) -> Tuple[bytes, str, int]:
+    """
+    Bytes prontos para upload de edição: (dados, mime_type, tamanho original)
+
+    JPEG/WebP já pequenos seguem como estão; os demais são reduzidos para
+    max_side no lado maior e recodificados (JPEG, ou PNG se houver
+    transparência).
+    """
+    with open(image_path, 'rb') as f:
+        data = f.read()
+    original_size = len(data)
+    mime_type = detect_mime(data)
+    if mime_type is None:
+        raise ValueError(f"Formato de imagem não reconhecido: {image_path}")
+
+    with Image.open(BytesIO(data)) as image:
+        has_alpha = image.mode in ('RGBA', 'LA') or 'transparency' in image.info
+        # PNG opaco vira JPEG mesmo no tamanho certo (3-10x menor, indiferente para o modelo)
+        lossless_opaque = mime_type == 'image/png' and not has_alpha
+        if mime_type in EDIT_ACCEPTED_MIME and max(image.size) <= max_side and not lossless_opaque:
+            return data, mime_type, original_size
+
+        image.thumbnail((max_side, max_side), Image.LANCZOS)
+        buffer = BytesIO()
+        if has_alpha:
+            image.save(buffer, format='PNG', optimize=True)
+            mime_type = 'image/png'
+        else:
+            image.convert('RGB').save(buffer, format='JPEG', quality=EDIT_INPUT_JPEG_QUALITY)
+            mime_type = 'image/jpeg'
+
+    return buffer.getvalue(), mime_type, original_size
+
+
 class GeminiFlashCoverGenerator:
     """Gerador especializado usando Gemini 2.5 Flash Image Preview"""
 
-    def __init__(self, api_key: str):
-        """Inicializa gerador Gemini Flash"""
+    def __init__(self, api_key: str, planner: Optional[CoverPlanner] = None,
+                 key_pool: Optional[ApiKeyPool] = None, hedger: Optional[HedgedCaller] = None,
+                 hedge_model: Optional[str] = None, master_format: str = DEFAULT_MASTER_FORMAT,
+                 on_result=None, output_dir: Optional[Path] = None,
+                 memory_budget: Optional[MemoryBudget] = None, finalize=None):
+        """
+        Inicializa gerador Gemini Flash
+
+        Args:
+            api_key: Google API key
+            planner: Planejador de similaridade (reuse/diversify) entre posts
+            key_pool: Pool de chaves (cotas de vários projetos); padrão: só api_key
+            hedger: Deadline por chamada e hedge após o p90/p95 observado
+            hedge_model: Modelo da requisição duplicada (padrão: o mesmo)
+            master_format: Formato do master salvo (auto: escolhido pelas estatísticas)
+            on_result: Chamado com um CoverResult a cada imagem gravada (ver cover_stream)
+            output_dir: Diretório das capas geradas (padrão: public/Blog)
+            memory_budget: Orçamento de RSS compartilhado entre requisições
+            finalize: finalize(outputs, filepath, post_id) com o master ainda em staging;
+                False descarta o master (ex.: paleta reprovada)
+        """
         self.api_key = api_key
         self.model_name = 'gemini-2.5-flash-image-preview'
-        self.client = genai.Client(api_key=api_key)
+        self.output_dir = Path(output_dir) if output_dir else OUTPUT_DIR
+        self.on_result = on_result
+        self.finalize = finalize
+        self.key_pool = key_pool or ApiKeyPool([api_key])
+        # Cliente fixo para operações com estado no projeto (uploads da Files API)
+        self.client = self.key_pool.primary.client
+        self.hedger = hedger or HedgedCaller()
+        self.hedge_model = hedge_model or self.model_name
+        self.master_format = master_format
+        self.memory_budget = memory_budget or MemoryBudget()
+        self.planner = planner
+
+        # Bytes de upload de edição (original vs. enviado), somados entre threads
+        self.edit_bytes_original = 0
+        self.edit_bytes_uploaded = 0
+        self._stats_lock = threading.Lock()
 
         print(f"✓ Gemini 2.5 Flash Image Preview inicializado")
 
@@ -130,42 +244,75 @@ class GeminiFlashCoverGenerator:
 
         return prompt
 
-    def generate_image(self, prompt: str, post_id: int) -> List[str]:
-        """Gera imagem usando Gemini Flash"""
+    def generate_image(self, prompt: str, post_id: int, timings: Optional[Dict[str, float]] = None) -> List[str]:
+        """Gera imagem usando Gemini Flash (timings: tempos já medidos, repassados nos CoverResult)"""
 
         print(f"\n🎨 Gerando imagem com Gemini 2.5 Flash Image Preview...")
 
+        def request(deadline_at: float, model: str):
+            with self.key_pool.acquire(timeout=time_left(deadline_at)) as key:
+                return key.client.models.generate_content(
+                    model=model,
+                    contents=[prompt],
+                    config=types.GenerateContentConfig(
+                        http_options=types.HttpOptions(timeout=int(time_left(deadline_at) * 1000))
+                    ),
+                )
+
+        # Reserva de memória (dobrada com hedge: até duas respostas em voo)
+        estimate = estimate_response_mb(1, '1K') * (2 if self.hedger.hedge else 1)
         try:
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=[prompt],
-            )
-
-            saved_files = []
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-            # Processar resposta
-            for candidate in response.candidates:
-                for idx, part in enumerate(candidate.content.parts):
-                    if part.text is not None:
-                        print(f"💬 Resposta do modelo (texto):")
-                        print("-"*70)
-                        preview = part.text[:200] + "..." if len(part.text) > 200 else part.text
-                        print(preview)
-                        print("-"*70)
-
-                    elif part.inline_data is not None:
-                        filename = f"capa_post_{post_id}_gemini_flash_{timestamp}.png"
-                        filepath = OUTPUT_DIR / filename
-
-                        # Processar imagem
-                        image = Image.open(BytesIO(part.inline_data.data))
-                        image.save(str(filepath), format='PNG', optimize=True)
-
-                        file_size = filepath.stat().st_size
-                        print(f"✓ Imagem salva: {filename} ({file_size:,} bytes)")
-                        print(f"   Dimensões: {image.size[0]}x{image.size[1]}")
-                        saved_files.append(str(filepath))
+            with self.memory_budget.reserve(estimate):
+                started = time.perf_counter()
+                with span('request', model=self.model_name, post_id=post_id):
+                    response = self.hedger.call(
+                        self.model_name,
+                        primary=lambda deadline_at: request(deadline_at, self.model_name),
+                        hedge=lambda deadline_at: request(deadline_at, self.hedge_model),
+                        hedge_model=self.hedge_model,
+                    )
+                request_seconds = time.perf_counter() - started
+
+                saved_files = []
+                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+
+                # Processar resposta uma parte por vez: gravar no disco e descartar
+                for candidate in response.candidates or []:
+                    parts = candidate.content.parts if candidate.content else []
+                    for idx, part in enumerate(parts or []):
+                        if part.text is not None:
+                            print(f"💬 Resposta do modelo (texto):")
+                            print("-"*70)
+                            preview = part.text[:200] + "..." if len(part.text) > 200 else part.text
+                            print(preview)
+                            print("-"*70)
+
+                        elif part.inline_data is not None:
+                            filename = f"capa_post_{post_id}_gemini_flash_{timestamp}.png"
+                            filepath = self.output_dir / filename
+
+                            # Staging + rename atômico; o commit também registra no manifesto de assets
+                            started = time.perf_counter()
+                            with StagedOutputs() as outputs:
+                                filepath, file_size, (width, height) = save_inline_image(
+                                    part.inline_data, filepath, self.master_format, outputs=outputs)
+                                # Verificações antes da promoção: reprovado não sai do staging
+                                promoted = self.finalize is None or self.finalize(outputs, filepath, post_id)
+                                if not promoted:
+                                    outputs.rollback()
+                            part.inline_data = None
+                            if not promoted:
+                                continue
+                            if self.on_result is not None:
+                                self.on_result(CoverResult(
+                                    filepath, post_id, 'gemini-flash', self.model_name, width, height, file_size,
+                                    {**(timings or {}), 'request': request_seconds,
+                                     'save': time.perf_counter() - started}))
+
+                            self.memory_budget.sample()
+                            print(f"✓ Imagem salva: {filepath.name} ({file_size:,} bytes)")
+                            print(f"   Dimensões: {width}x{height}")
+                            saved_files.append(str(filepath))
 
             if not saved_files:
                 print("\n⚠️  Nenhuma imagem foi gerada.")
@@ -195,22 +342,32 @@ class GeminiFlashCoverGenerator:
         print("="*70)
 
         # Criar prompt
-        prompt = self.create_prompt(post_data)
+        started = time.perf_counter()
+        with span('prompt', post_id=post_id):
+            prompt = self.create_prompt(post_data)
+
+            # Posts com tema próximo: reaproveitar capa aprovada ou diversificar o prompt
+            prompt, reused = apply_plan(self.planner, post_data, prompt, self.output_dir, self.on_result)
+        prompt_seconds = time.perf_counter() - started
+        if reused is not None:
+            return reused
 
         print(f"\n🤖 Prompt (preview):")
         print(prompt[:300] + "..." if len(prompt) > 300 else prompt)
 
         # Gerar imagem
-        return self.generate_image(prompt, post_id)
+        return self.generate_image(prompt, post_id, timings={'prompt': prompt_seconds})
 
-    def edit_image(self, image_path: str, edit_instruction: str, post_id: int) -> List[str]:
+    def edit_image(self, image_path: str, edit_instruction: str, post_id: int,
+                   max_side: int = EDIT_INPUT_MAX_SIDE) -> List[str]:
         """
         Edita uma imagem existente (funcionalidade avançada do Gemini Flash)
 
         Args:
             image_path: Caminho da imagem para editar
             edit_instruction: Instrução de edição em linguagem natural
-            post_id: ID do post
+            post_id: ID do post (0 = nomear pelo arquivo de origem)
+            max_side: Lado maior da imagem enviada (reduzida antes do upload)
 
         Returns:
             Lista de caminhos das imagens editadas
@@ -220,46 +377,33 @@ class GeminiFlashCoverGenerator:
         print(f"📝 Instrução: {edit_instruction}")
 
         try:
-            # Carregar imagem
-            with open(image_path, 'rb') as f:
-                image_data = f.read()
-
-            # Criar prompt de edição
-            edit_prompt = f"""{edit_instruction}
-
-Maintain the original style and quality.
-Keep 16:9 landscape format.
-NO text or words in the image."""
+            # Carregar imagem (MIME real, reduzida ao tamanho de trabalho do modelo)
+            with span('encode', file=Path(image_path).name, kind='edit-input'):
+                image_data, mime_type, original_size = prepare_edit_input(image_path, max_side)
+            with self._stats_lock:
+                self.edit_bytes_original += original_size
+                self.edit_bytes_uploaded += len(image_data)
+            print(f"📤 Upload: {mime_type}, {len(image_data):,} bytes (original: {original_size:,})")
 
             # Gerar com imagem de entrada
-            response = self.client.models.generate_content(
-                model=self.model_name,
-                contents=[
-                    types.Content(parts=[
-                        types.Part(inline_data=types.Blob(
-                            mime_type='image/png',
-                            data=image_data
-                        )),
-                        types.Part(text=edit_prompt)
-                    ])
-                ]
-            )
+            with span('request', model=self.model_name, kind='edit'), self.key_pool.acquire() as key:
+                response = key.client.models.generate_content(
+                    model=self.model_name,
+                    contents=[
+                        types.Content(parts=[
+                            types.Part(inline_data=types.Blob(
+                                mime_type=mime_type,
+                                data=image_data
+                            )),
+                            types.Part(text=EDIT_PROMPT_TEMPLATE.format(instruction=edit_instruction))
+                        ])
+                    ]
+                )
+            del image_data
 
-            saved_files = []
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-            for candidate in response.candidates:
-                for part in candidate.content.parts:
-                    if part.inline_data is not None:
-                        filename = f"capa_post_{post_id}_gemini_edited_{timestamp}.png"
-                        filepath = OUTPUT_DIR / filename
-
-                        image = Image.open(BytesIO(part.inline_data.data))
-                        image.save(str(filepath), format='PNG', optimize=True)
-
-                        file_size = filepath.stat().st_size
-                        print(f"✓ Imagem editada salva: {filename} ({file_size:,} bytes)")
-                        saved_files.append(str(filepath))
+            prefix = f"capa_post_{post_id}" if post_id else Path(image_path).stem
+            saved_files = self.save_edited_images(response, f"{prefix}_gemini_edited_{timestamp}")
 
             return saved_files
 
@@ -269,39 +413,189 @@ NO text or words in the image."""
             traceback.print_exc()
             return []
 
+    def save_edited_images(self, response, name: str) -> List[str]:
+        """
+        Grava as imagens de uma resposta de edição, uma parte por vez
 
-def load_blog_posts_data() -> List[Dict]:
-    """Carrega dados dos posts"""
-    import re
+        As partes ficam em staging e são promovidas (e registradas no manifesto
+        de assets) juntas: nenhum leitor vê um resultado de edição incompleto.
+        """
+        saved_files = []
+        with StagedOutputs() as outputs:
+            for candidate in response.candidates or []:
+                parts = candidate.content.parts if candidate.content else []
+                for idx, part in enumerate(parts or []):
+                    if part.inline_data is not None:
+                        suffix = f"_{idx}" if idx else ""
+                        filename = f"{name}{suffix}.png"
+                        filepath = self.output_dir / filename
 
-    blog_data_path = Path(__file__).parent.parent / "src" / "data" / "blogPosts.js"
+                        filepath, file_size, _ = save_inline_image(
+                            part.inline_data, filepath, self.master_format, outputs=outputs)
+                        part.inline_data = None
 
-    if not blog_data_path.exists():
-        print(f"✗ Arquivo não encontrado: {blog_data_path}")
-        return []
+                        print(f"✓ Imagem editada salva: {filepath.name} ({file_size:,} bytes)")
+                        saved_files.append(str(filepath))
+        return saved_files
 
-    posts = []
-    try:
-        with open(blog_data_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+    def edit_session(self, image_path: str, post_id: int = 0, chain: bool = False,
+                     max_side: int = EDIT_INPUT_MAX_SIDE) -> 'EditSession':
+        """Sessão de edição iterativa: a origem é enviada uma única vez (Files API)"""
+        return EditSession(self, image_path, post_id, chain, max_side)
 
-            post_pattern = r'\{[\s\S]*?id:\s*(\d+)[\s\S]*?slug:\s*[\'"]([^\'"]+)[\'"][\s\S]*?title:\s*[\'"]([^\'"]+)[\'"][\s\S]*?excerpt:\s*[\'"]([^\'"]+)[\'"][\s\S]*?category:\s*[\'"]([^\'"]+)[\'"][\s\S]*?\}'
+    def edit_batch(self, jobs: List[Tuple[str, int]], edit_instruction: str,
+                   concurrency: int = EDIT_DEFAULT_CONCURRENCY,
+                   max_side: int = EDIT_INPUT_MAX_SIDE) -> Dict[str, List[str]]:
+        """
+        Aplica a mesma instrução a várias imagens com concorrência limitada
 
-            for match in re.finditer(post_pattern, content):
-                posts.append({
-                    'id': int(match.group(1)),
-                    'slug': match.group(2),
-                    'title': match.group(3),
-                    'excerpt': match.group(4),
-                    'category': match.group(5)
-                })
+        Args:
+            jobs: Pares (caminho da imagem, post_id) — post_id 0 nomeia pelo arquivo
+            edit_instruction: Instrução de edição em linguagem natural
+            concurrency: Edições simultâneas (chamadas à API em paralelo)
+            max_side: Lado maior da imagem enviada
 
-        print(f"✓ {len(posts)} posts carregados")
-        return posts
+        Returns:
+            Dicionário caminho de origem -> imagens editadas
+        """
+        print(f"\n✏️  Edição em lote: {len(jobs)} imagem(ns), {concurrency} em paralelo")
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = {
+                executor.submit(self.edit_image, path, edit_instruction, post_id, max_side): path
+                for path, post_id in jobs
+            }
+            for future in as_completed(futures):
+                results[futures[future]] = future.result()
+
+        if self.edit_bytes_original:
+            ratio = self.edit_bytes_uploaded / self.edit_bytes_original
+            print(f"\n📤 Upload total: {self.edit_bytes_uploaded / 1024 / 1024:.1f} MB "
+                  f"de {self.edit_bytes_original / 1024 / 1024:.1f} MB originais ({ratio:.0%})")
+
+        return results
+
+
+class EditSession:
+    """
+    Edições iterativas sobre uma imagem enviada uma única vez
+
+    A origem (já reduzida por prepare_edit_input) vai para a Files API e cada
+    instrução referencia o arquivo pela URI, sem reenviar os bytes. Com
+    chain=True cada instrução se aplica ao resultado anterior, cujo upload
+    (também reduzido) substitui a referência.
+
+    Uso:
+        with generator.edit_session("capa.png", post_id=22) as session:
+            session.apply("warmer lighting")
+            session.apply("add subtle lens flare")
+    """
+
+    def __init__(self, generator: GeminiFlashCoverGenerator, image_path: str, post_id: int = 0,
+                 chain: bool = False, max_side: int = EDIT_INPUT_MAX_SIDE):
+        self.generator = generator
+        self.client = generator.client
+        self.image_path = image_path
+        self.post_id = post_id
+        self.chain = chain
+        self.max_side = max_side
+        self.prefix = f"capa_post_{post_id}" if post_id else Path(image_path).stem
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.turn = 0
+        self.uploaded_bytes = 0
+        self.current = None
+        self._next_source = None
+        self._uploads = []
+
+    def _upload(self, image_path: str):
+        data, mime_type, original_size = prepare_edit_input(image_path, self.max_side)
+        uploaded = self.client.files.upload(
+            file=BytesIO(data),
+            config=types.UploadFileConfig(mime_type=mime_type, display_name=Path(image_path).name)
+        )
+        self._uploads.append(uploaded)
+        self.uploaded_bytes += len(data)
+        with self.generator._stats_lock:
+            self.generator.edit_bytes_original += original_size
+            self.generator.edit_bytes_uploaded += len(data)
+        print(f"📤 Upload: {Path(image_path).name} ({mime_type}, {len(data):,} bytes) → {uploaded.name}")
+        return uploaded
+
+    def open(self) -> 'EditSession':
+        self.current = self._upload(self.image_path)
+        return self
+
+    def apply(self, edit_instruction: str) -> List[str]:
+        """Aplica uma instrução e grava o resultado intermediário"""
+        if self.current is None:
+            self.open()
+        if self._next_source:
+            # Encadeado: só envia o resultado anterior quando há um próximo turno
+            self.current = self._upload(self._next_source)
+            self._next_source = None
+
+        self.turn += 1
+        print(f"\n✏️  Turno {self.turn}: {edit_instruction}")
 
-    except Exception as e:
-        print(f"✗ Erro ao carregar posts: {str(e)}")
-        return []
+        try:
+            with span('request', model=self.generator.model_name, kind='session', turn=self.turn):
+                response = self.client.models.generate_content(
+                    model=self.generator.model_name,
+                    contents=[
+                        types.Content(parts=[
+                            types.Part.from_uri(file_uri=self.current.uri, mime_type=self.current.mime_type),
+                            types.Part(text=EDIT_PROMPT_TEMPLATE.format(instruction=edit_instruction))
+                        ])
+                    ]
+                )
+            saved_files = self.generator.save_edited_images(
+                response, f"{self.prefix}_gemini_session_{self.timestamp}_t{self.turn}"
+            )
+        except Exception as e:
+            print(f"✗ Erro no turno {self.turn}: {str(e)}")
+            return []
+
+        if self.chain and saved_files:
+            self._next_source = saved_files[0]
+
+        return saved_files
+
+    def close(self):
+        """Remove os uploads da Files API (expiram sozinhos em 48h, mas não deixar lixo)"""
+        for uploaded in self._uploads:
+            try:
+                self.client.files.delete(name=uploaded.name)
+            except Exception as e:
+                print(f"⚠️  Não foi possível remover {uploaded.name}: {str(e)}")
+        self._uploads = []
+        self.current = None
+        self._next_source = None
+
+    def __enter__(self) -> 'EditSession':
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def collect_edit_jobs(posts: List[Dict], pattern: Optional[str] = None) -> List[Tuple[str, int]]:
+    """Pares (arquivo, post_id) para edição em lote: glob em OUTPUT_DIR ou capas dos posts"""
+    if pattern:
+        jobs = []
+        for path in sorted(OUTPUT_DIR.glob(pattern)):
+            match = re.match(r'capa_post_(\d+)_', path.name)
+            jobs.append((str(path), int(match.group(1)) if match else 0))
+        return jobs
+
+    jobs = []
+    for post in posts:
+        source = find_cover_source(post, OUTPUT_DIR)
+        if source is None:
+            print(f"⚠️  Post {post['id']}: capa não encontrada em {OUTPUT_DIR}")
+            continue
+        jobs.append((str(source), post['id']))
+    return jobs
 
 
 def main():
@@ -315,31 +609,107 @@ def main():
     parser.add_argument('--all', action='store_true', help='Todos os posts')
     parser.add_argument('--list', action='store_true', help='Listar posts')
     parser.add_argument('--edit', type=str, help='Editar imagem existente (caminho)')
-    parser.add_argument('--edit-instruction', type=str, help='Instrução de edição')
+    parser.add_argument('--edit-instruction', type=str, action='append',
+                       help='Instrução de edição (repita para uma sessão iterativa com upload único)')
+    parser.add_argument('--chain', action='store_true',
+                       help='Sessão: cada instrução se aplica ao resultado anterior')
+    parser.add_argument('--edit-glob', type=str,
+                       help='Edição em lote: padrão glob em public/Blog (ex.: "capa-lentes-*.png")')
+    parser.add_argument('--concurrency', type=int, default=None,
+                       help=f'Chamadas simultâneas (padrão: 1 na geração, {EDIT_DEFAULT_CONCURRENCY} na edição em lote)')
+    parser.add_argument('--rate-per-key', type=float, default=DEFAULT_RATE_PER_MINUTE,
+                       help=f'Requisições/minuto por chave em GOOGLE_GEMINI_API_KEYS (padrão: {DEFAULT_RATE_PER_MINUTE})')
+    parser.add_argument('--edit-max-side', type=int, default=EDIT_INPUT_MAX_SIDE,
+                       help=f'Lado maior da imagem enviada para edição (padrão: {EDIT_INPUT_MAX_SIDE})')
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE_SECONDS,
+                       help=f'Limite por chamada à API em segundos (padrão: {DEFAULT_DEADLINE_SECONDS:.0f})')
+    parser.add_argument('--hedge', action='store_true',
+                       help='Enviar requisição duplicada quando passar do p90/p95 observado')
+    parser.add_argument('--hedge-percentile', type=float, default=0.95, choices=[0.90, 0.95],
+                       help='Percentil de latência que dispara o hedge (padrão: 0.95)')
+    parser.add_argument('--hedge-model', type=str, help='Modelo da requisição duplicada (padrão: o mesmo)')
+    parser.add_argument('--hedge-budget', type=float, default=DEFAULT_BUDGET_RATIO,
+                       help=f'Hedges como fração das chamadas (padrão: {DEFAULT_BUDGET_RATIO})')
+    parser.add_argument('--max-rss-mb', type=int, default=None,
+                       help='Limite de RSS do processo em MB')
+    parser.add_argument('--master-format', choices=MASTER_FORMATS, default=DEFAULT_MASTER_FORMAT,
+                       help='Formato do master: auto (WebP lossless/PNG paleta pelas estatísticas), '
+                            'original (bytes da API) ou fixo')
+    parser.add_argument('--jsonl', action='store_true',
+                       help='Uma linha JSON por imagem gravada no stdout (log vai para o stderr)')
+    add_profile_arguments(parser)
+    parser.add_argument('--similarity', choices=SIMILARITY_MODES, default=DEFAULT_SIMILARITY_MODE,
+                       help='Posts parecidos: plan (só mostra), diversificar prompt, reutilizar capa aprovada ou off')
+    parser.add_argument('--palette', choices=['report', 'enforce', 'off'], default='report',
+                       help='Conformidade com as cores da categoria: relatório, reprovar fora da paleta ou off')
+    parser.add_argument('--crops', action='store_true',
+                       help='Derivar thumb/OG/story/podcast por smart crop (sem novas chamadas)')
 
     args = parser.parse_args()
+    jsonl = open_jsonl(args.jsonl)
+    start_profiling(args.profile, 'gemini-flash', top=args.profile_top)
 
     print("\n" + "="*70)
     print("🏥 SARAIVA VISION - Gemini Flash Image Generator")
     print("="*70)
 
-    # API Key
-    api_key = os.environ.get('GOOGLE_GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
-    if not api_key:
+    # API Keys (uma por projeto; a cota de cada uma soma na vazão total)
+    api_keys = load_api_keys()
+    if not api_keys:
         print("\n✗ API key não encontrada!")
         print("export GOOGLE_GEMINI_API_KEY='sua-chave'")
+        print("export GOOGLE_GEMINI_API_KEYS='chave-a,chave-b'  # várias chaves")
         sys.exit(1)
+    api_key = api_keys[0]
+    key_pool = ApiKeyPool(api_keys, rate_per_minute=args.rate_per_key)
+    hedger = HedgedCaller(hedge=args.hedge, percentile=args.hedge_percentile,
+                          budget_ratio=args.hedge_budget, deadline=args.deadline,
+                          concurrency=args.concurrency or 1)
 
     # Modo de edição
     if args.edit and args.edit_instruction:
-        generator = GeminiFlashCoverGenerator(api_key)
+        generator = GeminiFlashCoverGenerator(api_key, key_pool=key_pool)
         post_id = args.post_id or 0
-        generator.edit_image(args.edit, args.edit_instruction, post_id)
-        sys.exit(0)
+        if len(args.edit_instruction) == 1 and not args.chain:
+            generator.edit_image(args.edit, args.edit_instruction[0], post_id, args.edit_max_side)
+            sys.exit(0)
+
+        # Sessão iterativa: upload único, um resultado salvo por instrução
+        total = 0
+        with generator.edit_session(args.edit, post_id, args.chain, args.edit_max_side) as session:
+            for instruction in args.edit_instruction:
+                total += len(session.apply(instruction))
+        print(f"\n✅ {total} imagem(ns) em {session.turn} turno(s), "
+              f"upload: {session.uploaded_bytes:,} bytes")
+        sys.exit(0 if total else 1)
+
+    if args.edit_instruction and len(args.edit_instruction) > 1:
+        print("✗ Múltiplas instruções só são suportadas com --edit (sessão)")
+        sys.exit(1)
+    edit_instruction = args.edit_instruction[0] if args.edit_instruction else None
+
+    # Edição em lote por glob (não precisa dos posts)
+    if args.edit_glob:
+        if not edit_instruction:
+            print("✗ --edit-glob requer --edit-instruction")
+            sys.exit(1)
+        jobs = collect_edit_jobs([], args.edit_glob)
+        if not jobs:
+            print(f"✗ Nenhuma imagem corresponde a {args.edit_glob}")
+            sys.exit(1)
+        generator = GeminiFlashCoverGenerator(api_key, key_pool=key_pool)
+        with stage('edit'):
+            results = generator.edit_batch(jobs, edit_instruction, args.concurrency or EDIT_DEFAULT_CONCURRENCY,
+                                           args.edit_max_side)
+        edited = sum(len(files) for files in results.values())
+        print(f"\n✅ {edited} imagem(ns) editada(s) de {len(jobs)}")
+        print(key_pool.report())
+        sys.exit(0 if edited else 1)
 
     # Carregar posts
     print("\n📚 Carregando posts...")
-    posts = load_blog_posts_data()
+    with stage('load'):
+        posts = load_blog_posts_data()
 
     if not posts:
         print("✗ Nenhum post encontrado!")
@@ -368,22 +738,63 @@ def main():
 
     # Inicializar gerador
     print(f"\n🚀 Inicializando Gemini 2.5 Flash Image Preview")
-    generator = GeminiFlashCoverGenerator(api_key)
+    planner = CoverPlanner(args.similarity) if args.similarity != 'off' else None
+    memory_budget = MemoryBudget(max_rss_mb=args.max_rss_mb)
+    generator = GeminiFlashCoverGenerator(api_key, planner=planner, key_pool=key_pool,
+                                          hedger=hedger, hedge_model=args.hedge_model,
+                                          master_format=args.master_format, memory_budget=memory_budget)
+
+    # Edição em lote das capas existentes dos posts selecionados
+    if edit_instruction and not args.edit:
+        full_posts = {p['id']: p for p in load_blog_posts_data(full=True)}
+        jobs = collect_edit_jobs([full_posts[p['id']] for p in selected_posts])
+        with stage('edit'):
+            results = generator.edit_batch(jobs, edit_instruction, args.concurrency or EDIT_DEFAULT_CONCURRENCY,
+                                           args.edit_max_side)
+        edited = sum(len(files) for files in results.values())
+        print(f"\n✅ {edited} imagem(ns) editada(s) de {len(jobs)}")
+        print(key_pool.report())
+        sys.exit(0 if edited else 1)
 
     # Gerar capas
     print(f"\n🎨 Gerando capas para {len(selected_posts)} post(s)...")
     total_generated = 0
 
-    for post in selected_posts:
-        files = generator.generate_cover(post)
-        total_generated += len(files)
+    # Cada imagem chega assim que é gravada (--jsonl repassa na hora)
+    posts_by_id = {post['id']: post for post in selected_posts}
+    gate = PaletteGate(enforce=args.palette == 'enforce') if args.palette != 'off' else None
+
+    def finalize(outputs, filepath, post_id: int) -> bool:
+        """Paleta e recortes do master ainda em staging: promovidos na mesma transação"""
+        with span('postprocess', post_id=post_id):
+            category = posts_by_id[post_id].get('category', 'Prevenção')
+            if gate is not None and not gate.check(outputs, filepath, category):
+                return False
+            if args.crops:
+                derive_crops(filepath, post_id=post_id, outputs=outputs)
+        return True
+
+    generator.finalize = finalize
+    with stage('generate'):
+        for result in stream_covers(generator, selected_posts, args.concurrency or 1):
+            total_generated += 1
+            write_jsonl(jsonl, result)
+
+    # Paleta e recortes já rodaram em cada master antes da promoção (finalize)
+    if gate is not None:
+        gate.report()
 
     # Resumo
     print("\n" + "="*70)
     print("✅ GERAÇÃO COMPLETA!")
     print(f"📊 Total: {total_generated} imagens")
     print(f"📂 Diretório: {OUTPUT_DIR}")
+    print(key_pool.report())
+    print(hedger.report())
+    print(f"🧠 {memory_budget.report()}")
     print("="*70 + "\n")
+    hedger.close()
+    stop_profiling()
 
 
 if __name__ == "__main__":
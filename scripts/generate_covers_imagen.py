@@ -15,15 +15,25 @@ Uso:
     python generate_covers_imagen.py --category "Prevenção"
 """
 
-import os
 import sys
+import time
 import argparse
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 from google import genai
-from PIL import Image
-from io import BytesIO
+
+from api_key_pool import ApiKeyPool, load_api_keys, DEFAULT_RATE_PER_MINUTE
+from blog_data import load_blog_posts_data
+from cover_stream import CoverResult, open_jsonl, stream_covers, write_jsonl
+from hedged_requests import HedgedCaller, DEFAULT_DEADLINE_SECONDS, DEFAULT_BUDGET_RATIO, time_left
+from master_format import MASTER_FORMATS, DEFAULT_MASTER_FORMAT, save_master
+from memory_budget import MemoryBudget, estimate_response_mb
+from profiling import add_profile_arguments, start_profiling, stop_profiling, span, stage
+from smart_crop import derive_crops
+from staged_writes import StagedOutputs
+from palette_check import PaletteGate
+from post_similarity import CoverPlanner, DEFAULT_SIMILARITY_MODE, SIMILARITY_MODES, apply_plan
 
 # Diretório de saída
 OUTPUT_DIR = Path(__file__).parent.parent / "public" / "Blog"
@@ -92,7 +102,13 @@ Requirements:
 class ImagenCoverGenerator:
     """Gerador especializado usando Imagen 4"""
 
-    def __init__(self, api_key: str, model: str = "imagen-4.0-generate-001"):
+    def __init__(self, api_key: str, model: str = "imagen-4.0-generate-001",
+                 memory_budget: Optional[MemoryBudget] = None,
+                 planner: Optional[CoverPlanner] = None,
+                 key_pool: Optional[ApiKeyPool] = None,
+                 hedger: Optional[HedgedCaller] = None, hedge_model: Optional[str] = None,
+                 master_format: str = DEFAULT_MASTER_FORMAT, on_result=None,
+                 output_dir: Optional[Path] = None, finalize=None):
         """
         Inicializa gerador Imagen 4
 
@@ -102,10 +118,29 @@ class ImagenCoverGenerator:
                 - imagen-4.0-generate-001 (Standard, recommended)
                 - imagen-4.0-ultra-generate-001 (Ultra quality)
                 - imagen-4.0-fast-generate-001 (Fast generation)
+            memory_budget: Orçamento de RSS compartilhado entre requisições
+            planner: Planejador de similaridade (reuse/diversify) entre posts
+            key_pool: Pool de chaves (cotas de vários projetos); padrão: só api_key
+            hedger: Deadline por chamada e hedge após o p90/p95 observado
+            hedge_model: Modelo da requisição duplicada (padrão: o mesmo)
+            master_format: Formato do master salvo (auto: escolhido pelas estatísticas)
+            on_result: Chamado com um CoverResult a cada imagem gravada (ver cover_stream)
+            output_dir: Diretório das capas geradas (padrão: public/Blog)
+            finalize: finalize(outputs, filepath, post_id) com o master ainda em staging;
+                False descarta o master (ex.: paleta reprovada)
         """
         self.api_key = api_key
         self.model_name = model
-        self.client = genai.Client(api_key=api_key)
+        self.output_dir = Path(output_dir) if output_dir else OUTPUT_DIR
+        self.on_result = on_result
+        self.finalize = finalize
+        self.key_pool = key_pool or ApiKeyPool([api_key])
+        self.client = self.key_pool.primary.client
+        self.hedger = hedger or HedgedCaller()
+        self.hedge_model = hedge_model or model
+        self.master_format = master_format
+        self.memory_budget = memory_budget or MemoryBudget()
+        self.planner = planner
 
         print(f"✓ Imagen 4 inicializado: {model}")
 
@@ -144,7 +179,8 @@ class ImagenCoverGenerator:
         return prompt
 
     def generate_images(self, prompt: str, post_id: int, num_images: int = 2,
-                       aspect_ratio: str = "16:9", image_size: str = "1K") -> List[str]:
+                       aspect_ratio: str = "16:9", image_size: str = "1K",
+                       timings: Optional[Dict[str, float]] = None) -> List[str]:
         """
         Gera imagens usando Imagen 4
 
@@ -154,6 +190,7 @@ class ImagenCoverGenerator:
             num_images: Número de imagens (1-4)
             aspect_ratio: "1:1", "3:4", "4:3", "9:16", "16:9"
             image_size: "1K" ou "2K" (apenas Ultra e Standard)
+            timings: Tempos já medidos (ex.: prompt), repassados nos CoverResult
 
         Returns:
             Lista de caminhos das imagens salvas
@@ -163,38 +200,71 @@ class ImagenCoverGenerator:
         print(f"📏 Size: {image_size}")
 
         try:
-            response = self.client.models.generate_images(
-                model=self.model_name,
-                prompt=prompt,
-                config=genai.types.GenerateImagesConfig(
-                    number_of_images=num_images,
-                    aspect_ratio=aspect_ratio,
-                    image_size=image_size,
-                    # person_generation="allow_adult"  # Padrão
-                )
-            )
-
             saved_files = []
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-            for idx, generated_image in enumerate(response.generated_images):
-                image_count = idx + 1
-                filename = f"capa_post_{post_id}_imagen4_opt{image_count}_{timestamp}.png"
-                filepath = OUTPUT_DIR / filename
-
-                # Save image using genai.types.Image.save() method
-                generated_image.image.save(str(filepath))
-
-                file_size = filepath.stat().st_size
-
-                # Get dimensions from saved file
-                from PIL import Image as PILImage
-                with PILImage.open(filepath) as pil_img:
-                    width, height = pil_img.size
-
-                print(f"✓ Imagem {image_count} salva: {filename} ({file_size:,} bytes)")
-                print(f"   Dimensões: {width}x{height}")
-                saved_files.append(str(filepath))
+            def request(deadline_at: float, model: str):
+                # Cota do Imagen é por imagem: custo = número de imagens pedidas
+                with self.key_pool.acquire(cost=num_images, timeout=time_left(deadline_at)) as key:
+                    return key.client.models.generate_images(
+                        model=model,
+                        prompt=prompt,
+                        config=genai.types.GenerateImagesConfig(
+                            number_of_images=num_images,
+                            aspect_ratio=aspect_ratio,
+                            image_size=image_size,
+                            # person_generation="allow_adult"  # Padrão
+                            http_options=genai.types.HttpOptions(timeout=int(time_left(deadline_at) * 1000)),
+                        )
+                    )
+
+            # Reserva de memória (dobrada com hedge: até duas respostas em voo)
+            estimate = estimate_response_mb(num_images, image_size) * (2 if self.hedger.hedge else 1)
+            with self.memory_budget.reserve(estimate):
+                started = time.perf_counter()
+                with span('request', model=self.model_name, post_id=post_id, images=num_images):
+                    response = self.hedger.call(
+                        self.model_name,
+                        primary=lambda deadline_at: request(deadline_at, self.model_name),
+                        hedge=lambda deadline_at: request(deadline_at, self.hedge_model),
+                        hedge_model=self.hedge_model,
+                    )
+
+                request_seconds = time.perf_counter() - started
+
+                # Processar uma imagem por vez: gravar bytes no disco e descartar
+                generated = response.generated_images or []
+                del response
+
+                for idx in range(len(generated)):
+                    generated_image, generated[idx] = generated[idx], None
+                    image_count = idx + 1
+                    filename = f"capa_post_{post_id}_imagen4_opt{image_count}_{timestamp}.png"
+                    filepath = self.output_dir / filename
+
+                    # Master sem perdas no formato escolhido ('original': bytes da API sem decodificar)
+                    # Staging + rename atômico; o commit também registra no manifesto de assets
+                    started = time.perf_counter()
+                    with StagedOutputs() as outputs:
+                        filepath, file_size, (width, height) = save_master(
+                            generated_image.image.image_bytes, filepath, self.master_format, outputs=outputs)
+                        # Verificações antes da promoção: reprovado não sai do staging
+                        promoted = self.finalize is None or self.finalize(outputs, filepath, post_id)
+                        if not promoted:
+                            outputs.rollback()
+                    del generated_image
+                    if not promoted:
+                        continue
+                    if self.on_result is not None:
+                        self.on_result(CoverResult(
+                            filepath, post_id, 'imagen', self.model_name, width, height, file_size,
+                            {**(timings or {}), 'request': request_seconds,
+                             'save': time.perf_counter() - started}))
+
+                    self.memory_budget.sample()
+                    print(f"✓ Imagem {image_count} salva: {filepath.name} ({file_size:,} bytes)")
+                    print(f"   Dimensões: {width}x{height}")
+                    saved_files.append(str(filepath))
 
             return saved_files
 
@@ -204,7 +274,8 @@ class ImagenCoverGenerator:
             traceback.print_exc()
             return []
 
-    def generate_cover(self, post_data: Dict, num_variations: int = 2) -> List[str]:
+    def generate_cover(self, post_data: Dict, num_variations: int = 2,
+                       image_size: str = "1K") -> List[str]:
         """Gera capas para um post"""
 
         post_id = post_data.get('id', 0)
@@ -219,47 +290,22 @@ class ImagenCoverGenerator:
         print("="*70)
 
         # Criar prompt
-        prompt = self.create_prompt(post_data)
+        started = time.perf_counter()
+        with span('prompt', post_id=post_id):
+            prompt = self.create_prompt(post_data)
+
+            # Posts com tema próximo: reaproveitar capa aprovada ou diversificar o prompt
+            prompt, reused = apply_plan(self.planner, post_data, prompt, self.output_dir, self.on_result)
+        prompt_seconds = time.perf_counter() - started
+        if reused is not None:
+            return reused
 
         print(f"\n🤖 Prompt (preview):")
         print(prompt[:300] + "..." if len(prompt) > 300 else prompt)
 
         # Gerar imagens
-        return self.generate_images(prompt, post_id, num_images=num_variations)
-
-
-def load_blog_posts_data() -> List[Dict]:
-    """Carrega dados dos posts"""
-    import re
-
-    blog_data_path = Path(__file__).parent.parent / "src" / "data" / "blogPosts.js"
-
-    if not blog_data_path.exists():
-        print(f"✗ Arquivo não encontrado: {blog_data_path}")
-        return []
-
-    posts = []
-    try:
-        with open(blog_data_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-            post_pattern = r'\{[\s\S]*?id:\s*(\d+)[\s\S]*?slug:\s*[\'"]([^\'"]+)[\'"][\s\S]*?title:\s*[\'"]([^\'"]+)[\'"][\s\S]*?excerpt:\s*[\'"]([^\'"]+)[\'"][\s\S]*?category:\s*[\'"]([^\'"]+)[\'"][\s\S]*?\}'
-
-            for match in re.finditer(post_pattern, content):
-                posts.append({
-                    'id': int(match.group(1)),
-                    'slug': match.group(2),
-                    'title': match.group(3),
-                    'excerpt': match.group(4),
-                    'category': match.group(5)
-                })
-
-        print(f"✓ {len(posts)} posts carregados")
-        return posts
-
-    except Exception as e:
-        print(f"✗ Erro ao carregar posts: {str(e)}")
-        return []
+        return self.generate_images(prompt, post_id, num_images=num_variations,
+                                    image_size=image_size, timings={'prompt': prompt_seconds})
 
 
 def main():
@@ -280,23 +326,57 @@ def main():
     parser.add_argument('--aspect-ratio', type=str, default='16:9',
                        choices=['1:1', '3:4', '4:3', '9:16', '16:9'],
                        help='Proporção da imagem')
+    parser.add_argument('--image-size', type=str, default='1K', choices=['1K', '2K'],
+                       help='Resolução (2K apenas Standard e Ultra)')
+    parser.add_argument('--concurrency', type=int, default=1,
+                       help='Requisições simultâneas (limitadas por --max-rss-mb)')
+    parser.add_argument('--rate-per-key', type=float, default=DEFAULT_RATE_PER_MINUTE,
+                       help=f'Imagens/minuto por chave em GOOGLE_GEMINI_API_KEYS (padrão: {DEFAULT_RATE_PER_MINUTE})')
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE_SECONDS,
+                       help=f'Limite por chamada à API em segundos (padrão: {DEFAULT_DEADLINE_SECONDS:.0f})')
+    parser.add_argument('--hedge', action='store_true',
+                       help='Enviar requisição duplicada quando passar do p90/p95 observado')
+    parser.add_argument('--hedge-percentile', type=float, default=0.95, choices=[0.90, 0.95],
+                       help='Percentil de latência que dispara o hedge (padrão: 0.95)')
+    parser.add_argument('--hedge-model', type=str, help='Modelo da requisição duplicada (padrão: o mesmo)')
+    parser.add_argument('--hedge-budget', type=float, default=DEFAULT_BUDGET_RATIO,
+                       help=f'Hedges como fração das chamadas (padrão: {DEFAULT_BUDGET_RATIO})')
+    parser.add_argument('--max-rss-mb', type=int, default=None,
+                       help='Limite de RSS do processo em MB')
+    parser.add_argument('--master-format', choices=MASTER_FORMATS, default=DEFAULT_MASTER_FORMAT,
+                       help='Formato do master: auto (WebP lossless/PNG paleta pelas estatísticas), '
+                            'original (bytes da API) ou fixo')
+    parser.add_argument('--jsonl', action='store_true',
+                       help='Uma linha JSON por imagem gravada no stdout (log vai para o stderr)')
+    add_profile_arguments(parser)
+    parser.add_argument('--similarity', choices=SIMILARITY_MODES, default=DEFAULT_SIMILARITY_MODE,
+                       help='Posts parecidos: plan (só mostra), diversificar prompt, reutilizar capa aprovada ou off')
+    parser.add_argument('--palette', choices=['report', 'enforce', 'off'], default='report',
+                       help='Conformidade com as cores da categoria: relatório, reprovar fora da paleta ou off')
+    parser.add_argument('--crops', action='store_true',
+                       help='Derivar thumb/OG/story/podcast por smart crop (sem novas chamadas)')
 
     args = parser.parse_args()
+    jsonl = open_jsonl(args.jsonl)
+    start_profiling(args.profile, 'imagen', top=args.profile_top)
 
     print("\n" + "="*70)
     print("🏥 SARAIVA VISION - Imagen 4 Cover Generator")
     print("="*70)
 
-    # API Key
-    api_key = os.environ.get('GOOGLE_GEMINI_API_KEY') or os.environ.get('GOOGLE_API_KEY')
-    if not api_key:
+    # API Keys (uma por projeto; a cota de cada uma soma na vazão total)
+    api_keys = load_api_keys()
+    if not api_keys:
         print("\n✗ API key não encontrada!")
         print("export GOOGLE_GEMINI_API_KEY='sua-chave'")
+        print("export GOOGLE_GEMINI_API_KEYS='chave-a,chave-b'  # várias chaves")
         sys.exit(1)
+    api_key = api_keys[0]
 
     # Carregar posts
     print("\n📚 Carregando posts...")
-    posts = load_blog_posts_data()
+    with stage('load'):
+        posts = load_blog_posts_data()
 
     if not posts:
         print("✗ Nenhum post encontrado!")
@@ -325,21 +405,56 @@ def main():
 
     # Inicializar gerador
     print(f"\n🚀 Inicializando Imagen 4: {args.model}")
-    generator = ImagenCoverGenerator(api_key, model=args.model)
+    memory_budget = MemoryBudget(max_rss_mb=args.max_rss_mb)
+    planner = CoverPlanner(args.similarity) if args.similarity != 'off' else None
+    key_pool = ApiKeyPool(api_keys, rate_per_minute=args.rate_per_key)
+    hedger = HedgedCaller(hedge=args.hedge, percentile=args.hedge_percentile,
+                          budget_ratio=args.hedge_budget, deadline=args.deadline,
+                          concurrency=args.concurrency)
+    generator = ImagenCoverGenerator(api_key, model=args.model, memory_budget=memory_budget,
+                                     planner=planner, key_pool=key_pool,
+                                     hedger=hedger, hedge_model=args.hedge_model,
+                                     master_format=args.master_format)
 
     # Gerar capas
     print(f"\n🎨 Gerando capas para {len(selected_posts)} post(s)...")
     total_generated = 0
 
-    for post in selected_posts:
-        files = generator.generate_cover(post, num_variations=args.variations)
-        total_generated += len(files)
+    # Cada imagem chega assim que é gravada (--jsonl repassa na hora)
+    posts_by_id = {post['id']: post for post in selected_posts}
+    gate = PaletteGate(enforce=args.palette == 'enforce') if args.palette != 'off' else None
+
+    def finalize(outputs, filepath, post_id: int) -> bool:
+        """Paleta e recortes do master ainda em staging: promovidos na mesma transação"""
+        with span('postprocess', post_id=post_id):
+            category = posts_by_id[post_id].get('category', 'Prevenção')
+            if gate is not None and not gate.check(outputs, filepath, category):
+                return False
+            if args.crops:
+                derive_crops(filepath, post_id=post_id, outputs=outputs)
+        return True
+
+    generator.finalize = finalize
+    with stage('generate'):
+        for result in stream_covers(generator, selected_posts, args.concurrency,
+                                    num_variations=args.variations, image_size=args.image_size):
+            total_generated += 1
+            write_jsonl(jsonl, result)
+
+    # Paleta e recortes já rodaram em cada master antes da promoção (finalize)
+    if gate is not None:
+        gate.report()
 
     # Resumo
     print("\n" + "="*70)
     print("✅ GERAÇÃO COMPLETA!")
     print(f"📊 Total: {total_generated} imagens")
     print(f"📂 Diretório: {OUTPUT_DIR}")
+    print(f"🧠 {memory_budget.report()}")
+    print(key_pool.report())
+    print(hedger.report())
+    hedger.close()
+    stop_profiling()
     print("="*70 + "\n")
 
 
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Requisições com Hedge e Deadline
+Saraiva Vision - Cauda de latência menor em gerações interativas
+
+Cada chamada tem um deadline rígido contado desde o início da chamada: a
+requisição recebe o instante limite e desconta dele a espera por uma chave do
+pool e o timeout HTTP do SDK (time_left). Com o hedge ligado,
+se a chamada passa do percentil observado (p90/p95) para o modelo, uma
+duplicata é enviada (outra chave do pool e/ou modelo alternativo); vence a
+primeira resposta válida e a outra é descartada. Um orçamento limita hedges a
+uma fração das chamadas. O executor tem duas threads por chamada simultânea
+(primária + hedge), então o tempo até o hedge nunca inclui fila de threads.
+
+Cada requisição mede a própria latência (do seu início, não do início da
+chamada) e a registra no modelo que ela de fato chamou: um hedge vencedor para
+o modelo alternativo não distorce o percentil do principal. Requisições que
+estouram o deadline entram como amostra no deadline (limite inferior da
+latência real), para que lentidão não suma do p90/p95. Latências ficam em
+.cache/blog-assets/latency.json.
+
+Uso:
+    def request(deadline_at, model):
+        with pool.acquire(timeout=time_left(deadline_at)) as key:
+            return key.client.models.generate_images(..., HttpOptions(timeout=int(time_left(deadline_at) * 1000)))
+
+    caller = HedgedCaller(LatencyTracker.load(), hedge=True, percentile=0.95, concurrency=4)
+    response = caller.call('imagen-4.0-generate-001',
+                           primary=lambda deadline_at: request(deadline_at, model),
+                           hedge=lambda deadline_at: request(deadline_at, fallback),
+                           hedge_model=fallback)
+    caller.close()  # grava latências
+"""
+
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from asset_manifest import STATE_DIR
+
+LATENCY_PATH = STATE_DIR / "latency.json"
+
+DEFAULT_DEADLINE_SECONDS = 180.0
+DEFAULT_PERCENTILE = 0.95
+DEFAULT_BUDGET_RATIO = 0.10
+MIN_SAMPLES = 8
+MAX_SAMPLES = 200
+
+# Até haver amostras suficientes: limiar fixo por família de modelo (segundos)
+FALLBACK_HEDGE_AFTER = {
+    'imagen': 25.0,
+    'gemini': 20.0,
+}
+
+T = TypeVar('T')
+
+
+def time_left(deadline_at: float) -> float:
+    """Segundos até deadline_at (time.monotonic); TimeoutError se já passou"""
+    remaining = deadline_at - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("deadline da chamada esgotado")
+    return remaining
+
+
+class LatencyTracker:
+    """Janela das últimas latências bem-sucedidas por modelo"""
+
+    def __init__(self, samples: Optional[Dict[str, List[float]]] = None, path: Path = LATENCY_PATH):
+        self.samples = samples or {}
+        self.path = path
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Path = LATENCY_PATH) -> 'LatencyTracker':
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f), path)
+        except (OSError, ValueError):
+            return cls(path=path)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.tmp')
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.samples, f)
+        tmp_path.replace(self.path)
+
+    def record(self, model: str, seconds: float) -> None:
+        with self._lock:
+            window = self.samples.setdefault(model, [])
+            window.append(round(seconds, 3))
+            del window[:-MAX_SAMPLES]
+
+    def percentile(self, model: str, q: float) -> Optional[float]:
+        with self._lock:
+            window = sorted(self.samples.get(model, []))
+        if len(window) < MIN_SAMPLES:
+            return None
+        index = min(len(window) - 1, int(q * len(window)))
+        return window[index]
+
+
+class HedgedCaller:
+    """Executa chamadas com deadline e, opcionalmente, hedge após o percentil"""
+
+    def __init__(self, tracker: Optional[LatencyTracker] = None, hedge: bool = False,
+                 percentile: float = DEFAULT_PERCENTILE, budget_ratio: float = DEFAULT_BUDGET_RATIO,
+                 deadline: float = DEFAULT_DEADLINE_SECONDS, concurrency: int = 1):
+        """
+        Args:
+            tracker: Latências observadas (p90/p95 por modelo)
+            hedge: Enviar duplicata quando a chamada passa do percentil
+            percentile: 0.90 ou 0.95 (quanto maior, menos hedges)
+            budget_ratio: Hedges permitidos como fração das chamadas (mínimo 1)
+            deadline: Limite total por chamada em segundos (inclui a espera por chave)
+            concurrency: Chamadas simultâneas de quem usa o caller (dimensiona o executor)
+        """
+        self.tracker = tracker or LatencyTracker.load()
+        self.hedge = hedge
+        self.percentile = percentile
+        self.budget_ratio = budget_ratio
+        self.deadline = deadline
+        self.calls = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.deadline_misses = 0
+        self._lock = threading.Lock()
+        # Primária + hedge por chamada simultânea: nenhuma espera na fila do executor
+        self._executor = ThreadPoolExecutor(max_workers=2 * max(1, concurrency), thread_name_prefix='hedge')
+
+    def hedge_after(self, model: str) -> float:
+        observed = self.tracker.percentile(model, self.percentile)
+        if observed is not None:
+            return observed
+        family = 'imagen' if 'imagen' in model else 'gemini'
+        return FALLBACK_HEDGE_AFTER[family]
+
+    def _spend_hedge(self) -> bool:
+        with self._lock:
+            allowed = max(1, int(self.calls * self.budget_ratio))
+            if self.hedges_sent >= allowed:
+                return False
+            self.hedges_sent += 1
+            return True
+
+    def _sample(self, attempt: Dict, seconds: float) -> None:
+        """Uma amostra por requisição (a que termina depois do deadline já foi contada)"""
+        with self._lock:
+            if attempt['recorded']:
+                return
+            attempt['recorded'] = True
+        self.tracker.record(attempt['model'], seconds)
+
+    def _run(self, func: Callable[[float], T], deadline_at: float, attempt: Dict) -> T:
+        """Executa uma requisição medindo a latência dela, no modelo que ela chamou"""
+        attempt['started'] = started = time.monotonic()
+        try:
+            result = func(deadline_at)
+        except Exception as e:
+            # Timeout do pool/SDK: a requisição levaria pelo menos até o deadline
+            if isinstance(e, TimeoutError) or time.monotonic() >= deadline_at:
+                self._sample(attempt, deadline_at - started)
+            raise
+        self._sample(attempt, min(time.monotonic(), deadline_at) - started)
+        return result
+
+    def call(self, model: str, primary: Callable[[float], T],
+             hedge: Optional[Callable[[float], T]] = None, hedge_model: Optional[str] = None) -> T:
+        """
+        Executa primary(deadline_at) respeitando o deadline
+
+        Args:
+            model: Modelo da chamada (chave das latências)
+            primary: Função que faz a requisição; recebe o instante limite (time.monotonic)
+                e tira dele a espera por chave e o timeout HTTP (time_left)
+            hedge: Requisição duplicada (outra chave/modelo); padrão: primary
+            hedge_model: Modelo que `hedge` chama (padrão: model)
+
+        Raises:
+            TimeoutError: Nenhuma resposta dentro do deadline
+            Exception: Erro da última tentativa quando todas falharam
+        """
+        with self._lock:
+            self.calls += 1
+        started = time.monotonic()
+        deadline_at = started + self.deadline
+
+        if not self.hedge:
+            return self._run(primary, deadline_at, {'model': model, 'recorded': False})
+
+        attempts = {}
+        primary_attempt = {'model': model, 'recorded': False}
+        future = self._executor.submit(self._run, primary, deadline_at, primary_attempt)
+        attempts[future] = primary_attempt
+        pending = {future: 'primary'}
+        hedge_at = started + self.hedge_after(model)
+        hedged = False
+        last_error = None
+
+        while pending:
+            now = time.monotonic()
+            if now >= deadline_at:
+                break
+            next_event = deadline_at if hedged else min(hedge_at, deadline_at)
+            done, _ = wait(pending, timeout=max(0.0, next_event - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                label = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if label == 'hedge':
+                    with self._lock:
+                        self.hedges_won += 1
+                # A outra requisição não pode ser interrompida no SDK síncrono:
+                # fica descartada e termina sozinha pelo timeout HTTP
+                for other in pending:
+                    other.cancel()
+                return result
+
+            now = time.monotonic()
+            # Hedge ao passar do percentil, ou já se a primária falhou (vira retentativa)
+            if not hedged and (now >= hedge_at or not pending) and now < deadline_at \
+                    and self._spend_hedge():
+                hedged = True
+                reason = 'falha' if not pending else f"sem resposta após {now - started:.1f}s " \
+                                                     f"(p{int(self.percentile * 100)})"
+                print(f"⏱️  {model}: {reason}, enviando hedge")
+                hedge_attempt = {'model': (hedge_model or model) if hedge else model, 'recorded': False}
+                future = self._executor.submit(self._run, hedge or primary, deadline_at, hedge_attempt)
+                attempts[future] = hedge_attempt
+                pending[future] = 'hedge'
+            elif not pending:
+                break
+
+        if last_error is not None and not pending:
+            raise last_error
+        # Requisições ainda em voo: amostra no deadline agora (o resultado tardio é descartado)
+        for future in pending:
+            attempt = attempts[future]
+            if 'started' in attempt:
+                self._sample(attempt, deadline_at - attempt['started'])
+        with self._lock:
+            self.deadline_misses += 1
+        raise TimeoutError(f"{model}: sem resposta em {self.deadline:.0f}s")
+
+    def report(self) -> str:
+        lines = [f"⏱️  Chamadas: {self.calls}, hedges: {self.hedges_sent} enviados / "
+                 f"{self.hedges_won} venceram, deadlines estourados: {self.deadline_misses}"]
+        for model in sorted(self.tracker.samples):
+            p50 = self.tracker.percentile(model, 0.5)
+            p95 = self.tracker.percentile(model, 0.95)
+            if p50 is not None:
+                lines.append(f"   {model}: p50 {p50:.1f}s, p95 {p95:.1f}s "
+                             f"({len(self.tracker.samples[model])} amostras)")
+        return '\n'.join(lines)
+
+    def close(self) -> None:
+        self.tracker.save()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Manifesto Público de Imagens (incremental)
+Saraiva Vision - public/image-manifest.json sem reescanear public/Blog
+
+Mesmo formato do scripts/generate-image-manifest.js (lido pelo
+src/components/blog/OptimizedImageV2.jsx): manifest[basename] = {original, path, variants, ...}, mais
+stats/issues/generated. Cada entrada também guarda sha256, dimensões e bytes
+do original e de cada variante, e o placeholder BlurHash/LQIP.
+
+record_assets() só anota os arquivos que cada etapa (geração, variantes,
+remoções) gravou em .cache/blog-assets/image-manifest.pending; --pending
+aplica a fila antes do build/deploy, refazendo só as entradas tocadas, com
+custo O(arquivos alterados) e fora do caminho da geração. --rebuild refaz
+tudo a partir do disco (bootstrap ou depois de rodar o script JS).
+
+Uso:
+    python image_manifest.py --pending
+    python image_manifest.py --rebuild
+    python image_manifest.py --files ../public/Blog/capa-catarata.png
+    python image_manifest.py --status
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from PIL import Image
+
+from asset_manifest import (PUBLIC_DIR, BLOG_DIR, IMAGE_MANIFEST_PENDING_PATH, cached_hash,
+                            load_manifest, manifest_lock)
+from cover_placeholders import IMAGE_MANIFEST_PATH, PlaceholderStore
+
+# Mesmas regras do generate-image-manifest.js
+RESPONSIVE_SIZES = (480, 768, 1280, 1920)
+FORMATS = ('avif', 'webp', 'png', 'jpg', 'jpeg')
+_VARIANT_RE = re.compile(r'^(.+)-(480w|768w|1280w|1920w)\.(avif|webp|png|jpe?g)$')
+_TYPO_PATTERNS = (('descolamente', 'descolamento'), ('retina_capa', 'capa_retina'))
+
+
+def _format_key(ext: str) -> str:
+    ext = ext.lower().lstrip('.')
+    return 'jpg' if ext == 'jpeg' else ext
+
+
+def empty_image_manifest() -> Dict:
+    return {'manifest': {}, 'stats': {}, 'issues': [], 'generated': None}
+
+
+def load_image_manifest(path: Path = IMAGE_MANIFEST_PATH) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return empty_image_manifest()
+    data.setdefault('manifest', {})
+    return data
+
+
+def save_image_manifest(data: Dict, path: Path = IMAGE_MANIFEST_PATH) -> None:
+    """Recalcula stats/issues (em memória) e grava de forma atômica"""
+    # Ordem do JS: readdirSync (strcmp) pelo nome do original, então
+    # "x-optimized-1200w.png" vem antes de "x.png" ('-' < '.')
+    entries = dict(sorted(data['manifest'].items(), key=lambda item: item[1]['original']))
+    data['manifest'] = entries
+    data['stats'] = build_stats(entries)
+    data['issues'] = validate_names(entries)
+    data['generated'] = datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def describe_file(path: Path, hash_files: Dict) -> Optional[Dict]:
+    """sha256 (do manifesto de assets quando possível), bytes e dimensões do cabeçalho"""
+    try:
+        with Image.open(path) as image:
+            width, height = image.size
+        return {
+            'sha256': cached_hash(path, hash_files),
+            'bytes': path.stat().st_size,
+            'width': width,
+            'height': height,
+        }
+    except (OSError, ValueError):
+        return None
+
+
+def _original_candidates(directory: Path, basename: str) -> List[Path]:
+    """Originais possíveis de um basename; o JS fica com o primeiro em ordem alfabética"""
+    return sorted((p for p in (directory / f"{basename}.{ext}" for ext in FORMATS) if p.exists()),
+                  key=lambda p: p.name)
+
+
+def _variant_candidates(directory: Path, basename: str) -> List[Path]:
+    return [directory / f"{basename}-{size}w.{ext}" for size in RESPONSIVE_SIZES for ext in FORMATS]
+
+
+class ImageManifestWriter:
+    """Atualiza entradas do manifesto público a partir de arquivos tocados"""
+
+    def __init__(self, data: Optional[Dict] = None, with_placeholders: bool = True):
+        self.data = data if data is not None else load_image_manifest()
+        self.entries = self.data['manifest']
+        self.hash_files = load_manifest()['files']
+        self.placeholders = PlaceholderStore() if with_placeholders else None
+        self.touched: Set[str] = set()
+        self.removed: Set[str] = set()
+
+    def _rebuild_entry(self, directory: Path, basename: str) -> None:
+        """Refaz uma entrada com O(tamanhos x formatos) stats, sem listar o diretório"""
+        originals = _original_candidates(directory, basename)
+        if not originals:
+            if self.entries.pop(basename, None) is not None:
+                self.removed.add(basename)
+            return
+
+        original = originals[0]
+        previous = self.entries.get(basename, {})
+        info = describe_file(original, self.hash_files)
+        entry = {
+            'original': original.name,
+            'path': '/' + original.relative_to(PUBLIC_DIR).as_posix(),
+            'variants': {'avif': [], 'webp': [], 'png': [], 'jpg': []},
+            'files': {},
+        }
+        if info:
+            entry.update(info)
+
+        for variant in _variant_candidates(directory, basename):
+            if not variant.exists():
+                continue
+            size = int(_VARIANT_RE.match(variant.name).group(2)[:-1])
+            fmt = _format_key(variant.suffix)
+            variant_info = describe_file(variant, self.hash_files)
+            if variant_info is None:
+                continue
+            entry['variants'][fmt].append(size)
+            entry['files'][variant.name] = {'format': fmt, 'size': size, **variant_info}
+
+        for sizes in entry['variants'].values():
+            sizes.sort()
+        if previous.get('placeholder') and previous.get('sha256') == entry.get('sha256'):
+            entry['placeholder'] = previous['placeholder']
+        self.entries[basename] = entry
+        self.touched.add(basename)
+
+    def patch(self, paths: Iterable[Path]) -> None:
+        """Entradas afetadas pelos arquivos (originais ou variantes, novos ou removidos)"""
+        affected = set()
+        for raw_path in paths:
+            path = Path(raw_path)
+            if path.parent.resolve() != BLOG_DIR.resolve():
+                continue
+            match = _VARIANT_RE.match(path.name)
+            if match:
+                affected.add(match.group(1))
+            elif _format_key(path.suffix) in FORMATS:
+                affected.add(path.stem)
+
+        for basename in sorted(affected):
+            self._rebuild_entry(BLOG_DIR, basename)
+        self._refresh_placeholders()
+
+    def rebuild(self) -> None:
+        """Varredura completa de public/Blog (entradas inalteradas reaproveitam hashes)"""
+        basenames = set()
+        for name in os.listdir(BLOG_DIR):
+            if _VARIANT_RE.match(name) or name.startswith('.'):
+                continue
+            if _format_key(Path(name).suffix) in FORMATS:
+                basenames.add(Path(name).stem)
+
+        for stale in set(self.entries) - basenames:
+            del self.entries[stale]
+            self.removed.add(stale)
+        for basename in sorted(basenames):
+            self._rebuild_entry(BLOG_DIR, basename)
+        self._refresh_placeholders()
+
+    def _refresh_placeholders(self) -> None:
+        if self.placeholders is None:
+            return
+        pending = {b: PUBLIC_DIR / self.entries[b]['path'].lstrip('/')
+                   for b in self.touched if b in self.entries and 'placeholder' not in self.entries[b]}
+        found = self.placeholders.get_many(pending.values())
+        for basename, source in pending.items():
+            if source in found:
+                self.entries[basename]['placeholder'] = found[source]
+        self.placeholders.save()
+
+    def save(self, path: Path = IMAGE_MANIFEST_PATH) -> None:
+        if self.touched or self.removed:
+            save_image_manifest(self.data, path)
+
+
+def patch_image_manifest(paths: Iterable[str], manifest_path: Path = IMAGE_MANIFEST_PATH) -> int:
+    """
+    Atualiza só as entradas dos arquivos informados (fila de record_assets via apply_pending)
+
+    Não faz nada se o manifesto público ainda não existe: o bootstrap é
+    `python image_manifest.py --rebuild` (ou npm run generate:manifest).
+
+    Returns:
+        Número de entradas atualizadas ou removidas
+    """
+    if not manifest_path.exists():
+        return 0
+    writer = ImageManifestWriter(load_image_manifest(manifest_path))
+    writer.patch(Path(p) for p in paths)
+    writer.save(manifest_path)
+    return len(writer.touched) + len(writer.removed)
+
+
+def _read_pending() -> List[str]:
+    try:
+        with open(IMAGE_MANIFEST_PENDING_PATH, 'r', encoding='utf-8') as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+
+def apply_pending(manifest_path: Path = IMAGE_MANIFEST_PATH) -> int:
+    """
+    Aplica a fila de arquivos anotados por record_assets e a esvazia
+
+    Linhas anexadas durante a aplicação ficam para a próxima vez.
+
+    Returns:
+        Número de entradas atualizadas ou removidas
+    """
+    with manifest_lock():
+        lines = _read_pending()
+    if not lines:
+        return 0
+
+    changed = patch_image_manifest(sorted(set(filter(None, lines))), manifest_path)
+
+    with manifest_lock():
+        remaining = _read_pending()[len(lines):]
+        if remaining:
+            with open(IMAGE_MANIFEST_PENDING_PATH, 'w', encoding='utf-8') as f:
+                f.writelines(f"{line}\n" for line in remaining)
+        else:
+            IMAGE_MANIFEST_PENDING_PATH.unlink(missing_ok=True)
+    return changed
+
+
+def build_stats(entries: Dict) -> Dict:
+    """Mesmas estatísticas do generate-image-manifest.js"""
+    stats = {
+        'totalImages': len(entries),
+        'withAvif': 0,
+        'withWebp': 0,
+        'withoutVariants': 0,
+        'incompleteVariants': [],
+        'warnings': [],
+    }
+    expected = [size for size in RESPONSIVE_SIZES if size <= 1280]
+    for basename, data in entries.items():
+        variants = data['variants']
+        if variants['avif']:
+            stats['withAvif'] += 1
+        if variants['webp']:
+            stats['withWebp'] += 1
+        if not variants['avif'] and not variants['webp']:
+            stats['withoutVariants'] += 1
+            stats['warnings'].append(f"⚠️  {basename}: No AVIF/WebP variants found")
+        for fmt in ('avif', 'webp'):
+            missing = [size for size in expected if size not in variants[fmt]]
+            if variants[fmt] and missing:
+                stats['incompleteVariants'].append({'basename': basename, 'format': fmt, 'missing': missing})
+    return stats
+
+
+def validate_names(entries: Dict) -> List[Dict]:
+    """Mesmos alertas de nome do generate-image-manifest.js"""
+    issues = []
+    for basename, data in entries.items():
+        for wrong, correct in _TYPO_PATTERNS:
+            if wrong in basename:
+                issues.append({'type': 'typo', 'basename': basename,
+                               'suggestion': basename.replace(wrong, correct),
+                               'message': f'Possible typo: "{wrong}" should be "{correct}"'})
+        if ' ' in data['original']:
+            issues.append({'type': 'spaces', 'basename': basename, 'filename': data['original'],
+                           'message': 'Filename contains spaces - may cause URL encoding issues'})
+        if '_' in basename and '-' in basename:
+            issues.append({'type': 'mixed_separators', 'basename': basename,
+                           'message': 'Mixed underscores and hyphens in filename'})
+    return issues
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Manifesto público de imagens (public/image-manifest.json) incremental',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--pending', action='store_true', help='Aplicar os arquivos anotados por record_assets')
+    parser.add_argument('--rebuild', action='store_true', help='Refazer a partir de public/Blog')
+    parser.add_argument('--files', nargs='+', help='Atualizar só as entradas destes arquivos')
+    parser.add_argument('--status', action='store_true', help='Mostrar estatísticas do manifesto')
+
+    args = parser.parse_args()
+
+    if not (args.pending or args.rebuild or args.files or args.status):
+        parser.print_help()
+        sys.exit(1)
+
+    if args.pending:
+        changed = apply_pending()
+        print(f"✓ {IMAGE_MANIFEST_PATH.name}: {changed} entrada(s) da fila aplicadas")
+        if not (args.rebuild or args.files or args.status):
+            return
+
+    writer = ImageManifestWriter()
+    if args.rebuild:
+        writer.rebuild()
+    elif args.files:
+        writer.patch(Path(f) for f in args.files)
+    writer.save()
+
+    if args.rebuild or args.files:
+        print(f"✓ {IMAGE_MANIFEST_PATH.name}: {len(writer.touched)} entrada(s) atualizadas, "
+              f"{len(writer.removed)} removida(s)")
+        if writer.placeholders is not None:
+            print(f"   Placeholders: {writer.placeholders.computed} calculados, "
+                  f"{writer.placeholders.reused} do cache")
+
+    if args.status:
+        stats = build_stats(writer.entries)
+        total = stats['totalImages'] or 1
+        print(f"\n📊 {stats['totalImages']} imagens")
+        print(f"   AVIF: {stats['withAvif']} ({stats['withAvif'] / total:.0%}), "
+              f"WebP: {stats['withWebp']} ({stats['withWebp'] / total:.0%}), "
+              f"sem variantes modernas: {stats['withoutVariants']}")
+        print(f"   Com placeholder: {sum('placeholder' in e for e in writer.entries.values())}")
+        issues = validate_names(writer.entries)
+        if issues:
+            print(f"   🚨 Problemas de nome: {len(issues)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Formato do Master (sem perdas) por Estatística da Imagem
+Saraiva Vision - Masters menores e mais rápidos que PNG optimize=True
+
+PNG com optimize=True testa várias estratégias do zlib: é lento e, para as
+capas fotográficas das APIs, fica em 1.5-3 MB. O formato é escolhido pelas
+estatísticas medidas de cada imagem:
+- png-palette: até 256 cores exatas, ou ilustração chapada cujas 256 cores
+  principais cobrem quase todos os pixels e quantizam com PSNR >= 45 dB
+- webp-lossless: fotos e gradientes (menor e 3-8x mais rápido)
+- png: zlib com nível ajustado, sem optimize (quando a extensão precisa ser .png)
+
+Uso:
+    python master_format.py --benchmark
+    python master_format.py --benchmark ../public/Blog/capa-catarata.png --formats png-optimize webp-lossless
+    python master_format.py --stats ../public/Blog/grafico_monovisao.png
+"""
+
+import sys
+import time
+import random
+import argparse
+from io import BytesIO
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from PIL import Image
+
+from asset_manifest import BLOG_DIR
+from profiling import span
+from staged_writes import atomic_write_bytes
+
+MASTER_FORMATS = ('auto', 'webp-lossless', 'png-palette', 'png', 'png-optimize', 'original')
+DEFAULT_MASTER_FORMAT = 'auto'
+
+# Medidos nas capas do blog: quality/method do WebP lossless são esforço, não perda
+WEBP_LOSSLESS_OPTIONS = {'lossless': True, 'quality': 50, 'method': 4}
+# Nível 6 sem optimize: +0,5% de bytes e 3-6x mais rápido que optimize=True
+PNG_COMPRESS_LEVEL = 6
+
+# Ilustração chapada: cobertura das 256 cores principais e PSNR mínimo da quantização
+FLAT_COVERAGE = 0.995
+FLAT_MIN_PSNR = 45.0
+STATS_SAMPLE_SIDE = 256
+
+EXTENSIONS = {
+    'webp-lossless': '.webp',
+    'png-palette': '.png',
+    'png': '.png',
+    'png-optimize': '.png',
+}
+
+
+def image_stats(image: Image.Image) -> Dict:
+    """
+    Estatísticas que decidem o formato
+
+    colors: cores exatas da imagem inteira (None se > 256)
+    top256_coverage: fração dos pixels da amostra nas 256 cores mais frequentes
+    """
+    alpha = image.mode in ('RGBA', 'LA', 'PA') or (image.mode == 'P' and 'transparency' in image.info)
+    rgb = image if image.mode in ('RGB', 'P', 'L') else image.convert('RGB')
+    exact = rgb.getcolors(256)
+
+    sample = rgb.convert('RGB')
+    sample.thumbnail((STATS_SAMPLE_SIDE, STATS_SAMPLE_SIDE), Image.NEAREST)
+    counts = sample.getcolors(STATS_SAMPLE_SIDE * STATS_SAMPLE_SIDE)
+    frequencies = np.sort(np.array([c for c, _ in counts]))[::-1]
+
+    return {
+        'mode': image.mode,
+        'size': image.size,
+        'alpha': alpha,
+        'colors': len(exact) if exact else None,
+        'sample_colors': len(frequencies),
+        'top256_coverage': float(frequencies[:256].sum() / frequencies.sum()),
+    }
+
+
+def choose_format(stats: Dict, allow_webp: bool = True) -> str:
+    """
+    Formato pelo conteúdo (medido nas capas do blog e em saídas RGB das APIs)
+
+    Imagens já em paleta ficam em PNG paleta: mesmo tamanho do optimize=True em
+    um terço do tempo. Fotos/gradientes vão para WebP lossless: 20-40% menores
+    e ~4x mais rápidas. Sem WebP (extensão fixa .png) cai para png.
+    """
+    if not stats['alpha'] and stats['colors'] is not None:
+        return 'png-palette'
+    if not stats['alpha'] and stats['top256_coverage'] >= FLAT_COVERAGE:
+        return 'png-palette'  # confirmado pelo PSNR em encode_master
+    return 'webp-lossless' if allow_webp else 'png'
+
+
+def psnr(reference: np.ndarray, candidate: np.ndarray) -> float:
+    mse = np.mean((reference.astype(np.float32) - candidate.astype(np.float32)) ** 2)
+    return float('inf') if mse == 0 else float(10 * np.log10(255.0 ** 2 / mse))
+
+
+def exact_palette(image: Image.Image) -> Image.Image:
+    """Imagem P com paleta exata (sem quantização) para até 256 cores"""
+    if image.mode == 'P':
+        return image
+    rgb = np.asarray(image.convert('RGB'), dtype=np.uint32)
+    packed = (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+    colors, indices = np.unique(packed, return_inverse=True)
+    palette = np.stack([(colors >> 16) & 255, (colors >> 8) & 255, colors & 255], axis=1).astype(np.uint8)
+    result = Image.fromarray(indices.reshape(packed.shape).astype(np.uint8), 'P')
+    result.putpalette(palette.tobytes())
+    return result
+
+
+def quantized_palette(image: Image.Image) -> Tuple[Optional[Image.Image], float]:
+    """Quantização a 256 cores sem dithering; None se o PSNR ficar abaixo do mínimo"""
+    rgb = image.convert('RGB')
+    quantized = rgb.quantize(colors=256, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+    score = psnr(np.asarray(rgb), np.asarray(quantized.convert('RGB')))
+    return (quantized if score >= FLAT_MIN_PSNR else None), score
+
+
+def encode_master(image: Image.Image, fmt: str = DEFAULT_MASTER_FORMAT,
+                  allow_webp: bool = True) -> Tuple[bytes, str, Dict]:
+    """
+    Codifica o master no formato pedido (ou escolhido pelas estatísticas)
+
+    Returns:
+        (bytes, formato efetivo, estatísticas)
+    """
+    stats = image_stats(image) if fmt in ('auto', 'png-palette') else {}
+    if fmt == 'auto':
+        fmt = choose_format(stats, allow_webp)
+
+    if fmt == 'png-palette' and stats['alpha'] and image.mode != 'P':
+        # Paleta RGB descartaria o canal alfa: formato sem perdas que o preserva
+        fmt = 'webp-lossless' if allow_webp else 'png'
+
+    buffer = BytesIO()
+    if fmt == 'png-palette':
+        if stats.get('colors') is not None:
+            palette = exact_palette(image)
+        else:
+            palette, stats['psnr'] = quantized_palette(image)
+        if palette is None:
+            # Quantização visível: volta para o formato sem perdas
+            fmt = 'webp-lossless' if allow_webp else 'png'
+        else:
+            palette.save(buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+
+    if fmt == 'webp-lossless':
+        image.save(buffer, format='WEBP', **WEBP_LOSSLESS_OPTIONS)
+    elif fmt == 'png':
+        image.save(buffer, format='PNG', compress_level=PNG_COMPRESS_LEVEL)
+    elif fmt == 'png-optimize':
+        image.save(buffer, format='PNG', optimize=True)
+
+    return buffer.getvalue(), fmt, stats
+
+
+def save_master(source: Union[bytes, Image.Image], filepath: Union[str, Path],
+                fmt: str = DEFAULT_MASTER_FORMAT, allow_webp: bool = True,
+                outputs=None) -> Tuple[Path, int, Tuple[int, int]]:
+    """
+    Grava o master e retorna (caminho final, bytes, dimensões)
+
+    A extensão de filepath é trocada pela do formato efetivo. Com 'original',
+    bytes vindos da API vão direto para o disco, sem decodificar. Com outputs
+    (StagedOutputs), o arquivo fica em staging até o commit do conjunto; sem
+    ele, é promovido na hora com rename atômico.
+    """
+    filepath = Path(filepath)
+    if fmt == 'original' and isinstance(source, bytes):
+        data = source
+        with Image.open(BytesIO(data)) as image:
+            size = image.size
+    else:
+        with span('decode', bytes=len(source) if isinstance(source, bytes) else 0):
+            image = source if isinstance(source, Image.Image) else Image.open(BytesIO(source))
+            image.load()
+        size = image.size
+        with span('encode', format=fmt):
+            data, effective, _ = encode_master(image, 'png' if fmt == 'original' else fmt, allow_webp)
+        filepath = filepath.with_suffix(EXTENSIONS[effective])
+
+    with span('write', file=filepath.name, bytes=len(data)):
+        if outputs is not None:
+            outputs.write_bytes(filepath, data)
+        else:
+            atomic_write_bytes(filepath, data)
+    return filepath, len(data), size
+
+
+def benchmark(paths: List[Path], formats: List[str]) -> Dict[str, Dict]:
+    """Tempo de codificação e bytes por formato (mesma imagem decodificada)"""
+    totals = {fmt: {'seconds': 0.0, 'bytes': 0} for fmt in formats}
+    for path in paths:
+        with Image.open(path) as image:
+            image.load()
+            stats = image_stats(image)
+            print(f"\n🖼️  {path.name} {image.size[0]}x{image.size[1]} {image.mode}, "
+                  f"{'≤256' if stats['colors'] else '>256'} cores, "
+                  f"top-256 {stats['top256_coverage']:.1%} → auto: {choose_format(stats)}")
+            for fmt in formats:
+                started = time.perf_counter()
+                data, effective, _ = encode_master(image, fmt)
+                elapsed = time.perf_counter() - started
+                totals[fmt]['seconds'] += elapsed
+                totals[fmt]['bytes'] += len(data)
+                label = f"{fmt} ({effective})" if fmt == 'auto' else fmt
+                print(f"   {label:28s} {elapsed * 1000:8.0f} ms {len(data):>11,d} bytes")
+    return totals
+
+
+def default_benchmark_files(count: int = 8) -> List[Path]:
+    """Amostra fixa de masters válidos do public/Blog (palette e RGB)"""
+    valid = []
+    for path in sorted(BLOG_DIR.glob('*.png')):
+        try:
+            with Image.open(path) as image:
+                image.verify()
+            valid.append(path)
+        except (OSError, ValueError, SyntaxError):
+            continue
+    random.Random(0).shuffle(valid)
+    return sorted(valid[:count])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Escolha e benchmark do formato sem perdas dos masters',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('files', nargs='*', help='Imagens (padrão: amostra de public/Blog)')
+    parser.add_argument('--benchmark', action='store_true', help='Comparar formatos com o PNG optimize=True')
+    parser.add_argument('--stats', action='store_true', help='Mostrar estatísticas e o formato escolhido')
+    parser.add_argument('--formats', nargs='+', default=['png-optimize', 'png', 'webp-lossless', 'auto'],
+                        choices=[f for f in MASTER_FORMATS if f != 'original'], help='Formatos comparados')
+    parser.add_argument('--count', type=int, default=8, help='Tamanho da amostra padrão')
+
+    args = parser.parse_args()
+
+    paths = [Path(f) for f in args.files] or default_benchmark_files(args.count)
+    if not paths:
+        print("✗ Nenhuma imagem encontrada")
+        sys.exit(1)
+
+    if args.stats:
+        for path in paths:
+            with Image.open(path) as image:
+                stats = image_stats(image)
+            print(f"{path.name}: {stats} → {choose_format(stats)}")
+
+    if args.benchmark:
+        totals = benchmark(paths, args.formats)
+        baseline = totals.get('png-optimize')
+        print("\n" + "="*70)
+        print(f"📊 Total ({len(paths)} imagens)")
+        for fmt, total in totals.items():
+            relative = ''
+            if baseline and fmt != 'png-optimize' and baseline['bytes']:
+                relative = (f"  ({total['bytes'] / baseline['bytes']:.0%} dos bytes, "
+                            f"{baseline['seconds'] / max(total['seconds'], 1e-9):.1f}x mais rápido)")
+            print(f"   {fmt:14s} {total['seconds']:7.2f} s {total['bytes']:>12,d} bytes{relative}")
+        print("="*70)
+
+    if not (args.stats or args.benchmark):
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Orçamento de Memória para Respostas de Geração
+Saraiva Vision - RSS medido e limitado durante gerações concorrentes
+
+Respostas do Imagen com 4 imagens 2K chegam a dezenas de MB (base64 + bytes
+decodificados). O MemoryBudget reserva uma estimativa por requisição e só
+libera novas chamadas quando RSS atual + reservas cabem no limite, permitindo
+várias requisições concorrentes em uma VM pequena sem swap.
+
+Uso:
+    budget = MemoryBudget(max_rss_mb=768)
+    with budget.reserve(estimate_response_mb(4, "2K")):
+        response = client.models.generate_images(...)
+"""
+
+import os
+import gc
+import resource
+import threading
+from contextlib import contextmanager
+from io import BytesIO
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+from PIL import Image
+
+# Estimativa por imagem (MB): PNG comprimido + cópia base64 (~1.33x) no JSON
+# da resposta + objetos do SDK. Valores conservadores medidos em respostas reais.
+IMAGE_RESPONSE_MB = {
+    '1K': 6,
+    '2K': 24,
+}
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb() -> float:
+    """RSS atual do processo em MB (via /proc; cai para o pico se indisponível)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    """Pico de RSS do processo em MB (ru_maxrss é KB no Linux, bytes no macOS)"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if os.uname().sysname == 'Darwin':
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def estimate_response_mb(num_images: int, image_size: str = '1K') -> int:
+    """Estimativa de memória de uma resposta com num_images imagens"""
+    return num_images * IMAGE_RESPONSE_MB.get(image_size, IMAGE_RESPONSE_MB['2K'])
+
+
+def write_image_bytes(data: bytes, filepath: Union[str, Path], outputs=None) -> int:
+    """Grava bytes já codificados (sem decodificar com PIL) via staging + rename atômico"""
+    if outputs is not None:
+        outputs.write_bytes(filepath, data)
+        return len(data)
+    from staged_writes import atomic_write_bytes
+    return atomic_write_bytes(filepath, data)
+
+
+def save_inline_image(inline_data, filepath: Union[str, Path],
+                      master_format: str = 'original', outputs=None) -> Tuple[Path, int, Tuple[int, int]]:
+    """
+    Grava um inline_data de imagem e retorna (caminho final, bytes, dimensões)
+
+    Com 'original', PNG é gravado sem decodificar e outros formatos passam por
+    PIL uma única vez. Outros formatos de master (master_format.py) decodificam
+    uma vez e podem trocar a extensão do arquivo (ex.: .webp). Com outputs
+    (StagedOutputs), o arquivo só aparece no destino no commit do conjunto.
+    """
+    if master_format == 'original' and inline_data.mime_type == 'image/png':
+        from profiling import span
+        with span('write', file=Path(filepath).name, bytes=len(inline_data.data)):
+            file_size = write_image_bytes(inline_data.data, filepath, outputs)
+        with Image.open(BytesIO(inline_data.data)) as image:
+            return Path(filepath), file_size, image.size
+
+    from master_format import save_master
+    return save_master(inline_data.data, filepath, master_format, outputs=outputs)
+
+
+class MemoryBudget:
+    """Limita requisições concorrentes pelo RSS medido + reservas pendentes"""
+
+    def __init__(self, max_rss_mb: Optional[float] = None):
+        """
+        Args:
+            max_rss_mb: Limite de RSS do processo (None = sem limite, só medição)
+        """
+        self.max_rss_mb = max_rss_mb
+        self.reserved_mb = 0.0
+        self.peak_mb = current_rss_mb()
+        self._condition = threading.Condition()
+
+    def _fits(self, estimate_mb: float) -> bool:
+        if self.max_rss_mb is None:
+            return True
+        # Reserva única maior que o limite passa sozinha (senão travaria para sempre)
+        if self.reserved_mb == 0:
+            return True
+        return current_rss_mb() + self.reserved_mb + estimate_mb <= self.max_rss_mb
+
+    def sample(self) -> float:
+        """Mede o RSS atual e atualiza o pico observado"""
+        rss = current_rss_mb()
+        self.peak_mb = max(self.peak_mb, rss)
+        return rss
+
+    @contextmanager
+    def reserve(self, estimate_mb: float):
+        """Bloqueia até haver espaço para estimate_mb e libera ao sair"""
+        with self._condition:
+            while not self._fits(estimate_mb):
+                self._condition.wait(timeout=1.0)
+            self.reserved_mb += estimate_mb
+        try:
+            yield
+        finally:
+            self.sample()
+            # Devolver ao alocador as páginas da resposta antes de liberar a vaga
+            gc.collect()
+            with self._condition:
+                self.reserved_mb -= estimate_mb
+                self._condition.notify_all()
+
+    def report(self) -> str:
+        limit = f"{self.max_rss_mb:.0f} MB" if self.max_rss_mb else "sem limite"
+        return f"RSS pico: {max(self.peak_mb, peak_rss_mb()):.0f} MB (limite: {limit})"
@@ -0,0 +1,465 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks dos Caminhos Quentes dos Scripts de Capa
+Saraiva Vision - Medir antes e depois de otimizar, com limite de regressão
+
+Cobre o que roda em toda execução dos geradores:
+- posts.*: load_blog_posts_data no blogPosts.js real (~356 KB) e em um
+  arquivo sintético de 10k posts (fixture gerada uma vez)
+- prompt.*: create_prompt do Imagen, Flash e Gemini para todos os posts,
+  passando por todas as categorias
+- decode.* / save.*: decodificação da resposta e gravação do master
+  (original, auto, png) em 1K e 2K, com imagens sintéticas determinísticas
+- podcast.gradient: fundo em degradê de create-olho-seco-cover.py
+
+Cada benchmark calibra o número de loops para amostras de ~50 ms e reporta a
+mediana de N repetições. A última execução e as fixtures ficam em
+.cache/blog-assets/benchmarks/; a baseline fica versionada em
+scripts/benchmarks/baseline.json, para que a referência mude junto (e seja
+revisada) com o código que a mudou. --save-baseline grava a referência e
+--compare falha (exit 1) quando a mediana de algum caminho piora além do
+limite (padrão 15%, ou o limite próprio do benchmark), ou quando um
+benchmark com baseline quebra ou deixa de existir.
+
+Uso:
+    python microbench.py --list
+    python microbench.py --save-baseline
+    python microbench.py --compare
+    python microbench.py --compare --only save. --threshold 10
+"""
+
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import statistics
+import importlib.util
+from contextlib import redirect_stdout
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from PIL import Image, ImageFilter
+
+from asset_manifest import STATE_DIR
+
+BENCH_DIR = STATE_DIR / "benchmarks"
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+BASELINE_PATH = Path(__file__).parent / "benchmarks" / "baseline.json"
+LAST_RUN_PATH = BENCH_DIR / "last-run.json"
+
+DEFAULT_REPEAT = 7
+DEFAULT_THRESHOLD = 15.0  # %
+MIN_SAMPLE_SECONDS = 0.05
+SYNTHETIC_POSTS = 10_000
+SYNTHETIC_CONTENT_CHARS = 2000
+RESULTS_VERSION = 1
+
+# Tamanhos das respostas do Imagen (16:9)
+IMAGE_SIZES = {
+    '1k': (1408, 768),
+    '2k': (2816, 1536),
+}
+
+
+class Benchmark:
+    """Caminho medido: setup() devolve a função sem argumentos que é cronometrada"""
+
+    __slots__ = ('name', 'setup', 'repeat', 'threshold', 'description')
+
+    def __init__(self, name: str, setup: Callable[[], Callable[[], object]], description: str,
+                 repeat: int = DEFAULT_REPEAT, threshold: Optional[float] = None):
+        self.name = name
+        self.setup = setup
+        self.description = description
+        self.repeat = repeat
+        self.threshold = threshold
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def benchmark(name: str, description: str, repeat: int = DEFAULT_REPEAT, threshold: Optional[float] = None):
+    def register(setup):
+        BENCHMARKS.append(Benchmark(name, setup, description, repeat, threshold))
+        return setup
+    return register
+
+
+# ============================================================================
+# FIXTURES
+# ============================================================================
+
+def synthetic_posts_path(count: int = SYNTHETIC_POSTS) -> Path:
+    """blogPosts.js sintético com `count` posts derivados dos reais (gerado uma vez)"""
+    from blog_data import load_blog_posts
+    path = FIXTURES_DIR / f"blogPosts-{count}.js"
+    if path.exists():
+        return path
+
+    real = load_blog_posts()
+    rng = random.Random(0)
+    FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write("// Fixture sintética de microbench.py\nexport const blogPosts = [\n")
+        for i in range(count):
+            post = dict(rng.choice(real))
+            post['id'] = i + 1
+            post['slug'] = f"{post.get('slug', 'post')}-{i + 1}"
+            post['content'] = str(post.get('content', ''))[:SYNTHETIC_CONTENT_CHARS]
+            f.write(json.dumps(post, ensure_ascii=False) + ',\n')
+        f.write("];\n")
+    tmp_path.replace(path)
+    return path
+
+
+def cover_like_image(size, seed: int = 0) -> Image.Image:
+    """Imagem determinística com gradientes e textura suave (comprime como uma capa, não como ruído)"""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.stack([
+        120 + 80 * np.sin(x / width * 3.1),
+        140 + 60 * np.cos(y / height * 2.7),
+        180 + 50 * np.sin((x + y) / (width + height) * 4.0),
+    ], axis=-1)
+    noise = Image.fromarray(rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8))
+    texture = np.asarray(noise.resize(size, Image.BICUBIC).filter(ImageFilter.GaussianBlur(2)), dtype=np.float32)
+    return Image.fromarray(np.clip(base * 0.8 + texture * 0.2, 0, 255).astype(np.uint8))
+
+
+def png_bytes(size_name: str) -> bytes:
+    """PNG da API simulado (gravado como fixture para não recodificar a cada execução)"""
+    path = FIXTURES_DIR / f"response-{size_name}.png"
+    if not path.exists():
+        FIXTURES_DIR.mkdir(parents=True, exist_ok=True)
+        cover_like_image(IMAGE_SIZES[size_name]).save(path, format='PNG')
+    return path.read_bytes()
+
+
+class InlineData:
+    """Equivalente a types.Blob de uma parte de resposta do Gemini"""
+
+    def __init__(self, data: bytes, mime_type: str = 'image/png'):
+        self.data = data
+        self.mime_type = mime_type
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+@benchmark('posts.load_real', 'load_blog_posts_data() no blogPosts.js real (campos resumidos)')
+def _posts_load_real():
+    from blog_data import load_blog_posts_data
+    return load_blog_posts_data
+
+
+@benchmark('posts.load_real_full', 'load_blog_posts_data(full=True) no blogPosts.js real')
+def _posts_load_real_full():
+    from blog_data import load_blog_posts_data
+    return lambda: load_blog_posts_data(full=True)
+
+
+@benchmark('posts.load_synthetic_10k', 'load_blog_posts_data() em 10k posts sintéticos', repeat=3)
+def _posts_load_synthetic():
+    from blog_data import load_blog_posts_data
+    path = synthetic_posts_path()
+    return lambda: load_blog_posts_data(path)
+
+
+def _prompt_posts(categories) -> List[Dict]:
+    """Posts reais com as categorias em rodízio: todas as categorias de estilo são exercitadas"""
+    from blog_data import load_blog_posts_data
+    posts = load_blog_posts_data()
+    categories = list(categories)
+    return [{**post, 'category': categories[i % len(categories)]} for i, post in enumerate(posts)]
+
+
+@benchmark('prompt.imagen', 'ImagenCoverGenerator.create_prompt() para todos os posts/categorias')
+def _prompt_imagen():
+    from generate_covers_imagen import CATEGORY_STYLES_IMAGEN, ImagenCoverGenerator
+    generator = ImagenCoverGenerator('benchmark-key')
+    posts = _prompt_posts(CATEGORY_STYLES_IMAGEN)
+    return lambda: [generator.create_prompt(post) for post in posts]
+
+
+@benchmark('prompt.flash', 'GeminiFlashCoverGenerator.create_prompt() para todos os posts/categorias')
+def _prompt_flash():
+    from generate_covers_gemini_flash import CATEGORY_STYLES_GEMINI, GeminiFlashCoverGenerator
+    generator = GeminiFlashCoverGenerator('benchmark-key')
+    posts = _prompt_posts(CATEGORY_STYLES_GEMINI)
+    return lambda: [generator.create_prompt(post) for post in posts]
+
+
+@benchmark('prompt.gemini', 'BlogCoverGenerator.create_prompt() para todos os posts/categorias')
+def _prompt_gemini():
+    from generate_blog_covers import CATEGORY_STYLES, BlogCoverGenerator
+    generator = BlogCoverGenerator('benchmark-key')
+    posts = _prompt_posts(CATEGORY_STYLES)
+    return lambda: [generator.create_prompt(post) for post in posts]
+
+
+def _decode(size_name: str):
+    data = png_bytes(size_name)
+
+    def run():
+        with Image.open(BytesIO(data)) as image:
+            image.load()
+    return run
+
+
+@benchmark('decode.png_1k', 'Decodificação da resposta PNG 1K (1408x768)')
+def _decode_1k():
+    return _decode('1k')
+
+
+@benchmark('decode.png_2k', 'Decodificação da resposta PNG 2K (2816x1536)')
+def _decode_2k():
+    return _decode('2k')
+
+
+def _save(size_name: str, fmt: str):
+    from master_format import save_master
+    data = png_bytes(size_name)
+    output_dir = FIXTURES_DIR / "out"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return lambda: save_master(data, output_dir / f"save-{size_name}-{fmt}.png", fmt)
+
+
+@benchmark('save.original_1k', "save_master('original') 1K: bytes da API direto para o disco")
+def _save_original_1k():
+    return _save('1k', 'original')
+
+
+@benchmark('save.auto_1k', "save_master('auto') 1K: estatísticas + formato escolhido", threshold=20.0)
+def _save_auto_1k():
+    return _save('1k', 'auto')
+
+
+@benchmark('save.auto_2k', "save_master('auto') 2K", repeat=5, threshold=20.0)
+def _save_auto_2k():
+    return _save('2k', 'auto')
+
+
+@benchmark('save.png_2k', "save_master('png') 2K: decodificação + PNG nível 6", repeat=5)
+def _save_png_2k():
+    return _save('2k', 'png')
+
+
+@benchmark('save.inline_png_1k', 'save_inline_image() de uma parte PNG do Gemini (1K)')
+def _save_inline_1k():
+    from memory_budget import save_inline_image
+    inline = InlineData(png_bytes('1k'))
+    output_dir = FIXTURES_DIR / "out"
+    output_dir.mkdir(parents=True, exist_ok=True)
+    return lambda: save_inline_image(inline, output_dir / "inline-1k.png")
+
+
+@benchmark('podcast.gradient', 'render_gradient(512, 512) de create-olho-seco-cover.py')
+def _podcast_gradient():
+    spec = importlib.util.spec_from_file_location('create_olho_seco_cover',
+                                                  Path(__file__).parent / 'create-olho-seco-cover.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return lambda: module.render_gradient(512, 512)
+
+
+# ============================================================================
+# EXECUÇÃO E COMPARAÇÃO
+# ============================================================================
+
+def calibrate(func: Callable[[], object]) -> int:
+    """Loops por amostra para ~MIN_SAMPLE_SECONDS (como timeit.autorange)"""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - started >= MIN_SAMPLE_SECONDS:
+            return loops
+        loops *= 2
+
+
+def run_benchmark(bench: Benchmark, repeat: Optional[int] = None) -> Dict:
+    # Logs das funções medidas (ex.: "✓ 30 posts carregados") descartados
+    with redirect_stdout(io.StringIO()):
+        func = bench.setup()
+        func()  # aquecimento: imports, caches e fixtures fora da medição
+        loops = calibrate(func)
+        samples = []
+        for _ in range(repeat or bench.repeat):
+            started = time.perf_counter()
+            for _ in range(loops):
+                func()
+            samples.append((time.perf_counter() - started) / loops)
+    return {
+        'median': statistics.median(samples),
+        'min': min(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'loops': loops,
+        'repeat': len(samples),
+    }
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds >= 1:
+        return f"{seconds:7.2f} s "
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:7.2f} ms"
+    return f"{seconds * 1e6:7.1f} µs"
+
+
+def environment() -> Dict:
+    return {'python': platform.python_version(), 'machine': platform.machine(),
+            'node': platform.node(), 'processor': platform.processor()}
+
+
+def run_all(selected: List[Benchmark], repeat: Optional[int] = None) -> Dict:
+    """Executa os benchmarks; os que quebram ficam em 'errors' (nunca somem em silêncio)"""
+    results = {}
+    errors = {}
+    for bench in selected:
+        try:
+            result = run_benchmark(bench, repeat)
+        except Exception as e:
+            errors[bench.name] = f"{type(e).__name__}: {e}"
+            print(f"⏱️  {bench.name:26s} ✗ {errors[bench.name]}")
+            continue
+        spread = result['stdev'] / result['median'] if result['median'] else 0.0
+        print(f"⏱️  {bench.name:26s} {format_seconds(result['median'])}  (mín {format_seconds(result['min']).strip()}, "
+              f"±{spread:.0%}, {result['loops']}x{result['repeat']})")
+        results[bench.name] = result
+    return {'version': RESULTS_VERSION, 'created': datetime.now().isoformat(timespec='seconds'),
+            'environment': environment(), 'benchmarks': results, 'errors': errors}
+
+
+def compare(current: Dict, baseline: Dict, threshold: float, selected: List[str]) -> List[str]:
+    """
+    Imprime a comparação e retorna os benchmarks que regrediram além do limite
+
+    Um benchmark selecionado que tem baseline mas quebrou nesta execução (ou
+    foi removido/renomeado) também conta como regressão: sem medida, não há
+    como provar que não piorou.
+    """
+    thresholds = {b.name: b.threshold for b in BENCHMARKS}
+    if baseline.get('environment') != current['environment']:
+        print(f"⚠️  Baseline de outro ambiente ({baseline.get('environment')}): compare com cautela")
+
+    regressions = []
+    print("\n" + "="*70)
+    print(f"📊 Comparação com a baseline de {baseline.get('created', '?')}")
+    print("="*70)
+    for name, result in current['benchmarks'].items():
+        reference = baseline['benchmarks'].get(name)
+        if reference is None:
+            print(f"  {name:26s} {format_seconds(result['median'])}  (sem baseline)")
+            continue
+        change = (result['median'] / reference['median'] - 1) * 100
+        limit = thresholds.get(name) or threshold
+        if change > limit:
+            mark = f"✗ regressão (limite +{limit:.0f}%)"
+            regressions.append(name)
+        elif change < -limit:
+            mark = "🚀 mais rápido"
+        else:
+            mark = "✓"
+        print(f"  {name:26s} {format_seconds(reference['median'])} → {format_seconds(result['median'])} "
+              f"{change:+6.1f}%  {mark}")
+    errors = current.get('errors', {})
+    for name, error in errors.items():
+        if name in baseline['benchmarks']:
+            regressions.append(name)
+        print(f"  {name:26s} ✗ quebrou: {error[:60]}")
+    known = {b.name for b in BENCHMARKS}
+    for name in baseline['benchmarks']:
+        missing = name not in current['benchmarks'] and name not in errors
+        if missing and name not in known:
+            # Removido ou renomeado: a baseline precisa ser atualizada junto
+            print(f"  {name:26s} ✗ na baseline mas não existe mais (regrave com --save-baseline)")
+            regressions.append(name)
+        elif missing and name in selected:
+            print(f"  {name:26s} ✗ sem resultado nesta execução")
+            regressions.append(name)
+    print("="*70)
+    return regressions
+
+
+def write_results(results: Dict, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Microbenchmarks dos caminhos quentes com baseline e limite de regressão',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--list', action='store_true', help='Listar os benchmarks')
+    parser.add_argument('--only', nargs='+', help='Prefixos/nomes a executar (ex.: save. posts.load_real)')
+    parser.add_argument('--repeat', type=int, help='Repetições por benchmark (padrão: o de cada um)')
+    parser.add_argument('--save-baseline', action='store_true', help='Gravar o resultado como baseline')
+    parser.add_argument('--compare', action='store_true', help='Comparar com a baseline (exit 1 se regredir)')
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH, help='Arquivo da baseline')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Piora máxima da mediana em %% (benchmarks com limite próprio o mantêm)')
+
+    args = parser.parse_args()
+
+    selected = [b for b in BENCHMARKS if not args.only or any(b.name.startswith(p) for p in args.only)]
+    if args.list:
+        for bench in selected:
+            limit = f" (limite {bench.threshold:.0f}%)" if bench.threshold else ''
+            print(f"{bench.name:26s} {bench.description}{limit}")
+        return
+    if not selected:
+        print(f"✗ Nenhum benchmark corresponde a {args.only}")
+        sys.exit(1)
+
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError):
+            print(f"✗ Baseline não encontrada em {args.baseline} (use --save-baseline)")
+            sys.exit(1)
+
+    print(f"\n🏁 {len(selected)} benchmark(s) | Python {platform.python_version()} | {platform.machine()}\n")
+    results = run_all(selected, args.repeat)
+    write_results(results, LAST_RUN_PATH)
+
+    if args.save_baseline and results['errors']:
+        # Gravar sem os que quebraram apagaria a referência deles em silêncio
+        print(f"\n✗ Baseline não gravada: {len(results['errors'])} benchmark(s) quebraram "
+              f"({', '.join(results['errors'])})")
+        sys.exit(1)
+    if args.save_baseline:
+        if args.only and args.baseline.exists():
+            # Baseline parcial: atualizar só os benchmarks executados
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                merged = json.load(f)
+            merged['benchmarks'].update(results['benchmarks'])
+            merged.update({'created': results['created'], 'environment': results['environment']})
+            results = merged
+        write_results({key: value for key, value in results.items() if key != 'errors'}, args.baseline)
+        print(f"\n💾 Baseline gravada em {args.baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold, [b.name for b in selected])
+        if regressions:
+            print(f"✗ {len(regressions)} regressão(ões): {', '.join(regressions)}")
+            sys.exit(1)
+        print("✅ Nenhuma regressão além do limite")
+
+
+if __name__ == "__main__":
+    main()
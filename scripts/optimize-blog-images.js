@@ -14,6 +14,8 @@ const __dirname = path.dirname(__filename);
 
 const BLOG_DIR = path.join(__dirname, '../public/Blog');
 const SUPPORTED_FORMATS = ['.png', '.jpg', '.jpeg', '.tiff'];
+// Masters WebP lossless (scripts/master_format.py): só quando não há outro original com o mesmo nome
+const DERIVED_NAME = /-(\d+w|optimized.*)\.[a-z]+$/i;
 const QUALITY = {
   webp: 85,
   avif: 75,
@@ -29,12 +31,36 @@ const SIZES = [
 
 async function getImageFiles() {
   const files = await fs.readdir(BLOG_DIR);
+  const sourceBasenames = new Set(
+    files
+      .filter(file => SUPPORTED_FORMATS.includes(path.extname(file).toLowerCase()))
+      .map(file => path.basename(file, path.extname(file)))
+  );
   return files.filter(file => {
     const ext = path.extname(file).toLowerCase();
-    return SUPPORTED_FORMATS.includes(ext);
+    if (SUPPORTED_FORMATS.includes(ext)) return true;
+    return ext === '.webp' && !DERIVED_NAME.test(file) && !sourceBasenames.has(path.basename(file, ext));
   });
 }
 
+// Grava em arquivo oculto no mesmo diretório, fsync e rename: o nginx nunca serve variante pela metade
+async function toFileAtomic(pipeline, filePath) {
+  const tmpPath = path.join(path.dirname(filePath), `.${path.basename(filePath)}.${process.pid}.tmp`);
+  try {
+    await pipeline.toFile(tmpPath);
+    const handle = await fs.open(tmpPath, 'r');
+    try {
+      await handle.sync();
+    } finally {
+      await handle.close();
+    }
+    await fs.rename(tmpPath, filePath);
+  } catch (error) {
+    await fs.rm(tmpPath, { force: true });
+    throw error;
+  }
+}
+
 async function getFileSize(filePath) {
   const stats = await fs.stat(filePath);
   return (stats.size / 1024 / 1024).toFixed(2); // MB
@@ -63,43 +89,53 @@ async function optimizeImage(filename) {
 
       // WebP
       const webpPath = path.join(BLOG_DIR, `${basename}${size.suffix}.webp`);
-      await image
-        .clone()
-        .resize(size.width, null, { withoutEnlargement: true })
-        .webp({ quality: QUALITY.webp, effort: 6 })
-        .toFile(webpPath);
+      await toFileAtomic(
+        image
+          .clone()
+          .resize(size.width, null, { withoutEnlargement: true })
+          .webp({ quality: QUALITY.webp, effort: 6 }),
+        webpPath
+      );
 
       const webpSize = await getFileSize(webpPath);
       outputFiles.push({ path: webpPath, size: webpSize, format: 'webp', width: size.width });
 
       // AVIF (smaller but slower)
       const avifPath = path.join(BLOG_DIR, `${basename}${size.suffix}.avif`);
-      await image
-        .clone()
-        .resize(size.width, null, { withoutEnlargement: true })
-        .avif({ quality: QUALITY.avif, effort: 6 })
-        .toFile(avifPath);
+      await toFileAtomic(
+        image
+          .clone()
+          .resize(size.width, null, { withoutEnlargement: true })
+          .avif({ quality: QUALITY.avif, effort: 6 }),
+        avifPath
+      );
 
       const avifSize = await getFileSize(avifPath);
       outputFiles.push({ path: avifPath, size: avifSize, format: 'avif', width: size.width });
     }
 
-    // Optimize original to WebP at original size
-    const webpOriginalPath = path.join(BLOG_DIR, `${basename}.webp`);
-    await image
-      .clone()
-      .webp({ quality: QUALITY.webp, effort: 6 })
-      .toFile(webpOriginalPath);
-
-    const webpOriginalSize = await getFileSize(webpOriginalPath);
-    outputFiles.push({ path: webpOriginalPath, size: webpOriginalSize, format: 'webp', width: metadata.width });
+    // Optimize original to WebP at original size (master WebP lossless não é sobrescrito)
+    if (ext.toLowerCase() !== '.webp') {
+      const webpOriginalPath = path.join(BLOG_DIR, `${basename}.webp`);
+      await toFileAtomic(
+        image
+          .clone()
+          .webp({ quality: QUALITY.webp, effort: 6 }),
+        webpOriginalPath
+      );
+
+      const webpOriginalSize = await getFileSize(webpOriginalPath);
+      outputFiles.push({ path: webpOriginalPath, size: webpOriginalSize, format: 'webp', width: metadata.width });
+    }
 
     // AVIF original
     const avifOriginalPath = path.join(BLOG_DIR, `${basename}.avif`);
-    await image
-      .clone()
-      .avif({ quality: QUALITY.avif, effort: 6 })
-      .toFile(avifOriginalPath);
+    await toFileAtomic(
+      image
+        .clone()
+        .avif({ quality: QUALITY.avif, effort: 6 }),
+      avifOriginalPath
+    );
 
     const avifOriginalSize = await getFileSize(avifOriginalPath);
     outputFiles.push({ path: avifOriginalPath, size: avifOriginalSize, format: 'avif', width: metadata.width });
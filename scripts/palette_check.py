@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Conformidade de Paleta das Capas
+Saraiva Vision - Cores da marca por categoria verificadas antes da promoção
+
+Reduz cada capa para 96x54, converte para CIELAB e roda um k-means vetorizado
+em lote (todas as capas de uma vez, numpy). Pixels neutros (branco, cinza,
+preto) são ignorados; os pixels e clusters cromáticos são comparados com as
+cores de CATEGORY_STYLES mais as cores comuns a todas as capas
+(BRAND_COLORS) pelo ângulo de matiz (LCh), que não depende da iluminação da
+cena. A capa é aceita quando cobertura e distância ficam ambas dentro dos
+limites, e as notas vão para o relatório da execução.
+
+Calibração (2026-10-19, as 26 capas publicadas em blogPosts.js, --posts):
+só com as cores das categorias, 21 das 26 eram reprovadas: as capas aprovadas
+são dominadas por azuis clínicos (matiz LCh 210-270), petróleo/teal
+(150-210) e tons quentes de pele e íris (30-90), qualquer que seja a
+categoria. Com BRAND_COLORS a pior capa aprovada tem cobertura 0.60
+(p10 0.75) e Δmatiz 29° (p95 26°); os limites ficam com folga abaixo/acima
+disso (0.50 e 35°) e as 26 passam. Recalibre com --posts quando o estilo
+das capas mudar.
+
+Nos geradores a verificação roda em cada master ainda em staging (PaletteGate),
+antes de StagedOutputs.commit: com enforce, a reprovada nunca chega a
+public/Blog. Capas já referenciadas pelos posts só entram no relatório.
+
+Uso:
+    python palette_check.py ../public/Blog/capa_post_22_*.png --category "Tecnologia"
+    python palette_check.py --posts
+    python palette_check.py novas/capa_post_22_*.png --category "Tecnologia" --enforce
+"""
+
+import sys
+import json
+import shutil
+import argparse
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+from PIL import Image
+
+from asset_manifest import STATE_DIR, record_assets
+from blog_data import load_blog_posts, find_cover_source
+from pixel_cache import decode
+
+REPORTS_DIR = STATE_DIR / "reports"
+REJECTED_DIR = STATE_DIR / "rejected"
+
+# Cores da marca por categoria (as mesmas citadas nos prompts de CATEGORY_STYLES).
+# Categorias sem estilo próprio nos prompts caem no estilo de Prevenção: a paleta
+# aceita o verde dele além da cor da categoria em categoryConfig (blogPosts.js)
+CATEGORY_PALETTES = {
+    'Prevenção': ['#10B981'],
+    'Tratamento': ['#3B82F6'],
+    'Tratamentos': ['#3B82F6'],
+    'Tecnologia': ['#8B5CF6', '#06B6D4'],
+    'Tecnologia e Inovação': ['#6366F1', '#8B5CF6', '#06B6D4'],
+    'Dúvidas Frequentes': ['#F59E0B', '#FCD34D'],
+    'Mitos e Verdades': ['#EF4444', '#10B981'],
+    'Guias Práticos': ['#14B8A6', '#10B981'],
+}
+DEFAULT_CATEGORY = 'Prevenção'
+
+# Cores presentes nas capas aprovadas de todas as categorias (ver calibração):
+# petróleo da marca (tailwind primary-500), azul clínico e tons quentes de pele/íris
+BRAND_COLORS = ['#1E4D4C', '#0EA5E9', '#C9A27E']
+
+SAMPLE_SIZE = (96, 54)
+CLUSTERS = 6
+ITERATIONS = 12
+NEUTRAL_CHROMA = 12.0      # abaixo disso o pixel é branco/cinza/preto e não conta
+HUE_TOLERANCE = 30.0       # pixel "na paleta" se a matiz está a até 30° de uma cor da marca
+MIN_COVERAGE = 0.50        # fração mínima dos pixels cromáticos na paleta (pior aprovada: 0.60)
+MAX_DISTANCE = 35.0        # diferença média de matiz (graus) máxima dos clusters (pior aprovada: 29°)
+
+
+def hex_to_rgb(value: str) -> np.ndarray:
+    value = value.lstrip('#')
+    return np.array([int(value[i:i + 2], 16) for i in (0, 2, 4)], dtype=np.float32)
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB (0-255, última dimensão = 3) para CIELAB D65, vetorizado"""
+    srgb = rgb / 255.0
+    linear = np.where(srgb > 0.04045, ((srgb + 0.055) / 1.055) ** 2.4, srgb / 12.92)
+    matrix = np.array([[0.4124, 0.3576, 0.1805],
+                       [0.2126, 0.7152, 0.0722],
+                       [0.0193, 0.1192, 0.9505]], dtype=np.float32)
+    xyz = linear @ matrix.T / np.array([0.95047, 1.0, 1.08883], dtype=np.float32)
+    f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16 / 116)
+    return np.stack([116 * f[..., 1] - 16,
+                     500 * (f[..., 0] - f[..., 1]),
+                     200 * (f[..., 1] - f[..., 2])], axis=-1).astype(np.float32)
+
+
+def hue_degrees(lab: np.ndarray) -> np.ndarray:
+    return np.degrees(np.arctan2(lab[..., 2], lab[..., 1])) % 360
+
+
+def hue_delta(hues: np.ndarray, palette_hues: np.ndarray) -> np.ndarray:
+    """Menor diferença angular (graus) de cada matiz até a paleta"""
+    delta = np.abs(hues[..., None] - palette_hues) % 360
+    return np.minimum(delta, 360 - delta).min(axis=-1)
+
+
+def load_samples(paths: List[str]) -> np.ndarray:
+    """Capas reduzidas empilhadas em (N, pixels, 3) CIELAB"""
+    samples = np.empty((len(paths), SAMPLE_SIZE[0] * SAMPLE_SIZE[1], 3), dtype=np.float32)
+    for i, path in enumerate(paths):
+        image = decode(path).image_at_least(SAMPLE_SIZE[0] * 2, SAMPLE_SIZE[1] * 2)
+        small = image.convert('RGB').resize(SAMPLE_SIZE, Image.BILINEAR)
+        samples[i] = np.asarray(small, dtype=np.float32).reshape(-1, 3)
+    return rgb_to_lab(samples)
+
+
+def batch_kmeans(points: np.ndarray, weights: np.ndarray, k: int = CLUSTERS,
+                 iterations: int = ITERATIONS) -> tuple:
+    """
+    K-means ponderado em lote: points (N, P, 3), weights (N, P)
+
+    Inicialização determinística por farthest-point, todas as imagens a cada passo.
+
+    Returns:
+        (centros (N, k, 3), peso de cada cluster (N, k))
+    """
+    n, p, _ = points.shape
+    batch = np.arange(n)
+
+    # Farthest-point: começa pelo pixel de maior peso (cromático), depois o mais distante
+    centers = np.empty((n, k, 3), dtype=np.float32)
+    centers[:, 0] = points[batch, np.argmax(weights, axis=1)]
+    nearest = np.full((n, p), np.inf, dtype=np.float32)
+    for c in range(1, k):
+        dist = ((points - centers[:, c - 1:c]) ** 2).sum(axis=2)
+        nearest = np.minimum(nearest, dist)
+        centers[:, c] = points[batch, np.argmax(nearest * (weights > 0), axis=1)]
+
+    for _ in range(iterations):
+        dist = ((points[:, :, None, :] - centers[:, None, :, :]) ** 2).sum(axis=3)
+        labels = np.argmin(dist, axis=2)
+        onehot = (labels[..., None] == np.arange(k)) * weights[..., None]  # (N, P, k)
+        mass = onehot.sum(axis=1)
+        sums = np.einsum('npk,npc->nkc', onehot, points)
+        centers = np.where(mass[..., None] > 0, sums / np.maximum(mass, 1e-6)[..., None], centers)
+
+    return centers, mass / np.maximum(mass.sum(axis=1, keepdims=True), 1e-6)
+
+
+def score_covers(paths: List[str], categories: List[str]) -> List[Dict]:
+    """
+    Notas de paleta de um lote de capas
+
+    Returns:
+        [{'file', 'category', 'chromatic', 'coverage', 'distance', 'dominant_lab', 'accepted'}]
+    """
+    if not paths:
+        return []
+
+    lab = load_samples(paths)
+    chroma = np.hypot(lab[..., 1], lab[..., 2])
+    weights = (chroma >= NEUTRAL_CHROMA).astype(np.float32)
+    centers, cluster_weight = batch_kmeans(lab, weights)
+
+    hues = hue_degrees(lab)
+    center_hues = hue_degrees(centers)
+    center_chromatic = np.hypot(centers[..., 1], centers[..., 2]) >= NEUTRAL_CHROMA
+
+    results = []
+    for i, (path, category) in enumerate(zip(paths, categories)):
+        palette_hex = CATEGORY_PALETTES.get(category, CATEGORY_PALETTES[DEFAULT_CATEGORY])
+        palette_hues = hue_degrees(rgb_to_lab(np.stack([hex_to_rgb(h) for h in palette_hex + BRAND_COLORS])))
+
+        chromatic = float(weights[i].mean())
+        cluster_mass = cluster_weight[i] * center_chromatic[i]
+        if chromatic == 0 or cluster_mass.sum() == 0:
+            # Capa sem cor (monocromática): nada a comparar, reprovada para revisão
+            coverage, distance = 0.0, float('inf')
+        else:
+            on_palette = hue_delta(hues[i], palette_hues) <= HUE_TOLERANCE
+            coverage = float((weights[i] * on_palette).sum() / weights[i].sum())
+            cluster_delta = hue_delta(center_hues[i], palette_hues)
+            distance = float((cluster_delta * cluster_mass).sum() / cluster_mass.sum())
+
+        dominant = centers[i][np.argmax(cluster_weight[i])]
+        results.append({
+            'file': Path(path).name,
+            'path': str(path),
+            'category': category,
+            'palette': palette_hex,
+            'chromatic': round(chromatic, 3),
+            'coverage': round(coverage, 3),
+            'distance': round(distance, 1) if np.isfinite(distance) else None,
+            'dominant_lab': [round(float(v), 1) for v in dominant],
+            'accepted': coverage >= MIN_COVERAGE and distance <= MAX_DISTANCE,
+        })
+    return results
+
+
+def write_report(results: List[Dict], name: str = 'palette') -> Path:
+    """Grava as notas em .cache/blog-assets/reports/<name>-<timestamp>.json"""
+    REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    report_path = REPORTS_DIR / f"{name}-{timestamp}.json"
+    report = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'thresholds': {'min_coverage': MIN_COVERAGE, 'max_distance': MAX_DISTANCE,
+                       'hue_tolerance': HUE_TOLERANCE, 'brand_colors': BRAND_COLORS},
+        'accepted': sum(r['accepted'] for r in results),
+        'rejected': sum(not r['accepted'] for r in results),
+        'covers': results,
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return report_path
+
+
+def print_results(results: List[Dict]) -> None:
+    for r in results:
+        icon = '✓' if r['accepted'] else '✗'
+        distance = f"{r['distance']:5.1f}" if r['distance'] is not None else '  -  '
+        print(f"   {icon} {r['file'][:48]:48s} {r['category'][:18]:18s} "
+              f"cobertura {r['coverage']:5.1%}  Δmatiz {distance}°  cromático {r['chromatic']:5.1%}")
+
+
+class PaletteGate:
+    """Verificação de paleta de cada master em staging, antes da promoção"""
+
+    def __init__(self, enforce: bool = False):
+        """
+        Args:
+            enforce: Reprovadas não são promovidas (ficam em .cache/blog-assets/rejected)
+        """
+        self.enforce = enforce
+        self.results: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def check(self, outputs, final, category: str) -> bool:
+        """
+        Nota o master `final` a partir do arquivo em staging
+
+        Args:
+            outputs: StagedOutputs ainda não promovido que contém `final`
+            final: Caminho final do master em public/Blog
+            category: Categoria do post (define a paleta)
+
+        Returns:
+            True se o master deve ser promovido
+        """
+        final = Path(final)
+        staged = outputs.read_path(final)
+        result = score_covers([str(staged)], [category])[0]
+        result.update(file=final.name, path=str(final))
+        print_results([result])
+
+        with self._lock:
+            self.results.append(result)
+        if result['accepted'] or not self.enforce:
+            return True
+
+        # Guardada para revisão; quem chama descarta o staging (rollback)
+        REJECTED_DIR.mkdir(parents=True, exist_ok=True)
+        shutil.move(str(staged), str(REJECTED_DIR / final.name))
+        print(f"   🚫 {final.name} reprovada: não promovida ({REJECTED_DIR})")
+        return False
+
+    def report(self) -> None:
+        """Relatório da execução (todas as capas verificadas)"""
+        if not self.results:
+            return
+        accepted = sum(r['accepted'] for r in self.results)
+        report_path = write_report(self.results)
+        print(f"\n🎨 Paleta: {accepted} aceita(s), {len(self.results) - accepted} reprovada(s)")
+        print(f"   📄 Relatório: {report_path}")
+
+
+def referenced_covers() -> set:
+    """Capas atuais dos posts (publicadas: nunca são movidas)"""
+    covers = set()
+    for post in load_blog_posts():
+        source = find_cover_source(post)
+        if source is not None:
+            covers.add(Path(source).resolve())
+    return covers
+
+
+def reject_covers(results: List[Dict]) -> List[str]:
+    """Move capas reprovadas e não referenciadas para .cache/blog-assets/rejected"""
+    REJECTED_DIR.mkdir(parents=True, exist_ok=True)
+    protected = referenced_covers()
+    moved = []
+    for result in results:
+        source = Path(result['path'])
+        if result['accepted']:
+            continue
+        if source.resolve() in protected:
+            print(f"   ⚠️  {source.name} é capa de um post: só no relatório")
+            continue
+        shutil.move(str(source), str(REJECTED_DIR / source.name))
+        moved.append(str(source))
+    # Tirar do manifesto de assets (não entram no próximo bundle de deploy)
+    record_assets(moved)
+    return moved
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Verifica se as capas usam as cores da marca da categoria',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('files', nargs='*', help='Capas para verificar')
+    parser.add_argument('--category', type=str, help='Categoria (paleta) das capas informadas')
+    parser.add_argument('--posts', action='store_true', help='Verificar as capas atuais de todos os posts')
+    parser.add_argument('--enforce', action='store_true',
+                        help='Mover reprovadas para fora de public/Blog (só arquivos informados, nunca capas de posts)')
+
+    args = parser.parse_args()
+    if args.enforce and args.posts:
+        parser.error('--enforce não vale com --posts: capas publicadas só entram no relatório')
+
+    if args.posts:
+        paths, categories = [], []
+        for post in load_blog_posts():
+            if args.category and post.get('category') != args.category:
+                continue
+            source = find_cover_source(post)
+            if source is not None and str(source) not in paths:
+                paths.append(str(source))
+                categories.append(post.get('category', DEFAULT_CATEGORY))
+    elif args.files:
+        paths = [p for p in args.files if Path(p).exists()]
+        categories = [args.category or DEFAULT_CATEGORY] * len(paths)
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+    print(f"\n🎨 Verificando {len(paths)} capa(s)...")
+    results = score_covers(paths, categories)
+    print_results(results)
+
+    report_path = write_report(results)
+    accepted = sum(r['accepted'] for r in results)
+    print(f"\n✓ {accepted} aceita(s), {len(results) - accepted} reprovada(s)")
+    print(f"📄 Relatório: {report_path}")
+
+    if args.enforce:
+        moved = reject_covers(results)
+        print(f"🚫 {len(moved)} capa(s) movida(s) para {REJECTED_DIR}")
+
+    sys.exit(0 if accepted == len(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Cache de Pixels Decodificados (memmap + pirâmide)
+Saraiva Vision - Cada capa decodificada uma vez para todas as derivadas
+
+Recortes (smart_crop), variantes ajustadas (encoder_tuning), LQIP/BlurHash
+(cover_placeholders), paleta (palette_check) e contact sheets decodificavam
+o mesmo PNG de vários MB cada um. Aqui os pixels RGB(A) de cada origem ficam
+em disco como arrays crus, indexados pelo sha256 do conteúdo
+(.cache/blog-assets/pixels/<aa>/<sha256>/), junto com uma pirâmide de
+reduções 2x (box) até ~64 px:
+
+- leitura por np.memmap: sem decodificar, e o SO compartilha as páginas
+  entre processos (os workers do encoder_tuning, por exemplo)
+- level_for()/image_at_least(): o menor nível que ainda cobre o tamanho
+  pedido; miniaturas e amostras leem KBs em vez da imagem inteira
+- LRU com limite de tamanho pelo mtime do meta.json (renovado a cada acerto)
+
+Uma derivada nova só paga o próprio processamento: `decode(path)` devolve os
+pixels já prontos.
+
+Uso:
+    from pixel_cache import decode
+    decoded = decode(path)
+    image = decoded.image()                  # resolução original
+    small = decoded.image_at_least(320, 180) # nível da pirâmide
+
+    python pixel_cache.py --warm --all       # pré-decodificar public/Blog
+    python pixel_cache.py --stats
+    python pixel_cache.py --prune --max-mb 512
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+from PIL import Image
+
+from asset_manifest import STATE_DIR, cached_hash, load_manifest
+from profiling import span
+
+PIXEL_CACHE_DIR = STATE_DIR / "pixels"
+CACHE_MAX_MB = 2048
+# Menor lado do último nível da pirâmide
+MIN_LEVEL_SIDE = 64
+# Limpeza do LRU a cada N entradas novas (e ao final dos CLIs)
+PRUNE_EVERY = 8
+CACHE_FORMAT = 1
+
+
+class DecodedImage:
+    """Pixels de uma origem: nível 0 na resolução original e reduções 2x"""
+
+    def __init__(self, directory: Path, meta: Dict):
+        self.directory = directory
+        self.meta = meta
+        self.mode = meta['mode']
+        self.levels = [tuple(level) for level in meta['levels']]  # (largura, altura)
+        self._arrays: Dict[int, np.ndarray] = {}
+
+    @property
+    def size(self):
+        return self.levels[0]
+
+    def array(self, level: int = 0) -> np.ndarray:
+        """Array (altura, largura, canais) somente leitura mapeado do disco"""
+        if level not in self._arrays:
+            width, height = self.levels[level]
+            self._arrays[level] = np.memmap(self.directory / f"level{level}.raw", dtype=np.uint8, mode='r',
+                                            shape=(height, width, len(self.mode)))
+        return self._arrays[level]
+
+    def image(self, level: int = 0) -> Image.Image:
+        return Image.fromarray(np.asarray(self.array(level)), self.mode)
+
+    def level_for(self, width: int, height: int = 0) -> int:
+        """Menor nível com largura >= width e altura >= height (0 se nenhum cobre)"""
+        chosen = 0
+        for level, (level_width, level_height) in enumerate(self.levels):
+            if level_width >= width and level_height >= height:
+                chosen = level
+        return chosen
+
+    def image_at_least(self, width: int, height: int = 0) -> Image.Image:
+        return self.image(self.level_for(width, height))
+
+
+class PixelCache:
+    """Pixels decodificados em disco por sha256, com LRU limitado em tamanho"""
+
+    def __init__(self, cache_dir: Path = PIXEL_CACHE_DIR, max_mb: float = CACHE_MAX_MB):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.manifest_files = load_manifest()['files']
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._building: Dict[str, threading.Lock] = {}
+        self._since_prune = 0
+
+    def entry_dir(self, digest: str) -> Path:
+        return self.cache_dir / digest[:2] / digest
+
+    def _load(self, directory: Path) -> Optional[DecodedImage]:
+        try:
+            with open(directory / 'meta.json', 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('format') != CACHE_FORMAT:
+            # Layout antigo: descartar para ser regravado
+            shutil.rmtree(directory, ignore_errors=True)
+            return None
+        os.utime(directory / 'meta.json')  # renova posição no LRU
+        return DecodedImage(directory, meta)
+
+    def peek(self, digest: str) -> Optional[DecodedImage]:
+        """Entrada já em cache para o sha256, sem decodificar nem gravar nada"""
+        return self._load(self.entry_dir(digest))
+
+    def get(self, path: Union[str, Path]) -> DecodedImage:
+        """Pixels da origem (decodifica e grava no cache na primeira vez)"""
+        path = Path(path)
+        digest = cached_hash(path, self.manifest_files)
+        directory = self.entry_dir(digest)
+
+        decoded = self._load(directory)
+        if decoded is not None:
+            with self._lock:
+                self.hits += 1
+            return decoded
+
+        with self._lock:
+            building = self._building.setdefault(digest, threading.Lock())
+        with building:
+            # Outra thread pode ter gravado enquanto esperávamos
+            decoded = self._load(directory)
+            if decoded is None:
+                decoded = self._build(path, digest)
+        with self._lock:
+            self._building.pop(digest, None)
+            self.misses += 1
+            self._since_prune += 1
+            prune_now = self._since_prune >= PRUNE_EVERY
+            if prune_now:
+                self._since_prune = 0
+        if prune_now:
+            self.prune()
+        return decoded
+
+    def _build(self, path: Path, digest: str) -> DecodedImage:
+        with span('decode', file=path.name, kind='pixel-cache'), Image.open(path) as opened:
+            alpha = opened.mode in ('RGBA', 'LA', 'PA') or 'transparency' in opened.info
+            image = opened.convert('RGBA' if alpha else 'RGB')
+
+        directory = self.entry_dir(digest)
+        directory.parent.mkdir(parents=True, exist_ok=True)
+        tmp_dir = Path(tempfile.mkdtemp(prefix='.build-', dir=directory.parent))
+        levels = []
+        level = image
+        while True:
+            np.asarray(level).tofile(tmp_dir / f"level{len(levels)}.raw")
+            levels.append(list(level.size))
+            if min(level.size) // 2 < MIN_LEVEL_SIDE:
+                break
+            level = level.reduce(2)
+
+        meta = {'format': CACHE_FORMAT, 'mode': image.mode, 'levels': levels, 'source': path.name}
+        with open(tmp_dir / 'meta.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+        try:
+            os.rename(tmp_dir, directory)
+        except OSError:
+            # Outro processo gravou a mesma entrada primeiro: o conteúdo é idêntico
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            existing = self._load(directory)
+            if existing is not None:
+                return existing
+            raise
+        return DecodedImage(directory, meta)
+
+    def entries(self) -> List[tuple]:
+        """(mtime do meta, bytes, diretório) de cada entrada"""
+        entries = []
+        for meta_path in self.cache_dir.glob('*/*/meta.json'):
+            directory = meta_path.parent
+            try:
+                size = sum(f.stat().st_size for f in directory.iterdir())
+                entries.append((meta_path.stat().st_mtime, size, directory))
+            except OSError:
+                continue
+        return entries
+
+    def prune(self) -> int:
+        """Remove as entradas menos usadas até o cache caber no limite"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, directory in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            # Arrays já mapeados por outros processos continuam válidos após o unlink
+            shutil.rmtree(directory, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+    def report(self) -> str:
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"🧊 Cache de pixels: {self.hits} acerto(s), {self.misses} decodificação(ões) ({rate:.0%} de acerto)"
+
+
+_default: Optional[PixelCache] = None
+_default_lock = threading.Lock()
+
+
+def get_pixel_cache() -> PixelCache:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PixelCache()
+        return _default
+
+
+def decode(path: Union[str, Path]) -> DecodedImage:
+    """Pixels decodificados de path pelo cache compartilhado do processo"""
+    return get_pixel_cache().get(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Cache de pixels decodificados compartilhado pelas derivadas das capas',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--warm', action='store_true', help='Pré-decodificar as imagens')
+    parser.add_argument('--all', action='store_true', help='Com --warm: todos os masters de public/Blog')
+    parser.add_argument('--files', nargs='+', help='Com --warm: imagens específicas')
+    parser.add_argument('--stats', action='store_true', help='Entradas e tamanho do cache')
+    parser.add_argument('--prune', action='store_true', help='Aplicar o limite de tamanho agora')
+    parser.add_argument('--clear', action='store_true', help='Apagar o cache inteiro')
+    parser.add_argument('--max-mb', type=float, default=CACHE_MAX_MB, help='Limite do cache em MB')
+
+    args = parser.parse_args()
+    if not (args.warm or args.stats or args.prune or args.clear):
+        parser.print_help()
+        sys.exit(1)
+
+    if args.clear:
+        shutil.rmtree(PIXEL_CACHE_DIR, ignore_errors=True)
+        print(f"✓ Cache removido: {PIXEL_CACHE_DIR}")
+
+    cache = PixelCache(max_mb=args.max_mb)
+
+    if args.warm:
+        if args.files:
+            sources = [Path(f) for f in args.files]
+        elif args.all:
+            from encoder_tuning import find_masters
+            sources = find_masters()
+        else:
+            print("✗ --warm requer --all ou --files")
+            sys.exit(1)
+        for source in sources:
+            try:
+                decoded = cache.get(source)
+            except (OSError, ValueError) as e:
+                print(f"⚠️  {source.name}: {e}")
+                continue
+            width, height = decoded.size
+            print(f"✓ {source.name}: {width}x{height} {decoded.mode}, {len(decoded.levels)} nível(is)")
+        print(cache.report())
+
+    if args.prune or args.warm:
+        removed = cache.prune()
+        if removed:
+            print(f"🧹 {removed} entrada(s) antigas removidas")
+
+    if args.stats or args.prune:
+        entries = cache.entries()
+        total = sum(size for _, size, _ in entries)
+        print(f"📦 {len(entries)} entrada(s), {total / 2**20:.1f} MB de {args.max_mb:.0f} MB em {PIXEL_CACHE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+#!/usr/bin/env python3
+"""
+Pipeline de Capas de Podcast
+Saraiva Vision - Capas 1:1 para todos os episódios de podcastEpisodes.js
+
+Lê os episódios com o parser de blog_data e compara a capa de cada um
+(campo `cover`) com o estado salvo em .cache/blog-assets/podcast-covers.json:
+- capa ausente: gera com Imagen 4 em 1:1 (uma chamada por episódio, em paralelo)
+- master novo/alterado ou renditions faltando: só refaz as renditions
+- capa inalterada com renditions: pula
+
+As renditions 3000/1400/600 px em JPEG e WebP saem de uma única decodificação
+do master. Adicionar um episódio custa uma chamada e nenhum passo manual.
+
+Uso:
+    python podcast_covers.py --list
+    python podcast_covers.py
+    python podcast_covers.py --episode glaucoma-ep1 --force
+    python podcast_covers.py --dry-run
+"""
+
+import os
+import sys
+import json
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from google import genai
+from PIL import Image
+
+from api_key_pool import ApiKeyPool, load_api_keys, DEFAULT_RATE_PER_MINUTE
+from asset_manifest import PUBLIC_DIR, STATE_DIR, hash_file, record_assets
+from blog_data import load_podcast_episodes
+from hedged_requests import HedgedCaller, DEFAULT_DEADLINE_SECONDS, time_left
+from master_format import save_master
+from memory_budget import MemoryBudget, estimate_response_mb
+from profiling import add_profile_arguments, start_profiling, stop_profiling, span, stage
+from staged_writes import StagedOutputs, atomic_save_image
+
+PODCAST_STATE_PATH = STATE_DIR / "podcast-covers.json"
+
+# Apple Podcasts: 1400-3000 px quadrado; 600 px para listagens do site
+RENDITION_SIZES = (3000, 1400, 600)
+RENDITION_FORMATS = {
+    'jpg': {'format': 'JPEG', 'quality': 88, 'optimize': True, 'progressive': True},
+    'webp': {'format': 'WEBP', 'quality': 82, 'method': 6},
+}
+# 2K do Imagen (2048 px) chega a 3000 px; masters antigos de 300-512 px não são ampliados
+MAX_UPSCALE = 1.5
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MODEL = 'imagen-4.0-generate-001'
+
+# Estilos por categoria de episódio
+PODCAST_CATEGORY_STYLES = {
+    'Cirurgias Oftalmológicas': {
+        'color_scheme': 'professional blue (#3B82F6) and clean medical white',
+        'elements': 'precision surgical light, intraocular lens, modern operating room details',
+        'mood': 'precise, reassuring, advanced',
+    },
+    'Doenças Oculares': {
+        'color_scheme': 'deep teal (#0F766E) and soft aqua (#5EEAD4)',
+        'elements': 'macro photography of a healthy human eye, subtle anatomical details',
+        'mood': 'informative, calm, trustworthy',
+    },
+    'Lentes de Contato': {
+        'color_scheme': 'sky blue (#0EA5E9) and crystal clear white',
+        'elements': 'contact lens on fingertip, water droplets, lens case',
+        'mood': 'fresh, clean, practical',
+    },
+    'Prevenção e Saúde': {
+        'color_scheme': 'emerald green (#10B981) and clean white (#FFFFFF)',
+        'elements': 'protective shield symbolism, healthy lifestyle, eye exam equipment',
+        'mood': 'preventive, caring, professional',
+    },
+    'Educação e Dúvidas': {
+        'color_scheme': 'warm amber (#F59E0B) and golden yellow (#FCD34D)',
+        'elements': 'friendly conversation, question symbols, educational materials',
+        'mood': 'educational, approachable, welcoming',
+    },
+}
+DEFAULT_STYLE = PODCAST_CATEGORY_STYLES['Doenças Oculares']
+
+PODCAST_PROMPT_TEMPLATE = """Square podcast cover artwork for a Brazilian ophthalmology clinic podcast.
+
+EPISODE THEME: {title}
+CONTEXT: {description}
+KEY TOPICS: {topics}
+COLOR PALETTE: {color_scheme}
+VISUAL ELEMENTS: {elements}
+MOOD: {mood}
+
+Requirements:
+- 1:1 square format, bold central subject readable at small thumbnail size
+- Professional medical photography or refined 3D illustration
+- Studio microphone or sound-wave motif subtly integrated
+- NO text, NO words, NO letters on the image
+- Clean, modern, minimalist aesthetic with soft lighting"""
+
+
+def cover_path(episode: Dict) -> Optional[Path]:
+    """Arquivo da capa referenciado pelo episódio (relativo a public/)"""
+    cover = episode.get('cover')
+    if not cover:
+        return None
+    return PUBLIC_DIR / cover.lstrip('/')
+
+
+def rendition_path(cover: Path, size: int, ext: str) -> Path:
+    return cover.with_name(f"{cover.stem}-{size}w.{ext}")
+
+
+def master_path(cover: Path) -> Path:
+    """Nome canônico do master gerado: x.png ao lado de x.jpg (x-master.png se a capa já é PNG)"""
+    if cover.suffix.lower() == '.png':
+        return cover.with_name(f"{cover.stem}-master.png")
+    return cover.with_suffix('.png')
+
+
+def find_master(cover: Path, recorded: Optional[str] = None) -> Optional[Path]:
+    """
+    Master da capa: o registrado no estado, se ainda existir; senão o maior
+    arquivo com o nome canônico ou o mesmo nome-base da capa
+    """
+    if recorded and (cover.parent / recorded).exists():
+        return cover.parent / recorded
+    canonical = master_path(cover)
+    best, best_pixels = None, 0
+    candidates = [canonical.with_suffix(ext) for ext in ('.png', '.webp')]
+    candidates += [cover.with_suffix(ext) for ext in ('.png', '.jpg', '.jpeg', '.webp')] + [cover]
+    for candidate in candidates:
+        if not candidate.exists():
+            continue
+        try:
+            with Image.open(candidate) as image:
+                pixels = image.width * image.height
+        except (OSError, ValueError):
+            continue
+        if pixels > best_pixels:
+            best, best_pixels = candidate, pixels
+    return best
+
+
+def load_state(path: Path = PODCAST_STATE_PATH) -> Dict:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state: Dict, path: Path = PODCAST_STATE_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def cover_fingerprint(path: Path, previous: Optional[Dict] = None) -> Dict:
+    """sha256/tamanho/mtime da capa (hash reaproveitado se tamanho e mtime não mudaram)"""
+    stat = path.stat()
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns:
+        return previous
+    return {'sha256': hash_file(path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def plan_episode(episode: Dict, state: Dict, force: bool = False) -> str:
+    """'generate' (sem capa), 'render' (master novo/alterado ou renditions faltando) ou 'skip'"""
+    cover = cover_path(episode)
+    if cover is None:
+        return 'skip'
+    record = state.get(episode['id'])
+    master = find_master(cover, record.get('master') if record else None)
+    if force or master is None:
+        return 'generate'
+
+    if record is None or record.get('cover') != cover.name or record.get('master') != master.name:
+        return 'render'
+    if cover_fingerprint(master, record['fingerprint'])['sha256'] != record['fingerprint']['sha256']:
+        return 'render'
+    if not all((cover.parent / name).exists() for name in record.get('renditions', [])):
+        return 'render'
+    return 'skip'
+
+
+def rendition_sizes(side: int) -> List[int]:
+    """Tamanhos alcançáveis sem ampliar o master além de MAX_UPSCALE"""
+    return [size for size in RENDITION_SIZES if size <= side * MAX_UPSCALE]
+
+
+def render_renditions(master: Path, cover: Path, write_cover: bool = False, outputs=None) -> List[str]:
+    """
+    Renditions 3000/1400/600 em JPEG e WebP a partir de uma decodificação
+
+    Com write_cover (episódio recém-gerado), o arquivo da capa é gravado da
+    mesma imagem, no formato da sua extensão, no maior tamanho até 1400 px.
+    Com outputs (StagedOutputs), tudo fica em staging e é promovido junto com
+    o master; sem ele, cada arquivo é promovido com rename atômico.
+    """
+    def save(image: Image.Image, path: Path, **options):
+        if outputs is not None:
+            outputs.save_image(image, path, variant=True, **options)
+        else:
+            atomic_save_image(image, path, **options)
+
+    source = outputs.read_path(master) if outputs is not None else master
+    with span('decode', file=master.name), Image.open(source) as image:
+        image = image.convert('RGB')
+
+    # Centro quadrado se o master não for 1:1
+    side = min(image.size)
+    if image.width != image.height:
+        left, top = (image.width - side) // 2, (image.height - side) // 2
+        image = image.crop((left, top, left + side, top + side))
+
+    sizes = rendition_sizes(side)
+    if len(sizes) < len(RENDITION_SIZES):
+        reach = f"renditions só até {sizes[0]}px" if sizes else "nenhuma rendition"
+        print(f"⚠️  {master.name}: master de {side}px, {reach} (gere uma capa nova com --force)")
+
+    saved = []
+    for size in sizes:
+        rendition = image if size == side else image.resize((size, size), Image.LANCZOS, reducing_gap=2.0)
+        for ext, options in RENDITION_FORMATS.items():
+            path = rendition_path(cover, size, ext)
+            with span('encode', file=path.name, size=size):
+                save(rendition, path, **options)
+            saved.append(str(path))
+
+    if write_cover and master != cover:
+        size = min(side, 1400)
+        ext = cover.suffix.lower().lstrip('.')
+        options = RENDITION_FORMATS.get('jpg' if ext == 'jpeg' else ext, {'format': 'PNG'})
+        save(image.resize((size, size), Image.LANCZOS, reducing_gap=2.0), cover, **options)
+        saved.append(str(cover))
+
+    return saved
+
+
+class PodcastCoverGenerator:
+    """Gera masters 1:1 com Imagen 4 (pool de chaves, deadline e orçamento de memória)"""
+
+    def __init__(self, key_pool: ApiKeyPool, model: str = DEFAULT_MODEL,
+                 hedger: Optional[HedgedCaller] = None, memory_budget: Optional[MemoryBudget] = None):
+        self.key_pool = key_pool
+        self.model_name = model
+        self.hedger = hedger or HedgedCaller()
+        self.memory_budget = memory_budget or MemoryBudget()
+
+    def create_prompt(self, episode: Dict) -> str:
+        style = PODCAST_CATEGORY_STYLES.get(episode.get('category'), DEFAULT_STYLE)
+        topics = ', '.join(t for t in episode.get('tags', []) if t.lower() != 'caratinga')
+        return PODCAST_PROMPT_TEMPLATE.format(
+            title=episode.get('title', ''),
+            description=(episode.get('description') or '')[:300],
+            topics=topics,
+            **style,
+        )
+
+    def generate_master(self, episode: Dict, cover: Path, outputs=None) -> Optional[Path]:
+        """Uma chamada 1:1 em 2K; master sem perdas no nome canônico (master_path), substituído com rename atômico"""
+        with span('prompt', episode=episode['id']):
+            prompt = self.create_prompt(episode)
+
+        def request(deadline_at: float):
+            with self.key_pool.acquire(cost=1, timeout=time_left(deadline_at)) as key:
+                return key.client.models.generate_images(
+                    model=self.model_name,
+                    prompt=prompt,
+                    config=genai.types.GenerateImagesConfig(
+                        number_of_images=1,
+                        aspect_ratio='1:1',
+                        image_size='2K',
+                        http_options=genai.types.HttpOptions(timeout=int(time_left(deadline_at) * 1000)),
+                    )
+                )
+
+        # Sempre o nome canônico: com --force o master antigo é trocado no commit,
+        # e find_master/o estado passam a apontar para o novo
+        master = master_path(cover)
+
+        try:
+            with self.memory_budget.reserve(estimate_response_mb(1, '2K')):
+                with span('request', model=self.model_name, episode=episode['id']):
+                    response = self.hedger.call(self.model_name, primary=request)
+                generated = response.generated_images or []
+                if not generated:
+                    print(f"✗ {episode['id']}: nenhuma imagem retornada (filtro de segurança?)")
+                    return None
+                master, _, _ = save_master(generated[0].image.image_bytes, master, outputs=outputs)
+        except Exception as e:
+            print(f"✗ Erro ao gerar capa de {episode['id']}: {e}")
+            return None
+
+        print(f"✓ {episode['id']}: master {master.name}")
+        return master
+
+
+def process_episode(episode: Dict, action: str, generator: Optional[PodcastCoverGenerator],
+                    recorded: Optional[str] = None) -> Optional[Dict]:
+    """Gera (se preciso) e renderiza; retorna o registro de estado ou None se falhou (recorded: master no estado)"""
+    cover = cover_path(episode)
+    write_cover = action == 'generate' or not cover.exists()
+
+    # Master, renditions e capa em staging: o episódio só aparece completo (manifesto: lote no main)
+    with StagedOutputs(record=False) as outputs:
+        if action == 'generate':
+            master = generator.generate_master(episode, cover, outputs=outputs)
+        else:
+            master = find_master(cover, recorded)
+        if master is None:
+            return None
+
+        saved = render_renditions(master, cover, write_cover=write_cover, outputs=outputs)
+        if action == 'generate':
+            saved.append(str(master))
+    print(f"   {episode['id']}: {len(saved)} arquivo(s) ← {master.name}")
+
+    return {
+        'cover': cover.name,
+        'master': master.name,
+        'fingerprint': cover_fingerprint(master),
+        'renditions': [Path(p).name for p in saved if p not in (str(cover), str(master))],
+        'updated': datetime.now().isoformat(timespec='seconds'),
+        'files': saved,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Capas 1:1 e renditions para os episódios de podcastEpisodes.js',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--episode', type=str, help='ID de um episódio (padrão: todos)')
+    parser.add_argument('--list', action='store_true', help='Listar episódios e a ação prevista')
+    parser.add_argument('--dry-run', action='store_true', help='Mostrar o plano sem gerar nada')
+    parser.add_argument('--force', action='store_true', help='Gerar nova capa mesmo se já existir')
+    parser.add_argument('--model', type=str, default=DEFAULT_MODEL,
+                       choices=['imagen-4.0-generate-001', 'imagen-4.0-ultra-generate-001'],
+                       help='Modelo Imagen 4 (2K: apenas Standard e Ultra)')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                       help=f'Episódios processados em paralelo (padrão: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--rate-per-key', type=float, default=DEFAULT_RATE_PER_MINUTE,
+                       help=f'Imagens/minuto por chave em GOOGLE_GEMINI_API_KEYS (padrão: {DEFAULT_RATE_PER_MINUTE})')
+    parser.add_argument('--deadline', type=float, default=DEFAULT_DEADLINE_SECONDS,
+                       help=f'Limite por chamada à API em segundos (padrão: {DEFAULT_DEADLINE_SECONDS:.0f})')
+    parser.add_argument('--max-rss-mb', type=int, default=None, help='Limite de RSS do processo em MB')
+    add_profile_arguments(parser)
+
+    args = parser.parse_args()
+    start_profiling(args.profile, 'podcast', top=args.profile_top)
+
+    print("\n" + "="*70)
+    print("🎙️  SARAIVA VISION - Capas de Podcast")
+    print("="*70)
+
+    with stage('load'):
+        episodes = load_podcast_episodes()
+    if args.episode:
+        episodes = [e for e in episodes if e.get('id') == args.episode]
+        if not episodes:
+            print(f"✗ Episódio {args.episode} não encontrado")
+            sys.exit(1)
+
+    state = load_state()
+    plans = [(episode, plan_episode(episode, state, force=args.force)) for episode in episodes]
+
+    icons = {'generate': '🎨', 'render': '🖼️ ', 'skip': '✓ '}
+    print(f"\n📋 {len(plans)} episódio(s):\n")
+    for episode, action in plans:
+        print(f"  {icons[action]} {action:8s} {episode['id']:28s} {episode.get('cover', '-')}")
+
+    pending = [(e, a) for e, a in plans if a != 'skip']
+    if args.list or args.dry_run or not pending:
+        if not pending:
+            print("\n✓ Todas as capas estão em dia")
+        sys.exit(0)
+
+    generator = None
+    hedger = None
+    key_pool = None
+    if any(a == 'generate' for _, a in pending):
+        api_keys = load_api_keys()
+        if not api_keys:
+            print("\n✗ API key não encontrada!")
+            print("export GOOGLE_GEMINI_API_KEY='sua-chave'")
+            sys.exit(1)
+        key_pool = ApiKeyPool(api_keys, rate_per_minute=args.rate_per_key)
+        hedger = HedgedCaller(deadline=args.deadline)
+        generator = PodcastCoverGenerator(key_pool, model=args.model, hedger=hedger,
+                                          memory_budget=MemoryBudget(max_rss_mb=args.max_rss_mb))
+
+    print(f"\n🚀 Processando {len(pending)} episódio(s) com {args.concurrency} em paralelo...")
+    failed = []
+    saved_files = []
+    with stage('generate'), ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as executor:
+        results = executor.map(
+            lambda item: process_episode(item[0], item[1], generator,
+                                         state.get(item[0]['id'], {}).get('master')), pending)
+        for (episode, _), record in zip(pending, results):
+            if record is None:
+                failed.append(episode['id'])
+            else:
+                saved_files.extend(record.pop('files'))
+                state[episode['id']] = record
+    save_state(state)
+
+    # Manifesto de assets atualizado uma vez para o lote inteiro
+    with stage('record'):
+        record_assets(saved_files)
+
+    print("\n" + "="*70)
+    print(f"✅ {len(pending) - len(failed)} episódio(s) atualizados, {len(failed)} falha(s)")
+    for episode_id in failed:
+        print(f"   ✗ {episode_id}")
+    if key_pool is not None:
+        print(key_pool.report())
+        print(hedger.report())
+        hedger.close()
+    stop_profiling()
+    print("="*70 + "\n")
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
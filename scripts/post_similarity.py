@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Índice de Similaridade entre Posts
+Saraiva Vision - Reutilizar ou diversificar capas de posts com temas próximos
+
+Índice TF-IDF (numpy, em disco) sobre título + resumo de cada post. Antes de
+gerar uma capa, os vizinhos mais próximos decidem entre:
+- reuse: um vizinho quase idêntico tem capa aprovada; ela é copiada para o
+  post e a chamada paga é evitada
+- diversify: vizinhos parecidos → restrições de diversidade no prompt
+- generate: post sem vizinhos próximos, prompt inalterado
+
+Capas só são reutilizadas depois de aprovadas com --approve (registro em
+.cache/blog-assets/approved-covers.json com o sha256 do arquivo; se a capa
+mudar no disco, a aprovação deixa de valer). No modo 'plan' (padrão dos
+geradores) a decisão é só exibida e o prompt não muda.
+
+Uso:
+    python post_similarity.py --post-id 10
+    python post_similarity.py --pairs --threshold 0.3
+    python post_similarity.py --approve 10 [--cover public/Blog/capa.png]
+    python post_similarity.py --approved
+    python post_similarity.py --rebuild
+"""
+
+import re
+import sys
+import hashlib
+import argparse
+import unicodedata
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from asset_manifest import (PROJECT_ROOT, STATE_DIR, cached_hash, hash_file, load_cache, load_manifest,
+                            write_json_atomic)
+from blog_data import BLOG_POSTS_PATH, load_blog_posts, find_cover_source
+
+INDEX_PATH = STATE_DIR / "post-similarity.npz"
+APPROVED_PATH = STATE_DIR / "approved-covers.json"
+INDEX_VERSION = 1  # incrementar ao mudar tokenização/pesos (invalida o índice salvo)
+
+# Cosseno mínimo para cada decisão (calibrado nos pares reais: os dois posts de
+# presbiopia ficam em ~0.6; olho seco/lacrimal e lentes/catarata entre 0.2 e 0.4)
+DIVERSIFY_THRESHOLD = 0.20
+REUSE_THRESHOLD = 0.55
+MAX_NEIGHBOURS = 3
+
+# plan: só mostra a decisão; diversify/reuse alteram o prompt ou evitam a chamada
+SIMILARITY_MODES = ('off', 'plan', 'diversify', 'reuse')
+DEFAULT_SIMILARITY_MODE = 'plan'
+
+# Composições alternativas sugeridas quando há vizinhos parecidos (escolha determinística por post)
+COMPOSITION_ALTERNATIVES = [
+    'an extreme close-up macro composition',
+    'a wide environmental scene with the subject small in the frame',
+    'an overhead flat-lay arrangement',
+    'a strong diagonal composition with off-center subject',
+    'a minimalist composition with large negative space',
+    'a layered foreground/background depth composition',
+]
+
+_STOPWORDS = set('''
+a ao aos as com como da das de do dos e em entre na nas no nos o os ou para pela pelas pelo
+pelos por que se sem sua suas seu seus um uma umas uns e sao ser ter mais muito quando qual
+quais sobre ate apos tambem voce seus isso esta este essa esse the and for with guia completo
+caratinga saraiva vision clinica oftalmologista oftalmologia
+'''.split())
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text: str) -> List[str]:
+    """Minúsculas, sem acentos, sem stopwords, plural simples reduzido"""
+    normalized = unicodedata.normalize('NFKD', text.lower())
+    ascii_text = normalized.encode('ascii', 'ignore').decode('ascii')
+    tokens = []
+    for word in _WORD_RE.findall(ascii_text):
+        if len(word) < 3 or word in _STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith('s'):
+            word = word[:-1]
+        tokens.append(word)
+    return tokens
+
+
+def post_text(post: Dict) -> str:
+    # Título pesa o dobro: é o que mais determina o tema visual
+    title = post.get('title') or ''
+    return f"{title} {title} {post.get('excerpt') or ''}"
+
+
+class SimilarityIndex:
+    """Matriz TF-IDF normalizada (L2) dos posts, persistida em .npz"""
+
+    def __init__(self, ids: np.ndarray, vocab: List[str], idf: np.ndarray,
+                 matrix: np.ndarray, source_hash: str = ''):
+        self.ids = ids
+        self.vocab = vocab
+        self.idf = idf
+        self.matrix = matrix
+        self.source_hash = source_hash
+        self._term_index = {term: i for i, term in enumerate(vocab)}
+        self._row = {int(post_id): row for row, post_id in enumerate(ids)}
+
+    @classmethod
+    def build(cls, posts: List[Dict], source_hash: str = '') -> 'SimilarityIndex':
+        documents = [tokenize(post_text(p)) for p in posts]
+        vocab = sorted({term for doc in documents for term in doc})
+        term_index = {term: i for i, term in enumerate(vocab)}
+
+        counts = np.zeros((len(documents), len(vocab)), dtype=np.float32)
+        for row, doc in enumerate(documents):
+            for term in doc:
+                counts[row, term_index[term]] += 1
+
+        # TF sublinear + IDF suavizado
+        document_freq = (counts > 0).sum(axis=0)
+        idf = np.log((1 + len(documents)) / (1 + document_freq)).astype(np.float32) + 1.0
+        matrix = np.log1p(counts) * idf
+        matrix = cls._normalize(matrix)
+
+        ids = np.array([p['id'] for p in posts], dtype=np.int64)
+        return cls(ids, vocab, idf, matrix, source_hash)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return matrix / np.where(norms > 0, norms, 1.0)
+
+    def vectorize(self, post: Dict) -> np.ndarray:
+        """Vetor de um post (inclusive rascunhos fora do índice) com o IDF salvo"""
+        vector = np.zeros(len(self.vocab), dtype=np.float32)
+        for term in tokenize(post_text(post)):
+            column = self._term_index.get(term)
+            if column is not None:
+                vector[column] += 1
+        return self._normalize(np.log1p(vector) * self.idf)
+
+    def neighbours(self, post: Dict, k: int = MAX_NEIGHBOURS, min_score: float = 0.0) -> List[Dict]:
+        """Posts mais parecidos: [{'id': ..., 'score': ...}] em ordem decrescente"""
+        row = self._row.get(post.get('id'))
+        vector = self.matrix[row] if row is not None else self.vectorize(post)
+        scores = self.matrix @ vector
+        if row is not None:
+            scores[row] = -1.0
+
+        order = np.argsort(-scores)[:k]
+        return [{'id': int(self.ids[i]), 'score': float(scores[i])}
+                for i in order if scores[i] >= min_score]
+
+    def pairs(self, min_score: float) -> List[Dict]:
+        """Todos os pares de posts acima do limiar (matriz de cossenos de uma vez)"""
+        similarity = self.matrix @ self.matrix.T
+        upper_rows, upper_cols = np.triu_indices(len(self.ids), k=1)
+        scores = similarity[upper_rows, upper_cols]
+        keep = np.nonzero(scores >= min_score)[0]
+        keep = keep[np.argsort(-scores[keep])]
+        return [{'a': int(self.ids[upper_rows[i]]), 'b': int(self.ids[upper_cols[i]]),
+                 'score': float(scores[i])} for i in keep]
+
+    def save(self, path: Path = INDEX_PATH) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.stem + '.tmp.npz')
+        np.savez_compressed(tmp_path, ids=self.ids, vocab=np.array(self.vocab), idf=self.idf,
+                            matrix=self.matrix, source_hash=np.array(self.source_hash))
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = INDEX_PATH) -> Optional['SimilarityIndex']:
+        if not path.exists():
+            return None
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                return cls(data['ids'], [str(t) for t in data['vocab']], data['idf'],
+                           data['matrix'], str(data['source_hash']))
+        except (OSError, KeyError, ValueError):
+            return None
+
+
+def _source_hash(path: Path) -> str:
+    digest = hashlib.sha256(f"v{INDEX_VERSION}:".encode())
+    with open(path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def load_index(posts: Optional[List[Dict]] = None, rebuild: bool = False) -> SimilarityIndex:
+    """Índice do disco; reconstruído quando blogPosts.js mudou"""
+    source_hash = _source_hash(BLOG_POSTS_PATH)
+    index = None if rebuild else SimilarityIndex.load()
+    if index is not None and index.source_hash == source_hash:
+        return index
+
+    index = SimilarityIndex.build(posts if posts is not None else load_blog_posts(), source_hash)
+    index.save()
+    return index
+
+
+class ApprovedCovers:
+    """Capas aprovadas por post (as únicas que o modo reuse copia)"""
+
+    def __init__(self, path: Path = APPROVED_PATH):
+        self.path = path
+        self.entries: Dict[str, Dict] = load_cache(path)
+
+    def approve(self, post_id: int, cover: Path) -> Dict:
+        entry = {
+            'cover': Path(cover).resolve().relative_to(PROJECT_ROOT.resolve()).as_posix(),
+            'sha256': hash_file(cover),
+            'approved': datetime.now().isoformat(timespec='seconds'),
+        }
+        self.entries[str(post_id)] = entry
+        write_json_atomic(self.entries, self.path)
+        return entry
+
+    def revoke(self, post_id: int) -> bool:
+        removed = self.entries.pop(str(post_id), None) is not None
+        if removed:
+            write_json_atomic(self.entries, self.path)
+        return removed
+
+    def cover_for(self, post_id: int) -> Optional[Path]:
+        """Capa aprovada do post, se ainda existe com o mesmo conteúdo"""
+        entry = self.entries.get(str(post_id))
+        if entry is None:
+            return None
+        cover = PROJECT_ROOT / entry['cover']
+        if not cover.is_file() or cached_hash(cover, load_manifest()['files']) != entry['sha256']:
+            return None
+        return cover
+
+
+class CoverPlanner:
+    """Decide reuse/diversify/generate para cada post antes da chamada à API"""
+
+    def __init__(self, mode: str = DEFAULT_SIMILARITY_MODE, posts: Optional[List[Dict]] = None,
+                 approved: Optional[ApprovedCovers] = None):
+        self.mode = mode
+        self.posts = {p['id']: p for p in (posts if posts is not None else load_blog_posts())}
+        self.index = load_index(list(self.posts.values()))
+        self.approved = approved or ApprovedCovers()
+
+    def plan(self, post: Dict) -> Dict:
+        """
+        Returns:
+            {'action': 'generate'|'diversify'|'reuse', 'neighbours': [...],
+             'cover': caminho (reuse), 'constraints': texto (diversify)}
+        """
+        plan = {'action': 'generate', 'neighbours': [], 'cover': None, 'constraints': ''}
+        if self.mode == 'off':
+            return plan
+
+        full_post = {**self.posts.get(post.get('id'), {}), **post}
+        neighbours = self.index.neighbours(full_post, min_score=DIVERSIFY_THRESHOLD)
+        for neighbour in neighbours:
+            neighbour['title'] = self.posts.get(neighbour['id'], {}).get('title', '')
+        plan['neighbours'] = neighbours
+        if not neighbours:
+            return plan
+
+        # 'plan' mostra o que o modo reuse faria
+        if self.mode in ('reuse', 'plan') and neighbours[0]['score'] >= REUSE_THRESHOLD:
+            cover = self.approved.cover_for(neighbours[0]['id'])
+            if cover is not None:
+                plan.update(action='reuse', cover=str(cover))
+                return plan
+
+        plan.update(action='diversify', constraints=diversity_constraints(full_post, neighbours))
+        return plan
+
+
+def reuse_cover(cover: Path, post_id: int, output_dir: Path) -> Tuple[Path, int, Tuple[int, int]]:
+    """Copia a capa aprovada para o post (staging + manifesto); retorna (caminho, bytes, dimensões)"""
+    from PIL import Image
+    from staged_writes import StagedOutputs
+
+    cover = Path(cover)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    target = Path(output_dir) / f"capa_post_{post_id}_reuse_{timestamp}{cover.suffix}"
+    data = cover.read_bytes()
+    with StagedOutputs() as outputs:
+        outputs.write_bytes(target, data)
+    with Image.open(cover) as image:
+        return target, len(data), image.size
+
+
+def apply_plan(planner: Optional[CoverPlanner], post: Dict, prompt: str,
+               output_dir: Path, on_result=None) -> Tuple[str, Optional[List[str]]]:
+    """
+    Aplica o plano de similaridade antes da chamada à API (comum aos geradores)
+
+    Returns:
+        (prompt, arquivos): arquivos é a capa aprovada copiada para o post
+        (reuse, sem chamada); None quando a geração deve seguir
+    """
+    if planner is None:
+        return prompt, None
+    plan = planner.plan(post)
+    post_id = post.get('id', 0)
+    related = ', '.join(f"#{n['id']} ({n['score']:.2f})" for n in plan['neighbours'])
+
+    if planner.mode == 'plan':
+        if plan['action'] != 'generate':
+            print(f"\n🧭 Posts parecidos: {related} → plano: {plan['action']} (sem efeito no modo 'plan')")
+        return prompt, None
+
+    if plan['action'] == 'reuse':
+        nearest = plan['neighbours'][0]
+        print(f"\n♻️  Quase idêntico ao post #{nearest['id']} (similaridade {nearest['score']:.2f})")
+        path, size, (width, height) = reuse_cover(Path(plan['cover']), post_id, output_dir)
+        print(f"✓ Capa aprovada reutilizada: {path.name}")
+        if on_result is not None:
+            from cover_stream import CoverResult
+            on_result(CoverResult(path, post_id, 'reuse', Path(plan['cover']).name, width, height, size))
+        return prompt, [str(path)]
+    if plan['action'] == 'diversify':
+        print(f"\n🔀 Posts parecidos: {related} → restrições de diversidade no prompt")
+        return f"{prompt}\n\n{plan['constraints']}", None
+    return prompt, None
+
+
+def diversity_constraints(post: Dict, neighbours: List[Dict]) -> str:
+    """Bloco de prompt que afasta a capa das capas dos posts vizinhos"""
+    titles = ', '.join(f'"{re.split(r"[:|]", n["title"])[0].strip()}"' for n in neighbours)
+    composition = COMPOSITION_ALTERNATIVES[int(post.get('id') or 0) % len(COMPOSITION_ALTERNATIVES)]
+    return (
+        f"DIVERSITY: Related blog posts ({titles}) already have covers on a similar theme. "
+        f"This cover must be visually distinct from them: use {composition}, "
+        f"a different central subject and camera angle, and do not repeat their main visual motif."
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Índice TF-IDF de similaridade entre posts do blog',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--post-id', type=int, help='Vizinhos e plano de geração de um post')
+    parser.add_argument('--pairs', action='store_true', help='Listar pares de posts parecidos')
+    parser.add_argument('--threshold', type=float, default=DIVERSIFY_THRESHOLD,
+                       help=f'Similaridade mínima (padrão: {DIVERSIFY_THRESHOLD})')
+    parser.add_argument('--mode', choices=SIMILARITY_MODES, default='reuse', help='Modo do planejador')
+    parser.add_argument('--rebuild', action='store_true', help='Reconstruir o índice')
+    parser.add_argument('--approve', type=int, metavar='POST_ID', help='Aprovar a capa do post para reuso')
+    parser.add_argument('--cover', type=str, help='Com --approve: arquivo da capa (padrão: a capa atual do post)')
+    parser.add_argument('--revoke', type=int, metavar='POST_ID', help='Remover a aprovação da capa do post')
+    parser.add_argument('--approved', action='store_true', help='Listar capas aprovadas')
+
+    args = parser.parse_args()
+
+    posts = load_blog_posts()
+    index = load_index(posts, rebuild=args.rebuild)
+    titles = {p['id']: p.get('title', '') for p in posts}
+    print(f"✓ Índice: {len(index.ids)} posts, {len(index.vocab)} termos ({INDEX_PATH})")
+    approved = ApprovedCovers()
+
+    if args.approve is not None:
+        post = next((p for p in posts if p['id'] == args.approve), None)
+        cover = Path(args.cover) if args.cover else (find_cover_source(post) if post else None)
+        if post is None or cover is None or not cover.is_file():
+            print(f"✗ Capa do post {args.approve} não encontrada")
+            sys.exit(1)
+        entry = approved.approve(args.approve, cover)
+        print(f"✓ Capa aprovada para reuso: #{args.approve} → {entry['cover']}")
+
+    if args.revoke is not None:
+        removed = approved.revoke(args.revoke)
+        print(f"✓ Aprovação removida: #{args.revoke}" if removed else f"⚠️  Post {args.revoke} sem capa aprovada")
+
+    if args.approved:
+        print(f"\n✅ Capas aprovadas ({len(approved.entries)}):")
+        for post_id, entry in sorted(approved.entries.items(), key=lambda item: int(item[0])):
+            state = '' if approved.cover_for(int(post_id)) else '  ⚠️ alterada/ausente'
+            print(f"  #{post_id:>3} {entry['cover']}{state}")
+
+    if args.pairs:
+        print(f"\n🔗 Pares com similaridade ≥ {args.threshold}:\n")
+        for pair in index.pairs(args.threshold):
+            print(f"  {pair['score']:.2f}  #{pair['a']:<3d} {titles[pair['a']][:45]:45s} "
+                  f"↔ #{pair['b']:<3d} {titles[pair['b']][:45]}")
+
+    if args.post_id is not None:
+        post = next((p for p in posts if p['id'] == args.post_id), None)
+        if post is None:
+            print(f"✗ Post {args.post_id} não encontrado")
+            sys.exit(1)
+        plan = CoverPlanner(args.mode, posts).plan(post)
+        print(f"\n📰 #{post['id']} {post['title']}")
+        for neighbour in plan['neighbours']:
+            print(f"   {neighbour['score']:.2f}  #{neighbour['id']} {neighbour['title']}")
+        print(f"\n🧭 Ação: {plan['action']}")
+        if plan['cover']:
+            print(f"   Capa aprovada: {plan['cover']}")
+        if plan['constraints']:
+            print(f"   {plan['constraints']}")
+
+
+if __name__ == "__main__":
+    main()
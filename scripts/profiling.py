@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Perfil de Execução das Gerações (--profile)
+Saraiva Vision - Onde vai o tempo e a memória de uma rodada de capas
+
+Com --profile, os geradores gravam em um diretório:
+- profile.pstats: cProfile de todas as threads (python -m pstats, snakeviz)
+- memory.txt: top-N do tracemalloc em cada fronteira de etapa (load/generate;
+  record no podcast), com a diferença em relação à anterior
+- trace.json: trace-event JSON do Chrome (chrome://tracing, ui.perfetto.dev)
+  com spans prompt/request/postprocess/decode/encode/write/record por thread
+  e contador de memória (record: promoção + manifesto de assets em cada commit)
+
+Até o Python 3.11 cada thread nova ganha o seu cProfile (threading.setprofile);
+a partir do 3.12 o cProfile usa sys.monitoring, que já cobre todas as threads
+e só admite um profiler ativo, então só o principal é ligado.
+
+Sem --profile, span()/stage() devolvem um contexto nulo compartilhado: o
+custo nas funções instrumentadas é uma checagem de variável global.
+
+Uso:
+    profiler = start_profiling(args.profile, 'imagen')
+    with stage('generate'):
+        with span('request', model=model):
+            ...
+    stop_profiling()  # também roda no atexit
+
+    python generate_covers_imagen.py --post-id 12 --profile
+    python -m pstats .cache/blog-assets/profiles/imagen-20250101_120000/profile.pstats
+"""
+
+import os
+import sys
+import json
+import time
+import atexit
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from asset_manifest import STATE_DIR
+
+PROFILES_DIR = STATE_DIR / "profiles"
+DEFAULT_TOP = 15
+TRACEMALLOC_FRAMES = 1
+
+# 3.12+: sys.monitoring vale para o processo inteiro e recusa um segundo profiler
+PER_THREAD_PROFILES = sys.version_info < (3, 12)
+
+_NULL_CONTEXT = nullcontext()
+_active: Optional['Profiler'] = None
+
+
+class Profiler:
+    """cProfile por thread, snapshots do tracemalloc por etapa e spans para o trace do Chrome"""
+
+    def __init__(self, output_dir: Path, top: int = DEFAULT_TOP):
+        self.output_dir = Path(output_dir)
+        self.top = top
+        self.events: List[Dict] = []
+        self.memory_report: List[str] = []
+        self.thread_profiles: List[cProfile.Profile] = []
+        self.main_profile = cProfile.Profile()
+        self.pid = os.getpid()
+        self.stopped = False
+        self._origin = time.perf_counter()
+        self._previous_snapshot = None
+        self._lock = threading.Lock()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _thread_bootstrap(self, frame, event, arg):
+        # Primeiro evento de cada thread nova: troca o hook Python pelo cProfile da thread
+        profile = cProfile.Profile()
+        with self._lock:
+            self.thread_profiles.append(profile)
+        profile.enable()
+
+    def start(self) -> 'Profiler':
+        global _active
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        if PER_THREAD_PROFILES:
+            threading.setprofile(self._thread_bootstrap)
+        self.main_profile.enable()
+        _active = self
+        atexit.register(self.stop)
+        return self
+
+    def _add_event(self, event: Dict) -> None:
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, category: str = 'cover', **args):
+        """Span 'X' do trace: início e duração na thread atual"""
+        started = self._now_us()
+        try:
+            yield
+        finally:
+            self._add_event({
+                'name': name, 'cat': category, 'ph': 'X',
+                'ts': round(started, 1), 'dur': round(self._now_us() - started, 1),
+                'pid': self.pid, 'tid': threading.get_ident(),
+                'args': {k: str(v) for k, v in args.items()},
+            })
+
+    @contextmanager
+    def stage(self, name: str):
+        """Etapa do pipeline: span próprio e snapshot do tracemalloc ao final"""
+        with self.span(name, category='stage'):
+            yield
+        self.snapshot(name)
+
+    def snapshot(self, label: str) -> None:
+        """Top-N alocações vivas (e diferença para o snapshot anterior) + contador no trace"""
+        if not tracemalloc.is_tracing():
+            return
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        self._add_event({
+            'name': 'tracemalloc', 'ph': 'C', 'ts': round(self._now_us(), 1), 'pid': self.pid,
+            'args': {'current_mb': round(current / 2**20, 2), 'peak_mb': round(peak / 2**20, 2)},
+        })
+
+        lines = [f"=== {label}: atual {current / 2**20:.1f} MB, pico {peak / 2**20:.1f} MB ===",
+                 f"-- top {self.top} por linha"]
+        lines += [f"   {stat}" for stat in snapshot.statistics('lineno')[:self.top]]
+        if self._previous_snapshot is not None:
+            lines.append(f"-- top {self.top} diferenças desde a etapa anterior")
+            lines += [f"   {stat}" for stat in snapshot.compare_to(self._previous_snapshot, 'lineno')[:self.top]]
+        self._previous_snapshot = snapshot
+        with self._lock:
+            self.memory_report.append('\n'.join(lines))
+
+    def _thread_names(self) -> List[Dict]:
+        names = {t.ident: t.name for t in threading.enumerate()}
+        tids = {e['tid'] for e in self.events if 'tid' in e}
+        return [{'name': 'thread_name', 'ph': 'M', 'pid': self.pid, 'tid': tid,
+                 'args': {'name': names.get(tid, f'thread-{tid}')}} for tid in sorted(tids)]
+
+    def stop(self) -> List[Path]:
+        """Desliga os coletores e grava pstats, memória e trace; retorna os arquivos"""
+        global _active
+        if self.stopped:
+            return []
+        self.stopped = True
+        self.main_profile.disable()
+        if PER_THREAD_PROFILES:
+            threading.setprofile(None)
+        self.snapshot('fim')
+        tracemalloc.stop()
+        if _active is self:
+            _active = None
+
+        stats = pstats.Stats(self.main_profile)
+        for profile in self.thread_profiles:
+            # Threads já encerradas: create_stats só copia o que foi coletado
+            profile.create_stats()
+            stats.add(profile)
+        pstats_path = self.output_dir / 'profile.pstats'
+        stats.dump_stats(str(pstats_path))
+
+        memory_path = self.output_dir / 'memory.txt'
+        memory_path.write_text('\n\n'.join(self.memory_report) + '\n', encoding='utf-8')
+
+        trace_path = self.output_dir / 'trace.json'
+        with open(trace_path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self._thread_names() + self.events, 'displayTimeUnit': 'ms'}, f)
+
+        print(f"\n🔬 Perfil gravado em {self.output_dir}")
+        print(f"   {pstats_path.name}: python -m pstats {pstats_path}")
+        print(f"   {trace_path.name}: abrir em chrome://tracing ou ui.perfetto.dev")
+        print(f"   {memory_path.name}: top {self.top} do tracemalloc por etapa")
+        return [pstats_path, memory_path, trace_path]
+
+
+def start_profiling(output_dir: Optional[str], name: str, top: int = DEFAULT_TOP) -> Optional[Profiler]:
+    """
+    Liga o perfil se --profile foi passado
+
+    Args:
+        output_dir: Valor de --profile (None: desligado, '': diretório padrão)
+        name: Prefixo do diretório padrão (ex.: 'imagen')
+    """
+    if output_dir is None:
+        return None
+    if not output_dir:
+        output_dir = PROFILES_DIR / f"{name}-{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    return Profiler(Path(output_dir), top=top).start()
+
+
+def stop_profiling() -> List[Path]:
+    return _active.stop() if _active is not None else []
+
+
+def span(name: str, **args):
+    """Span no trace se o perfil está ligado; contexto nulo caso contrário"""
+    return _active.span(name, **args) if _active is not None else _NULL_CONTEXT
+
+
+def stage(name: str):
+    """Etapa do pipeline (span + snapshot do tracemalloc) se o perfil está ligado"""
+    return _active.stage(name) if _active is not None else _NULL_CONTEXT
+
+
+def add_profile_arguments(parser) -> None:
+    """--profile [DIR] e --profile-top nos CLIs dos geradores"""
+    parser.add_argument('--profile', nargs='?', const='', default=None, metavar='DIR',
+                        help='Gravar cProfile, tracemalloc por etapa e trace do Chrome '
+                             f'(padrão: {PROFILES_DIR.relative_to(STATE_DIR.parent.parent)}/<script>-<data>)')
+    parser.add_argument('--profile-top', type=int, default=DEFAULT_TOP,
+                        help='Linhas do top-N do tracemalloc por etapa')
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Reescrita de Prompts Bloqueados pelo Filtro de Segurança
+Saraiva Vision - Relaxar o prompt em vez de repetir a mesma chamada
+
+Com safety_filter_level='block_low_and_above', prompts médicos (anatomia da
+retina, exame de recém-nascido, cirurgia) voltam sem imagens. Repetir o mesmo
+prompt só queima cota: o bloqueio é determinístico. Aqui a resposta filtrada
+vira sua própria categoria (motivo do include_rai_reason) e, antes de cada
+nova tentativa, a próxima regra de relaxamento aplicável é usada:
+
+1. drop-flagged-terms: termos clínicos sensíveis (sangue, agulha, tumor...)
+   trocados por equivalentes neutros
+2. no-minors: crianças/bebês viram cenas sem pessoas (person_generation é
+   allow_adult: menores sempre bloqueiam)
+3. no-people: sujeito humano removido, só objetos e ambiente
+4. illustration-style: fotografia → ilustração médica vetorial
+5. abstract: prompt simbólico mínimo a partir do título
+
+O motivo do filtro reordena as regras (ex.: "child" tenta no-minors antes).
+Cada rejeição e a regra que resolveu vão para .cache/blog-assets/
+safety-rewrites.jsonl; a regra vencedora fica memorizada por prompt, e a
+próxima execução já começa pelo prompt reescrito.
+
+Uso:
+    relaxer = PromptRelaxer(prompt, key='capa-x.png', title='Teste do Olhinho')
+    prompt = relaxer.prompt
+    reason = safety_block_reason(response)
+    if reason is not None:
+        prompt = relaxer.relax(reason)  # None: nenhuma regra restante
+    ...
+    relaxer.succeeded()
+"""
+
+import re
+import json
+import hashlib
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from asset_manifest import STATE_DIR, load_cache, write_json_atomic
+
+REWRITE_LOG_PATH = STATE_DIR / "safety-rewrites.jsonl"
+REWRITE_MEMORY_PATH = STATE_DIR / "safety-rewrites.json"
+
+# Config extra para as chamadas do Imagen: o motivo do bloqueio vem na resposta
+SAFETY_DIAGNOSTICS_CONFIG = {'include_rai_reason': True}
+
+FLAGGED_TERMS = {
+    r'\bbleeding\b': 'reddish tint',
+    r'\bblood(?:y)?\b': 'red-toned',
+    r'\bscalpels?\b': 'precision instrument',
+    r'\bneedles?\b': 'fine instrument',
+    r'\binjections?\b': 'treatment',
+    r'\bincisions?\b': 'treated area',
+    r'\bwounds?\b': 'treated area',
+    r'\blesions?\b': 'affected area',
+    r'\btumou?rs?\b': 'abnormal growth',
+    r'\bretinoblastoma\b': 'rare eye condition',
+    r'\bcancer(?:ous)?\b': 'serious condition',
+    r'\bsurgery\b': 'procedure',
+    r'\bsurgical\b': 'clinical',
+    r'\bdissection\b': 'diagram',
+    r'\bgraphic\b': 'clear',
+    r'\bnaked eye\b': 'unaided eye',
+}
+MINOR_TERMS = {
+    r'\bnew-?borns? bab(?:y|ies)\b': 'pediatric eye chart and soft toys',
+    r'\bnew-?borns?\b': 'pediatric eye chart and soft toys',
+    r'\binfants?\b': 'pediatric clinic setting',
+    r'\bbab(?:y|ies)\b': 'nursery setting',
+    r'\btoddlers?\b': 'colorful play area',
+    r'\bchild(?:ren)?\b': 'family',
+    r'\bkids?\b': 'family',
+    r'\b(?:young )?boys?\b': 'young adult',
+    r'\b(?:young )?girls?\b': 'young adult',
+    r'\bpediatric patients?\b': 'pediatric clinic',
+}
+PEOPLE_RE = re.compile(
+    r'\b(?:person|people|patients?|wom[ae]n|m[ae]n|doctors?|ophthalmologists?|physicians?|'
+    r'athletes?|family|adults?|hands?|faces?|portrait)\b', re.IGNORECASE)
+PHOTO_LINE_RE = re.compile(r'^\s*(?:Camera|Lens|Shot with)[^\n]*\n?', re.IGNORECASE | re.MULTILINE)
+PHOTO_TERMS = {
+    r'\bphoto-?realistic\b': 'clean vector',
+    r'\bphotography\b': 'illustration',
+    r'\bphotographs?\b': 'illustration',
+    r'\bphoto\b': 'illustration',
+    r'\bmacro\b': 'detailed',
+    r'\bcinematic\b': 'soft',
+}
+
+
+def _substitute(prompt: str, table: Dict[str, str]) -> str:
+    for pattern, replacement in table.items():
+        prompt = re.sub(pattern, replacement, prompt, flags=re.IGNORECASE)
+    return prompt
+
+
+def drop_flagged_terms(prompt: str, title: str) -> str:
+    return _substitute(prompt, FLAGGED_TERMS)
+
+
+def remove_minors(prompt: str, title: str) -> str:
+    rewritten = _substitute(prompt, MINOR_TERMS)
+    return rewritten + "\nNo children or infants depicted; convey the topic through objects and setting."
+
+
+def remove_people(prompt: str, title: str) -> str:
+    lines = [line for line in prompt.splitlines() if not re.match(r'\s*Subject:', line, re.IGNORECASE)]
+    rewritten = PEOPLE_RE.sub('', '\n'.join(lines))
+    rewritten = re.sub(r'[ \t]{2,}', ' ', rewritten)
+    return rewritten + "\nNo people, faces or hands: show only medical objects, eye models and the environment."
+
+
+def illustration_style(prompt: str, title: str) -> str:
+    rewritten = _substitute(PHOTO_LINE_RE.sub('', prompt), PHOTO_TERMS)
+    return rewritten + "\nStyle: flat vector medical illustration, simplified shapes, soft gradients, educational."
+
+
+def abstract_prompt(prompt: str, title: str) -> str:
+    return (f"Abstract symbolic flat illustration representing the theme \"{title or 'eye health'}\". "
+            "Soft geometric shapes, stylized eye iconography, calm blue and white palette, "
+            "16:9 landscape format. NO text, NO words, NO letters, no people.")
+
+
+# (nome, função); a ordem é a do relaxamento progressivo
+RELAXATION_RULES: List[Tuple[str, Callable[[str, str], str]]] = [
+    ('drop-flagged-terms', drop_flagged_terms),
+    ('no-minors', remove_minors),
+    ('no-people', remove_people),
+    ('illustration-style', illustration_style),
+    ('abstract', abstract_prompt),
+]
+# Palavras do motivo do filtro que antecipam uma regra
+REASON_HINTS = (
+    (('child', 'minor', 'kid'), 'no-minors'),
+    (('person', 'face', 'celebrity', 'people'), 'no-people'),
+    (('violence', 'gore', 'blood', 'medical', 'dangerous'), 'drop-flagged-terms'),
+)
+
+
+def safety_block_reason(response) -> Optional[str]:
+    """
+    Motivo do bloqueio se a resposta veio sem nenhuma imagem (None se há imagem)
+
+    Com include_rai_reason, imagens filtradas voltam com rai_filtered_reason;
+    sem ele, uma lista vazia sem erro também é bloqueio de segurança.
+    """
+    generated = getattr(response, 'generated_images', None) or []
+    if any(getattr(g, 'image', None) is not None for g in generated):
+        return None
+    reasons = [g.rai_filtered_reason for g in generated if getattr(g, 'rai_filtered_reason', None)]
+    return '; '.join(reasons) if reasons else 'resposta sem imagens (filtro de segurança)'
+
+
+def first_image(response):
+    """Primeira imagem não filtrada da resposta"""
+    return next((g for g in response.generated_images or [] if getattr(g, 'image', None) is not None), None)
+
+
+def prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
+
+
+class PromptRelaxer:
+    """Relaxa um prompt bloqueado regra a regra e registra qual resolveu"""
+
+    _lock = threading.Lock()
+
+    def __init__(self, prompt: str, key: str, title: str = '',
+                 log_path: Path = REWRITE_LOG_PATH, memory_path: Path = REWRITE_MEMORY_PATH):
+        """
+        Args:
+            prompt: Prompt original
+            key: Identificador no log (ex.: nome do arquivo da capa)
+            title: Tema do post (usado pela regra abstract)
+        """
+        self.original = prompt
+        self.key = key
+        self.title = title
+        self.log_path = log_path
+        self.memory_path = memory_path
+        self.applied: List[str] = []
+        self.rejections: List[Dict] = []
+        self.logged = False
+
+        # Regras que já resolveram este prompt antes: começar direto do reescrito
+        remembered = load_cache(memory_path).get(prompt_key(prompt), {}).get('rules', [])
+        self.prompt = prompt
+        for name in remembered:
+            self._apply(name)
+        if self.applied:
+            print(f"   🛡️  Prompt já reescrito antes ({' → '.join(self.applied)}), começando pela versão aceita")
+
+    def _apply(self, name: str) -> bool:
+        rule = dict(RELAXATION_RULES).get(name)
+        if rule is None or name in self.applied:
+            return False
+        rewritten = rule(self.prompt, self.title)
+        self.applied.append(name)
+        if rewritten.strip() == self.prompt.strip():
+            return False
+        self.prompt = rewritten
+        return True
+
+    def _ordered_rules(self, reason: str) -> List[str]:
+        names = [name for name, _ in RELAXATION_RULES]
+        lowered = reason.lower()
+        for words, hinted in reversed(REASON_HINTS):
+            if any(word in lowered for word in words):
+                names.remove(hinted)
+                names.insert(0, hinted)
+        return names
+
+    def relax(self, reason: str) -> Optional[str]:
+        """Registra a rejeição e devolve o próximo prompt (None se não há regra que mude o prompt)"""
+        self.rejections.append({'reason': reason, 'rules_before': list(self.applied)})
+        for name in self._ordered_rules(reason):
+            if name in self.applied:
+                continue
+            if self._apply(name):
+                print(f"   🛡️  Bloqueado pelo filtro de segurança: {reason}")
+                print(f"   ✏️  Regra aplicada: {name}")
+                self.rejections[-1]['rule'] = name
+                return self.prompt
+        print(f"   🛡️  Bloqueado pelo filtro de segurança: {reason}")
+        print("   ✗ Nenhuma regra de relaxamento restante: não vale repetir a chamada")
+        self._log(fixed_by=None)
+        return None
+
+    def succeeded(self) -> None:
+        """Imagem aceita: loga a regra que resolveu e memoriza a sequência"""
+        if not self.rejections and not self.applied:
+            return
+        fixed_by = self.applied[-1] if self.applied else None
+        if fixed_by:
+            print(f"   ✓ Aceito após reescrita (regra: {fixed_by})")
+        self._log(fixed_by=fixed_by)
+        with self._lock:
+            memory = load_cache(self.memory_path)
+            memory[prompt_key(self.original)] = {'key': self.key, 'rules': self.applied,
+                                                 'updated': datetime.now().isoformat(timespec='seconds')}
+            write_json_atomic(memory, self.memory_path)
+
+    def failed(self) -> None:
+        """Tentativas esgotadas: registra as rejeições que não foram resolvidas"""
+        if self.rejections and not self.logged:
+            self._log(fixed_by=None)
+
+    def _log(self, fixed_by: Optional[str]) -> None:
+        self.logged = True
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'key': self.key,
+            'prompt': prompt_key(self.original),
+            'rejections': self.rejections,
+            'rules': self.applied,
+            'fixed_by': fixed_by,
+        }
+        with self._lock:
+            self.log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
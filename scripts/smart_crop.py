@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Smart Crop por Saliência
+Saraiva Vision - Todas as proporções a partir de uma única geração 16:9
+
+Calcula um mapa de energia/saliência vetorizado (gradiente de luminância +
+contraste de cor em relação à média da imagem, com leve viés central) e, para
+cada proporção alvo, escolhe a janela de maior energia via imagem integral.
+Pontos focais por post podem sobrescrever a escolha automática.
+
+Os recortes vão para o subdiretório crops/ ao lado da capa (public/Blog/
+crops/capa-x-crop-og.jpeg): os scanners de public/Blog (image_manifest.py,
+generate-image-manifest.js, optimize-blog-images.js) não descem em
+subdiretórios, então um recorte nunca vira entrada do manifesto nem ganha
+variantes responsivas próprias.
+
+Uso:
+    python smart_crop.py ../public/Blog/capa-catarata.png
+    python smart_crop.py ../public/Blog/capa_post_22_*.png --post-id 22
+    python smart_crop.py capa.png --targets og story --focal 0.35,0.5
+"""
+
+import sys
+import json
+import argparse
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+from pixel_cache import decode
+from staged_writes import StagedOutputs
+
+# Pontos focais manuais: {"22": {"x": 0.35, "y": 0.5}, "capa-catarata.png": {...}}
+FOCAL_POINTS_PATH = Path(__file__).parent / "focal-points.json"
+
+# Placements do site: (largura, altura) final de cada recorte
+CROP_TARGETS = {
+    'thumb': (600, 600),        # miniatura quadrada dos cards
+    'og': (1200, 630),          # Open Graph / compartilhamento
+    'story': (1080, 1920),      # stories 9:16
+    'podcast': (1400, 1400),    # arte 1:1 de podcast
+}
+
+# Lado maior do mapa de saliência (busca em baixa resolução, recorte na original)
+SALIENCY_SIZE = 256
+CENTER_BIAS = 0.25
+JPEG_QUALITY = 85
+CROPS_DIRNAME = "crops"
+
+
+def saliency_map(image: Image.Image, size: int = SALIENCY_SIZE) -> np.ndarray:
+    """
+    Mapa de saliência normalizado [0, 1] em baixa resolução
+
+    Combina energia de gradiente (bordas/detalhes) com contraste de cor
+    (distância à cor média, estilo frequency-tuned) e um viés gaussiano central.
+    """
+    small = image.convert('RGB')
+    small.thumbnail((size, size), Image.BILINEAR)
+    rgb = np.asarray(small, dtype=np.float32) / 255.0
+
+    luma = rgb @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    grad_y, grad_x = np.gradient(luma)
+    energy = np.hypot(grad_x, grad_y)
+
+    color = np.linalg.norm(rgb - rgb.reshape(-1, 3).mean(axis=0), axis=2)
+
+    def normalize(values: np.ndarray) -> np.ndarray:
+        span = values.max() - values.min()
+        return (values - values.min()) / span if span > 0 else np.zeros_like(values)
+
+    height, width = luma.shape
+    ys = np.linspace(-1.0, 1.0, height, dtype=np.float32)[:, None]
+    xs = np.linspace(-1.0, 1.0, width, dtype=np.float32)[None, :]
+    center = np.exp(-(xs ** 2 + ys ** 2) / 0.8)
+
+    combined = 0.6 * normalize(energy) + 0.4 * normalize(color)
+    return normalize(combined) * (1.0 - CENTER_BIAS) + center * CENTER_BIAS
+
+
+def window_size(width: int, height: int, aspect: float) -> Tuple[int, int]:
+    """Maior (largura, altura) com a proporção dada que cabe na imagem"""
+    if width / height > aspect:
+        return max(1, min(width, round(height * aspect))), height
+    return width, max(1, min(height, round(width / aspect)))
+
+
+def best_window(saliency: np.ndarray, aspect: float,
+                focal: Optional[Tuple[float, float]] = None) -> Tuple[float, float, float, float]:
+    """
+    Maior janela com a proporção dada que maximiza a saliência somada
+
+    Returns:
+        (left, top, right, bottom) normalizados em [0, 1]
+    """
+    height, width = saliency.shape
+    win_w, win_h = window_size(width, height, aspect)
+
+    if focal is not None:
+        # Centralizar no ponto focal, respeitando as bordas
+        left = int(np.clip(round(focal[0] * width - win_w / 2), 0, width - win_w))
+        top = int(np.clip(round(focal[1] * height - win_h / 2), 0, height - win_h))
+    else:
+        integral = np.pad(saliency, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+        # Soma de todas as janelas possíveis de uma vez (vetorizado)
+        sums = (integral[win_h:, win_w:] - integral[:-win_h, win_w:]
+                - integral[win_h:, :-win_w] + integral[:-win_h, :-win_w])
+        top, left = np.unravel_index(int(np.argmax(sums)), sums.shape)
+
+    return (left / width, top / height, (left + win_w) / width, (top + win_h) / height)
+
+
+def load_focal_points() -> Dict:
+    if not FOCAL_POINTS_PATH.exists():
+        return {}
+    with open(FOCAL_POINTS_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def focal_for(source: Path, post_id: Optional[int], focal_points: Dict) -> Optional[Tuple[float, float]]:
+    """Ponto focal manual por nome do arquivo ou ID do post"""
+    entry = focal_points.get(source.name)
+    if entry is None and post_id is not None:
+        entry = focal_points.get(str(post_id))
+    if entry is None:
+        return None
+    return float(entry['x']), float(entry['y'])
+
+
+def crop_path(source: Path, target: str) -> Path:
+    """Blog/capa-x.png -> Blog/crops/capa-x-crop-og.jpeg"""
+    return source.parent / CROPS_DIRNAME / f"{source.stem}-crop-{target}.jpeg"
+
+
+def derive_crops(source_path: str, targets: Optional[List[str]] = None, post_id: Optional[int] = None,
+                 focal: Optional[Tuple[float, float]] = None, outputs: Optional[StagedOutputs] = None) -> List[str]:
+    """
+    Gera os recortes de uma capa para cada placement
+
+    Args:
+        source_path: Capa gerada (master)
+        targets: Nomes em CROP_TARGETS (padrão: todos)
+        post_id: ID do post para buscar ponto focal em focal-points.json
+        focal: Ponto focal explícito (x, y) normalizado; tem prioridade
+        outputs: Transação do master (ainda em staging): os recortes são
+            promovidos junto com ele; sem ela, numa transação própria
+
+    Returns:
+        Caminhos dos recortes salvos
+    """
+    source = Path(source_path)
+    targets = targets or list(CROP_TARGETS)
+    if focal is None:
+        focal = focal_for(source, post_id, load_focal_points())
+
+    saved = []
+    decoded = decode(outputs.read_path(source) if outputs is not None else source)
+    image = decoded.image().convert('RGB')
+
+    # Saliência da pirâmide: só o nível que cobre SALIENCY_SIZE é lido
+    saliency = saliency_map(decoded.image_at_least(SALIENCY_SIZE, SALIENCY_SIZE))
+
+    # Todos os recortes em staging; promovidos e registrados juntos (com o master, se houver)
+    with nullcontext(outputs) if outputs is not None else StagedOutputs() as outputs:
+        for target in targets:
+            out_w, out_h = CROP_TARGETS[target]
+            left, top, _, _ = best_window(saliency, out_w / out_h, focal)
+
+            # Janela exata na resolução original, posicionada pela busca em baixa resolução
+            win_w, win_h = window_size(image.width, image.height, out_w / out_h)
+            x = min(round(left * image.width), image.width - win_w)
+            y = min(round(top * image.height), image.height - win_h)
+            box = (x, y, x + win_w, y + win_h)
+
+            cropped = image.crop(box)
+            if cropped.width > out_w:
+                cropped = cropped.resize((out_w, out_h), Image.LANCZOS)
+
+            output = crop_path(source, target)
+            outputs.save_image(cropped, output, variant=True, format='JPEG', quality=JPEG_QUALITY,
+                               optimize=True, progressive=True)
+            print(f"   ✂️  {target:8s} {cropped.width}x{cropped.height} ← janela {box} → {output.name}")
+            saved.append(str(output))
+
+    return saved
+
+
+def parse_focal(value: str) -> Tuple[float, float]:
+    x, y = (float(v) for v in value.split(','))
+    if not (0 <= x <= 1 and 0 <= y <= 1):
+        raise argparse.ArgumentTypeError("ponto focal deve estar em [0,1],[0,1]")
+    return x, y
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Recortes inteligentes (saliência) para todos os placements',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('files', nargs='+', help='Capas geradas')
+    parser.add_argument('--targets', nargs='+', choices=sorted(CROP_TARGETS), help='Placements')
+    parser.add_argument('--post-id', type=int, help='ID do post (ponto focal em focal-points.json)')
+    parser.add_argument('--focal', type=parse_focal, help='Ponto focal manual "x,y" (0-1)')
+
+    args = parser.parse_args()
+
+    total = 0
+    for path in args.files:
+        if not Path(path).exists():
+            print(f"✗ Arquivo não encontrado: {path}")
+            continue
+        print(f"\n🖼️  {Path(path).name}")
+        total += len(derive_crops(path, args.targets, args.post_id, args.focal))
+
+    print(f"\n✓ {total} recortes gerados")
+    sys.exit(0 if total else 1)
+
+
+if __name__ == "__main__":
+    main()
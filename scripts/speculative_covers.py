@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+"""
+Pré-geração Especulativa de Capas para Rascunhos
+Saraiva Vision - Capa pronta no momento em que o post é publicado
+
+Hoje a capa só é gerada depois que o post entra em blogPosts.js, e a
+publicação espera a chamada ao modelo (e a cota do dia). Aqui, fora do
+horário de pico, os rascunhos são detectados nas fontes dos posts e suas
+capas são geradas com antecedência em um cache fora de public/:
+
+- rascunho: frontmatter de src/content/blog/*.md com draft: true,
+  published: false ou status draft/scheduled, data futura, ou post .md que
+  ainda não está em blogPosts.js; posts de blogPosts.js com data futura
+  também contam. Posts que já têm capa própria são ignorados
+- janela fora de pico (--window, padrão 22:00-06:00) e orçamento: no máximo
+  --budget-share da cota diária do QuotaLedger vai para especulação, e só
+  enquanto o total do dia cabe na cota. Cada tentativa (e seus hedges)
+  conta na parcela especulativa, com ou sem sucesso
+- falhas: um rascunho que falha espera um intervalo crescente antes da
+  próxima tentativa (1h, 2h, 4h...) e é abandonado após --max-failures
+  falhas seguidas; editar o título ou --reset-failures libera de novo
+- candidatos em .cache/blog-assets/speculative/<slug>/, indexados por
+  impressão digital de título/categoria (.cache/blog-assets/
+  speculative-covers.json); título alterado invalida o candidato
+- adoção: post publicado sem capa recebe o candidato no caminho do campo
+  image via StagedOutputs (promoção atômica + manifesto de assets), sem
+  espera nenhuma
+- despejo: candidatos de rascunhos apagados, publicados com outra capa,
+  desatualizados ou mais velhos que --max-age-days
+
+Uso:
+    python speculative_covers.py --list
+    python speculative_covers.py --run                   # adota, despeja e gera (na janela)
+    python speculative_covers.py --watch --interval 300  # ciclo contínuo
+    python speculative_covers.py --adopt                 # só adotar publicados
+    python speculative_covers.py --evict --max-age-days 14
+    python speculative_covers.py --status
+    python speculative_covers.py --reset-failures        # liberar rascunhos abandonados
+"""
+
+import re
+import sys
+import time
+import shutil
+import hashlib
+import argparse
+import threading
+from datetime import datetime, date, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from api_key_pool import DEFAULT_RATE_PER_MINUTE
+from asset_manifest import PROJECT_ROOT, PUBLIC_DIR, BLOG_DIR, STATE_DIR, load_cache, write_json_atomic
+from blog_data import BLOG_POSTS_PATH, find_cover_source, load_blog_posts_data
+from cover_scheduler import (DEFAULT_DAILY_QUOTA, GENERATORS, QuotaLedger, build_generator,
+                             is_generic_cover, quota_day)
+from staged_writes import StagedOutputs
+
+CONTENT_DIR = PROJECT_ROOT / "src" / "content" / "blog"
+SPECULATIVE_DIR = STATE_DIR / "speculative"
+INDEX_PATH = STATE_DIR / "speculative-covers.json"
+
+DEFAULT_WINDOW = "22:00-06:00"
+# Fração da cota diária que a especulação pode gastar
+DEFAULT_BUDGET_SHARE = 0.3
+MAX_AGE_DAYS = 30
+WATCH_INTERVAL = 300
+# Falhas seguidas de um rascunho antes de desistir; espera dobra a cada falha
+MAX_FAILURES = 3
+FAILURE_BACKOFF_SECONDS = 3600
+
+_FRONTMATTER_RE = re.compile(r'\A---\s*\n(.*?)\n---\s*(?:\n|\Z)', re.DOTALL)
+_FIELD_RE = re.compile(r'^([A-Za-z_][\w-]*):\s*(.*?)\s*$')
+_DRAFT_STATUSES = {'draft', 'rascunho', 'scheduled', 'agendado'}
+_SAVE_FORMATS = {'.png': 'PNG', '.jpg': 'JPEG', '.jpeg': 'JPEG', '.webp': 'WEBP'}
+
+
+def parse_frontmatter(text: str) -> Dict:
+    """Campos escalares do frontmatter YAML (listas e blocos são ignorados)"""
+    match = _FRONTMATTER_RE.match(text)
+    if not match:
+        return {}
+    fields = {}
+    for line in match.group(1).splitlines():
+        field = _FIELD_RE.match(line)
+        if not field or not field.group(2):
+            continue
+        key, value = field.groups()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+            value = value[1:-1]
+        elif value.lower() in ('true', 'false'):
+            value = value.lower() == 'true'
+        elif re.fullmatch(r'-?\d+', value):
+            value = int(value)
+        fields[key] = value
+    return fields
+
+
+def load_markdown_posts(content_dir: Path = CONTENT_DIR) -> List[Dict]:
+    posts = []
+    for path in sorted(content_dir.glob('*.md')):
+        fields = parse_frontmatter(path.read_text(encoding='utf-8'))
+        if fields:
+            fields.setdefault('slug', path.stem)
+            fields['source'] = str(path.relative_to(PROJECT_ROOT))
+            posts.append(fields)
+    return posts
+
+
+def post_key(post: Dict) -> str:
+    return str(post.get('slug') or f"post-{post.get('id', 0)}")
+
+
+def fingerprint(post: Dict) -> str:
+    """O que muda o prompt: título e categoria (o excerpt só complementa)"""
+    text = f"{post.get('title', '')}|{post.get('category', '')}"
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def publish_date(post: Dict) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(post.get('date'))[:10])
+    except ValueError:
+        return None
+
+
+def is_unpublished(post: Dict, today: Optional[date] = None) -> bool:
+    """Marcado como rascunho/agendado ou com data futura"""
+    if post.get('draft') is True or post.get('published') is False:
+        return True
+    if str(post.get('status', '')).lower() in _DRAFT_STATUSES:
+        return True
+    published_on = publish_date(post)
+    return published_on is not None and published_on > (today or date.today())
+
+
+def find_drafts(js_posts: List[Dict], md_posts: List[Dict],
+                today: Optional[date] = None) -> Tuple[List[Dict], Dict[str, Dict]]:
+    """
+    Rascunhos que precisam de capa e os posts já publicados (por chave)
+
+    Um .md fora de blogPosts.js ainda não foi publicado; um post de
+    blogPosts.js marcado como rascunho ou com data futura também não.
+    """
+    published = {post_key(p): p for p in js_posts if not is_unpublished(p, today)}
+    image_counts: Dict[str, int] = {}
+    for post in js_posts:
+        image_counts[post.get('image') or ''] = image_counts.get(post.get('image') or '', 0) + 1
+
+    candidates: Dict[str, Dict] = {}
+    for post in js_posts:
+        if is_unpublished(post, today):
+            candidates[post_key(post)] = post
+    for post in md_posts:
+        if post_key(post) not in published:
+            candidates.setdefault(post_key(post), post)
+
+    drafts = []
+    for key, post in candidates.items():
+        if post.get('image') and find_cover_source(post) is not None \
+                and not is_generic_cover(post, image_counts):
+            continue  # já tem capa própria
+        drafts.append(post)
+    # Publicação mais próxima primeiro; sem data vai para o fim
+    drafts.sort(key=lambda p: (publish_date(p) or date.max, not p.get('featured'), post_key(p)))
+    return drafts, published
+
+
+def parse_window(value: str) -> Tuple[int, int]:
+    """'HH:MM-HH:MM' em minutos do dia (pode atravessar a meia-noite)"""
+    match = re.fullmatch(r'(\d{1,2}):(\d{2})-(\d{1,2}):(\d{2})', value.strip())
+    if not match:
+        raise ValueError(f"janela inválida: {value} (use HH:MM-HH:MM)")
+    h1, m1, h2, m2 = map(int, match.groups())
+    return h1 * 60 + m1, h2 * 60 + m2
+
+
+def in_window(window: Tuple[int, int], now: Optional[datetime] = None) -> bool:
+    now = now or datetime.now()
+    start, end = window
+    minute = now.hour * 60 + now.minute
+    if start <= end:
+        return start <= minute < end
+    return minute >= start or minute < end
+
+
+class SpeculativeStore:
+    """Índice dos candidatos especulativos e contadores de acerto/desperdício"""
+
+    def __init__(self, path: Path = INDEX_PATH, root: Path = SPECULATIVE_DIR):
+        self.path = path
+        self.root = root
+        data = load_cache(path)
+        self.entries: Dict[str, Dict] = data.get('entries', {})
+        self.stats: Dict[str, float] = data.get('stats', {'generated': 0, 'adopted': 0, 'evicted': 0})
+        self.spent: Dict[str, float] = data.get('spent', {})  # unidades por dia da cota
+        self.failures: Dict[str, Dict] = data.get('failures', {})
+        self._lock = threading.Lock()
+
+    def directory(self, key: str) -> Path:
+        return self.root / key
+
+    def fresh(self, post: Dict) -> Optional[Dict]:
+        """Entrada válida para o post (mesma impressão digital e arquivos presentes)"""
+        entry = self.entries.get(post_key(post))
+        if not entry or entry['fingerprint'] != fingerprint(post):
+            return None
+        if not all((PROJECT_ROOT / f).exists() for f in entry['files']):
+            return None
+        return entry
+
+    def spent_today(self) -> float:
+        return self.spent.get(quota_day(), 0.0)
+
+    def charge(self, units: float) -> None:
+        """Debita da parcela especulativa do dia (antes da chamada: falhas também gastam cota)"""
+        with self._lock:
+            self.spent[quota_day()] = self.spent_today() + units
+            self.save()
+
+    def failure(self, post: Dict) -> Optional[Dict]:
+        """Falhas seguidas do rascunho com o título atual (título novo zera)"""
+        record = self.failures.get(post_key(post))
+        if not record or record['fingerprint'] != fingerprint(post):
+            return None
+        return record
+
+    def retry_at(self, post: Dict, max_failures: int = MAX_FAILURES) -> Optional[float]:
+        """Quando o rascunho pode ser tentado de novo: 0 agora, None nunca (abandonado)"""
+        record = self.failure(post)
+        if record is None:
+            return 0.0
+        if record['count'] >= max_failures:
+            return None
+        return record['last'] + FAILURE_BACKOFF_SECONDS * 2 ** (record['count'] - 1)
+
+    def record_failure(self, post: Dict, error: str) -> int:
+        with self._lock:
+            previous = self.failure(post)
+            count = (previous['count'] if previous else 0) + 1
+            self.failures[post_key(post)] = {'fingerprint': fingerprint(post), 'count': count,
+                                             'last': time.time(), 'error': error[:200]}
+            self.save()
+            return count
+
+    def clear_failures(self, keys: Optional[List[str]] = None) -> int:
+        with self._lock:
+            keys = list(self.failures) if keys is None else [k for k in keys if k in self.failures]
+            for key in keys:
+                del self.failures[key]
+            if keys:
+                self.save()
+            return len(keys)
+
+    def add(self, post: Dict, files: List[str], generator: str) -> None:
+        with self._lock:
+            key = post_key(post)
+            previous = self.entries.get(key)
+            self.entries[key] = {
+                'post_id': post.get('id'),
+                'title': post.get('title', ''),
+                'fingerprint': fingerprint(post),
+                'files': [str(Path(f).resolve().relative_to(PROJECT_ROOT)) for f in files],
+                'generator': generator,
+                'created': datetime.now().isoformat(timespec='seconds'),
+            }
+            # Candidatos de um título anterior saem do disco
+            if previous:
+                stale = set(previous['files']) - set(self.entries[key]['files'])
+                for f in stale:
+                    (PROJECT_ROOT / f).unlink(missing_ok=True)
+            self.stats['generated'] = self.stats.get('generated', 0) + 1
+            self.failures.pop(key, None)
+            self.save()
+
+    def remove(self, key: str, reason: str) -> None:
+        with self._lock:
+            entry = self.entries.pop(key, None)
+            shutil.rmtree(self.directory(key), ignore_errors=True)
+            if entry is None:
+                return
+            counter = 'adopted' if reason == 'adopted' else 'evicted'
+            self.stats[counter] = self.stats.get(counter, 0) + 1
+            self.save()
+
+    def save(self) -> None:
+        cutoff = (date.fromisoformat(quota_day()) - timedelta(days=MAX_AGE_DAYS)).isoformat()
+        self.spent = {day: units for day, units in sorted(self.spent.items()) if day >= cutoff}
+        write_json_atomic({'entries': self.entries, 'stats': self.stats, 'spent': self.spent,
+                           'failures': self.failures}, self.path)
+
+
+def adoption_target(post: Dict, image_counts: Dict[str, int]) -> Optional[Path]:
+    """Onde a capa especulativa entra (None: o post já tem capa própria)"""
+    image = post.get('image') or ''
+    if image and find_cover_source(post) is None:
+        target = PUBLIC_DIR / image.lstrip('/')
+        # Só dentro de public/Blog: é o que os geradores e o manifesto conhecem
+        if target.resolve().parent == BLOG_DIR.resolve():
+            return target
+    if not image or is_generic_cover(post, image_counts):
+        return BLOG_DIR / f"capa-{post_key(post)}.png"
+    return None
+
+
+def adopt_published(store: SpeculativeStore, published: Dict[str, Dict], js_posts: List[Dict]) -> int:
+    """Promove o melhor candidato de cada post já publicado para public/Blog"""
+    image_counts: Dict[str, int] = {}
+    for post in js_posts:
+        image_counts[post.get('image') or ''] = image_counts.get(post.get('image') or '', 0) + 1
+
+    adopted = 0
+    for key in list(store.entries):
+        post = published.get(key)
+        if post is None:
+            continue
+        entry = store.fresh(post)
+        target = adoption_target(post, image_counts) if entry else None
+        if target is None:
+            store.remove(key, 'published-with-cover' if entry else 'stale')
+            continue
+
+        candidate = PROJECT_ROOT / entry['files'][0]
+        with StagedOutputs() as outputs:
+            if candidate.suffix.lower() == target.suffix.lower():
+                outputs.write_bytes(target, candidate.read_bytes())
+            else:
+                with Image.open(candidate) as image:
+                    save_format = _SAVE_FORMATS.get(target.suffix.lower(), 'PNG')
+                    if save_format == 'JPEG':
+                        image = image.convert('RGB')
+                    outputs.save_image(image, target, format=save_format, quality=92)
+        store.remove(key, 'adopted')
+        adopted += 1
+        image_path = '/' + str(target.relative_to(PUBLIC_DIR))
+        print(f"✓ Adotada: {key} → {image_path}")
+        if image_path != post.get('image'):
+            print(f"   ✏️  Atualize o campo image do post #{post.get('id')} para {image_path}")
+    return adopted
+
+
+def evict(store: SpeculativeStore, drafts: List[Dict], published: Dict[str, Dict],
+          max_age_days: float = MAX_AGE_DAYS) -> int:
+    """Despeja candidatos que não serão usados; retorna quantos"""
+    by_key = {post_key(p): p for p in drafts}
+    cutoff = datetime.now() - timedelta(days=max_age_days)
+    evicted = 0
+    for key, entry in list(store.entries.items()):
+        post = by_key.get(key)
+        if post is None:
+            # Publicados esperam pela adoção; o resto saiu das fontes ou ganhou capa
+            if key in published:
+                continue
+            reason = 'orphan'
+        elif store.fresh(post) is None:
+            reason = 'stale'
+        elif datetime.fromisoformat(entry['created']) < cutoff:
+            reason = 'expired'
+        else:
+            continue
+        print(f"🗑️  Despejado: {key} ({reason})")
+        store.remove(key, reason)
+        evicted += 1
+
+    # Falhas de rascunhos que saíram das fontes (ou foram publicados)
+    store.clear_failures([key for key in store.failures if key not in by_key])
+
+    # Diretórios sem entrada no índice (execução interrompida)
+    if store.root.exists():
+        for directory in store.root.iterdir():
+            if directory.is_dir() and directory.name not in store.entries:
+                shutil.rmtree(directory, ignore_errors=True)
+    return evicted
+
+
+def speculation_budget(args, ledger: QuotaLedger, store: SpeculativeStore) -> Tuple[float, float]:
+    """(unidades livres para especular agora, cota total do dia)"""
+    from api_key_pool import load_api_keys
+    model = GENERATORS[args.generator]
+    budget = args.daily_quota * max(1, len(load_api_keys()))
+    share_left = budget * args.budget_share - store.spent_today()
+    quota_left = budget - ledger.used(model)
+    return max(0.0, min(share_left, quota_left)), budget
+
+
+def generate_speculative(drafts: List[Dict], args, ledger: QuotaLedger, store: SpeculativeStore,
+                         window: Optional[Tuple[int, int]]) -> Dict[str, int]:
+    """Gera candidatos para os rascunhos pendentes enquanto houver janela e orçamento"""
+    from api_key_pool import ApiKeyPool, load_api_keys
+    from hedged_requests import HedgedCaller
+
+    counts = {'done': 0, 'failed': 0, 'deferred': 0, 'backoff': 0}
+    now = time.time()
+    pending = []
+    for post in drafts:
+        if store.fresh(post) is not None:
+            continue
+        retry_at = store.retry_at(post, args.max_failures)
+        if retry_at is None or retry_at > now:
+            counts['backoff'] += 1
+            continue
+        pending.append(post)
+    if not pending:
+        return counts
+
+    model = GENERATORS[args.generator]
+    cost = float(args.variations if args.generator == 'imagen' else 1)
+    units_left, budget = speculation_budget(args, ledger, store)
+    print(f"🔮 {len(pending)} rascunho(s) sem capa | orçamento especulativo: {units_left:.0f} unidade(s) "
+          f"({args.budget_share:.0%} de {budget:.0f}, {store.spent_today():.0f} já usadas hoje)")
+    if units_left < cost:
+        counts['deferred'] = len(pending)
+        return counts
+
+    key_pool = ApiKeyPool(load_api_keys(), rate_per_minute=args.rate_per_key)
+    hedger = HedgedCaller()
+    generator = build_generator(args.generator, key_pool, hedger)
+    try:
+        for post in pending:
+            if window is not None and not in_window(window):
+                print("⏰ Fim da janela fora de pico")
+                counts['deferred'] += len(pending) - counts['done'] - counts['failed']
+                break
+            units_left, _ = speculation_budget(args, ledger, store)
+            if units_left < cost:
+                counts['deferred'] += len(pending) - counts['done'] - counts['failed']
+                break
+
+            key = post_key(post)
+            directory = store.directory(key)
+            directory.mkdir(parents=True, exist_ok=True)
+            # Jobs em sequência: o mesmo gerador grava no diretório de cada rascunho
+            generator.output_dir = directory
+            ledger.charge(model, cost)
+            store.charge(cost)
+            error = "nenhuma imagem gerada"
+            try:
+                if args.generator == 'imagen':
+                    files = generator.generate_cover(post, num_variations=args.variations)
+                else:
+                    files = generator.generate_cover(post)
+            except Exception as e:
+                files, error = [], f"{type(e).__name__}: {e}"
+            if files:
+                store.add(post, files, args.generator)
+                counts['done'] += 1
+            else:
+                shutil.rmtree(directory, ignore_errors=True)
+                failures = store.record_failure(post, error)
+                if failures >= args.max_failures:
+                    print(f"✗ {key}: {failures} falha(s) seguidas, abandonado ({error[:80]})")
+                else:
+                    wait = FAILURE_BACKOFF_SECONDS * 2 ** (failures - 1) / 3600
+                    print(f"⚠️  {key}: falha {failures}/{args.max_failures}, nova tentativa em {wait:.0f}h")
+                counts['failed'] += 1
+    finally:
+        # Hedges e retentativas também gastam cota (global e especulativa)
+        extra = sum(s['units'] for s in key_pool.stats()) - cost * (counts['done'] + counts['failed'])
+        if extra > 0:
+            ledger.charge(model, extra, requests=0)
+            store.charge(extra)
+        hedger.close()
+    return counts
+
+
+def source_signature(content_dir: Path = CONTENT_DIR) -> Tuple:
+    """mtimes das fontes dos posts: muda quando um rascunho é criado, editado ou publicado"""
+    paths = [BLOG_POSTS_PATH] + sorted(content_dir.glob('*.md'))
+    return tuple((str(p), p.stat().st_mtime_ns) for p in paths if p.exists())
+
+
+def run_cycle(args, store: SpeculativeStore, ledger: QuotaLedger, window: Optional[Tuple[int, int]]) -> None:
+    js_posts = load_blog_posts_data(full=True)
+    md_posts = load_markdown_posts()
+    drafts, published = find_drafts(js_posts, md_posts)
+
+    adopted = adopt_published(store, published, js_posts)
+    evicted = evict(store, drafts, published, args.max_age_days)
+    if adopted or evicted:
+        print(f"📦 {adopted} adotada(s), {evicted} despejada(s)")
+
+    if window is not None and not in_window(window):
+        pending = sum(1 for post in drafts if store.fresh(post) is None)
+        if pending:
+            print(f"🌙 Fora da janela {args.window}: {pending} rascunho(s) aguardando")
+        return
+    counts = generate_speculative(drafts, args, ledger, store, window)
+    if any(counts.values()):
+        print(f"🔮 {counts['done']} gerada(s), {counts['failed']} falha(s), {counts['deferred']} adiada(s), "
+              f"{counts['backoff']} em espera após falhas")
+
+
+def print_status(store: SpeculativeStore, drafts: List[Dict], max_failures: int = MAX_FAILURES) -> None:
+    print("\n" + "="*70)
+    print("🔮 CAPAS ESPECULATIVAS")
+    print("="*70)
+    for post in drafts:
+        entry = store.fresh(post)
+        failure = store.failure(post)
+        when = publish_date(post)
+        label = f"{when:%Y-%m-%d}" if when else "sem data"
+        if entry:
+            state = f"✓ {len(entry['files'])} candidato(s)"
+        elif failure and failure['count'] >= max_failures:
+            state = f"✗ abandonado ({failure['count']}x)"
+        elif failure:
+            state = f"⚠️  {failure['count']} falha(s)"
+        else:
+            state = "… pendente"
+        print(f"  {state:18s} {label}  {post_key(post)[:50]}")
+    orphans = set(store.entries) - {post_key(p) for p in drafts}
+    for key in sorted(orphans):
+        print(f"  ⏳ aguardando adoção/despejo  {key[:50]}")
+
+    generated = store.stats.get('generated', 0)
+    adopted = store.stats.get('adopted', 0)
+    evicted = store.stats.get('evicted', 0)
+    finished = adopted + evicted
+    hit_rate = adopted / finished if finished else 0.0
+    print("-"*70)
+    print(f"📊 {generated} gerada(s), {adopted} adotada(s), {evicted} despejada(s) "
+          f"({hit_rate:.0%} de aproveitamento) | {store.spent_today():.0f} unidade(s) hoje")
+    print("="*70 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Pré-geração de capas para rascunhos fora do horário de pico',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--list', action='store_true', help='Listar rascunhos detectados')
+    parser.add_argument('--status', action='store_true', help='Candidatos em cache e aproveitamento')
+    parser.add_argument('--run', action='store_true', help='Um ciclo: adotar, despejar e gerar na janela')
+    parser.add_argument('--watch', action='store_true', help='Ciclos contínuos ao mudar as fontes')
+    parser.add_argument('--adopt', action='store_true', help='Só adotar capas de posts publicados')
+    parser.add_argument('--evict', action='store_true', help='Só despejar candidatos não usados')
+    parser.add_argument('--reset-failures', action='store_true', help='Zerar falhas e liberar rascunhos abandonados')
+    parser.add_argument('--max-failures', type=int, default=MAX_FAILURES,
+                        help='Falhas seguidas antes de abandonar um rascunho')
+    parser.add_argument('--generator', choices=sorted(GENERATORS), default='imagen', help='Gerador')
+    parser.add_argument('--variations', type=int, default=2, help='Candidatos por rascunho (Imagen)')
+    parser.add_argument('--window', type=str, default=DEFAULT_WINDOW, help='Janela fora de pico HH:MM-HH:MM')
+    parser.add_argument('--ignore-window', action='store_true', help='Gerar mesmo fora da janela')
+    parser.add_argument('--budget-share', type=float, default=DEFAULT_BUDGET_SHARE,
+                        help='Fração da cota diária para especulação')
+    parser.add_argument('--daily-quota', type=float, default=None,
+                        help='Unidades por chave e por dia (padrão: imagen 70, flash 100)')
+    parser.add_argument('--max-age-days', type=float, default=MAX_AGE_DAYS,
+                        help='Idade máxima de um candidato não adotado')
+    parser.add_argument('--interval', type=float, default=WATCH_INTERVAL, help='Com --watch: segundos entre verificações')
+    parser.add_argument('--rate-per-key', type=float, default=DEFAULT_RATE_PER_MINUTE, help='Requisições/imagens por minuto por chave')
+
+    args = parser.parse_args()
+    if args.daily_quota is None:
+        args.daily_quota = DEFAULT_DAILY_QUOTA[args.generator]
+    if not (args.list or args.status or args.run or args.watch or args.adopt or args.evict
+            or args.reset_failures):
+        parser.print_help()
+        sys.exit(1)
+
+    try:
+        window = None if args.ignore_window else parse_window(args.window)
+    except ValueError as e:
+        print(f"✗ {e}")
+        sys.exit(1)
+    store = SpeculativeStore()
+
+    if args.reset_failures:
+        print(f"✓ Falhas zeradas de {store.clear_failures()} rascunho(s)")
+
+    if args.list or args.status:
+        drafts, _ = find_drafts(load_blog_posts_data(full=True), load_markdown_posts())
+        if args.list:
+            print(f"📝 {len(drafts)} rascunho(s) sem capa própria")
+            for post in drafts:
+                when = publish_date(post)
+                print(f"  {when.isoformat() if when else 'sem data':10s}  {post_key(post)[:50]:50s} "
+                      f"{post.get('source', BLOG_POSTS_PATH.name)}")
+        if args.status:
+            print_status(store, drafts, args.max_failures)
+
+    if args.adopt or args.evict:
+        js_posts = load_blog_posts_data(full=True)
+        drafts, published = find_drafts(js_posts, load_markdown_posts())
+        if args.adopt:
+            print(f"✓ {adopt_published(store, published, js_posts)} capa(s) adotada(s)")
+        if args.evict:
+            print(f"✓ {evict(store, drafts, published, args.max_age_days)} candidato(s) despejado(s)")
+
+    if not (args.run or args.watch):
+        return
+
+    ledger = QuotaLedger()
+    if args.run:
+        run_cycle(args, store, ledger, window)
+        return
+
+    print(f"👀 Observando {CONTENT_DIR.relative_to(PROJECT_ROOT)} e {BLOG_POSTS_PATH.name} "
+          f"(a cada {args.interval:.0f}s, janela {args.window})")
+    signature = None
+    try:
+        while True:
+            current = source_signature()
+            if current != signature:
+                # Fontes mudaram: adoção e despejo antes de gerar
+                run_cycle(args, store, ledger, window)
+                signature = current
+            elif window is None or in_window(window):
+                drafts, _ = find_drafts(load_blog_posts_data(full=True), load_markdown_posts())
+                generate_speculative(drafts, args, ledger, store, window)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("\n⏹️  Interrompido")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Gravação em Staging com Promoção Atômica
+Saraiva Vision - public/Blog só vê conjuntos de capas completos
+
+Gravar direto em public/Blog deixa PNGs pela metade visíveis para o nginx (e
+para os "pula se existe") quando a gravação é interrompida ou duas execuções
+escrevem ao mesmo tempo. Aqui cada saída é gravada em um diretório de staging
+no mesmo sistema de arquivos (.cache/blog-assets/staging/<transação>/), com
+fsync, e só então promovida com rename atômico:
+
+- StagedOutputs agrupa um conjunto (master + variantes/recortes/renditions):
+  variantes são promovidas antes do master e o manifesto de assets é
+  atualizado na mesma seção crítica; erro no bloco descarta o staging
+- a promoção roda sob um lock de arquivo (flock): execuções paralelas nunca
+  intercalam conjuntos e cada transação tem seu próprio diretório
+- atomic_write_bytes / atomic_save_image: o mesmo para um arquivo avulso
+
+Nos geradores, paleta e recortes (--crops) entram na transação do master. As
+variantes do encoder_tuning (processos worker) e os jobs de follow-up da
+work_queue são transações próprias: o master aparece antes delas, e o site
+usa o master enquanto as variantes não existem.
+
+Se o staging ficar em outro sistema de arquivos (rename não seria atômico),
+usa-se um diretório oculto .staging ao lado do destino.
+
+Uso:
+    with StagedOutputs() as outputs:
+        outputs.write_bytes(master_path, data)
+        outputs.save_image(crop, crop_path, variant=True, format='JPEG', quality=85)
+    # promovidos + record_assets()
+
+    python staged_writes.py --clean   # remove staging órfão de execuções interrompidas
+"""
+
+import os
+import sys
+import time
+import shutil
+import fcntl
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Tuple, Union
+
+from asset_manifest import STATE_DIR, record_assets
+from profiling import span
+
+STAGING_ROOT = STATE_DIR / "staging"
+PROMOTE_LOCK_PATH = STATE_DIR / "promote.lock"
+# Transações mais antigas que isso são sobras de execuções interrompidas
+STALE_STAGING_SECONDS = 6 * 3600
+
+_THREAD_LOCK = threading.Lock()
+_cleaned = False
+
+
+def fsync_file(path: Path) -> None:
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_dir(path: Path) -> None:
+    """Persiste as entradas do diretório (os renames) no disco"""
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_DIRECTORY', 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def staging_root_for(target_dir: Path) -> Path:
+    """Raiz de staging no mesmo sistema de arquivos do destino"""
+    STAGING_ROOT.mkdir(parents=True, exist_ok=True)
+    if os.stat(STAGING_ROOT).st_dev == os.stat(target_dir).st_dev:
+        return STAGING_ROOT
+    fallback = target_dir / ".staging"
+    fallback.mkdir(exist_ok=True)
+    return fallback
+
+
+@contextmanager
+def promote_lock():
+    """Exclusão mútua da promoção entre threads e processos"""
+    PROMOTE_LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with _THREAD_LOCK, open(PROMOTE_LOCK_PATH, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def clean_stale_staging(max_age: float = STALE_STAGING_SECONDS) -> int:
+    """Remove transações órfãs (crash no meio da gravação); retorna quantas"""
+    removed = 0
+    if not STAGING_ROOT.exists():
+        return 0
+    cutoff = time.time() - max_age
+    for entry in STAGING_ROOT.iterdir():
+        try:
+            if entry.is_dir() and entry.stat().st_mtime < cutoff:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+class StagedOutputs:
+    """Conjunto de arquivos gravados em staging e promovidos juntos"""
+
+    def __init__(self, record: bool = True):
+        """
+        Args:
+            record: Chamar record_assets() com os arquivos promovidos (na mesma seção crítica)
+        """
+        global _cleaned
+        if not _cleaned:
+            _cleaned = True
+            clean_stale_staging()
+        self.record = record
+        self.staged: List[Tuple[Path, Path, bool]] = []  # (staging, destino, variante)
+        self.promoted: List[str] = []
+        self._dirs = {}
+
+    def _staging_dir(self, target_dir: Path) -> Path:
+        root = staging_root_for(target_dir)
+        if root not in self._dirs:
+            self._dirs[root] = Path(tempfile.mkdtemp(prefix=f"{os.getpid()}-", dir=root))
+        return self._dirs[root]
+
+    def staged_path(self, final: Union[str, Path], variant: bool = False) -> Path:
+        """Caminho de staging para `final`; quem chama grava o arquivo inteiro nele"""
+        final = Path(final)
+        final.parent.mkdir(parents=True, exist_ok=True)
+        staged = self._staging_dir(final.parent) / f"{len(self.staged)}-{final.name}"
+        self.staged.append((staged, final, variant))
+        return staged
+
+    def read_path(self, final: Union[str, Path]) -> Path:
+        """Onde o conteúdo de `final` está agora (staging se ainda não promovido)"""
+        final = Path(final)
+        for staged, target, _ in reversed(self.staged):
+            if target == final:
+                return staged
+        return final
+
+    def write_bytes(self, final: Union[str, Path], data: bytes, variant: bool = False) -> Path:
+        with open(self.staged_path(final, variant), 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return Path(final)
+
+    def save_image(self, image, final: Union[str, Path], variant: bool = False, **save_kwargs) -> Path:
+        staged = self.staged_path(final, variant)
+        image.save(staged, **save_kwargs)
+        fsync_file(staged)
+        return Path(final)
+
+    def commit(self) -> List[str]:
+        """fsync de tudo, promoção (variantes antes do master) e manifesto"""
+        if not self.staged:
+            return []
+        for staged, _, _ in self.staged:
+            fsync_file(staged)
+
+        ordered = [s for s in self.staged if s[2]] + [s for s in self.staged if not s[2]]
+        with span('record', files=len(ordered)), promote_lock():
+            for staged, final, _ in ordered:
+                os.replace(staged, final)
+                self.promoted.append(str(final))
+            for directory in {final.parent for _, final, _ in ordered}:
+                fsync_dir(directory)
+            if self.record:
+                record_assets(self.promoted)
+        self.staged = []
+        self._remove_dirs()
+        return self.promoted
+
+    def rollback(self) -> None:
+        self.staged = []
+        self._remove_dirs()
+
+    def _remove_dirs(self) -> None:
+        for directory in self._dirs.values():
+            shutil.rmtree(directory, ignore_errors=True)
+        self._dirs = {}
+
+    def __enter__(self) -> 'StagedOutputs':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+
+
+def atomic_write_bytes(path: Union[str, Path], data: bytes) -> int:
+    """Arquivo avulso: staging + fsync + rename atômico (sem registrar no manifesto)"""
+    with StagedOutputs(record=False) as outputs:
+        outputs.write_bytes(path, data)
+    return len(data)
+
+
+def atomic_save_image(image, path: Union[str, Path], **save_kwargs) -> Path:
+    """image.save() avulso com staging + fsync + rename atômico"""
+    with StagedOutputs(record=False) as outputs:
+        outputs.save_image(image, path, **save_kwargs)
+    return Path(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Staging das gravações de capas (limpeza de transações órfãs)',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('--clean', action='store_true', help='Remover staging de execuções interrompidas')
+    parser.add_argument('--max-age-hours', type=float, default=STALE_STAGING_SECONDS / 3600,
+                        help='Idade mínima das transações removidas')
+
+    args = parser.parse_args()
+    if not args.clean:
+        parser.print_help()
+        sys.exit(1)
+
+    removed = clean_stale_staging(args.max_age_hours * 3600)
+    print(f"✓ {removed} transação(ões) órfã(s) removida(s) de {STAGING_ROOT}")
+
+
+if __name__ == "__main__":
+    main()
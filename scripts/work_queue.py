@@ -0,0 +1,614 @@
+#!/usr/bin/env python3
+"""
+Fila de Trabalho em SQLite com Leases (várias máquinas)
+Saraiva Vision - Escalar uma regeneração do catálogo iniciando mais workers
+
+Uma regeneração grande em um host só fica presa aos núcleos e à rede dele.
+Aqui os jobs de geração, recortes (variants) e ajuste de encoder (encode)
+ficam em um arquivo SQLite compartilhado (.cache/blog-assets/work-queue.sqlite
+ou --db em um volume comum); workers em qualquer máquina/container:
+
+- reivindicam um job por vez sob lease com prazo (BEGIN IMMEDIATE: dois
+  workers nunca pegam o mesmo job) e renovam o lease por heartbeat
+- leases vencidos (worker morto, máquina caiu) voltam para pending na próxima
+  reivindicação; após --max-attempts tentativas o job fica failed
+- o resultado só é gravado pelo dono atual do lease: um worker atrasado cujo
+  lease venceu (e foi reivindicado por outro) tem o resultado descartado; com
+  o heartbeat perdido, o handler para no próximo ponto de checagem
+- enqueue é idempotente pela chave (ex.: generate:post-12): reenfileirar o
+  catálogo não duplica jobs
+- jobs de geração concluídos enfileiram variants/encode dos masters gravados,
+  presos ao host que gerou (o master só existe no public/Blog dele)
+
+Caminhos nos payloads são relativos à raiz do projeto (cada host tem seu
+checkout). Em volume de rede o journal padrão (DELETE) é usado; --wal só para
+disco local.
+
+Uso:
+    python work_queue.py --enqueue --all --generator imagen
+    python work_queue.py --worker --concurrency 4           # em cada máquina
+    python work_queue.py --worker --kinds variants encode --forever
+    python work_queue.py --status
+    python work_queue.py --retry-failed
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from asset_manifest import PROJECT_ROOT, STATE_DIR
+
+QUEUE_PATH = STATE_DIR / "work-queue.sqlite"
+
+JOB_KINDS = ('generate', 'variants', 'encode')
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_SECONDS = 10.0
+# Espera por lock do SQLite (outros hosts escrevendo)
+BUSY_TIMEOUT_SECONDS = 30.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    priority REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    lease_owner TEXT,
+    lease_expires REAL,
+    host TEXT,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, kind, priority DESC, id);
+"""
+
+
+class LeaseLost(Exception):
+    """O lease do job passou para outro worker: o trabalho restante é abandonado"""
+
+
+class Job:
+    """Job reivindicado por um worker"""
+
+    __slots__ = ('id', 'kind', 'key', 'payload', 'attempts', 'owner', 'lease_expires', 'lost')
+
+    def __init__(self, id: int, kind: str, key: str, payload: Dict, attempts: int, owner: str,
+                 lease_expires: float):
+        self.id = id
+        self.kind = kind
+        self.key = key
+        self.payload = payload
+        self.attempts = attempts
+        self.owner = owner
+        self.lease_expires = lease_expires
+        self.lost = False
+
+    def check_lease(self) -> None:
+        """Ponto de checagem dos handlers antes de gravar efeitos colaterais"""
+        if self.lost:
+            raise LeaseLost(f"{self.key}: lease perdido")
+
+    def __repr__(self) -> str:
+        return f"Job(id={self.id}, key={self.key!r}, tentativa {self.attempts})"
+
+
+class WorkQueue:
+    """Jobs, leases e resultados em um arquivo SQLite compartilhado"""
+
+    def __init__(self, path: Path = QUEUE_PATH, wal: bool = False,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        Args:
+            path: Arquivo SQLite (local ou em volume compartilhado entre hosts)
+            wal: Journal WAL (mais concorrência, mas só funciona em disco local)
+            lease_seconds: Duração do lease; o heartbeat renova a cada terço
+            max_attempts: Tentativas antes de o job ficar failed
+        """
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._connect()
+        try:
+            if wal:
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            # Filas criadas antes da coluna host (jobs presos a um host)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if 'host' not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN host TEXT")
+        finally:
+            conn.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Uma conexão por operação: segura entre threads e sem transação esquecida aberta
+        conn = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """BEGIN IMMEDIATE: trava escrita já no início (sem upgrade de lock com deadlock)"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def enqueue(self, kind: str, key: str, payload: Dict, priority: float = 0.0,
+                conn: Optional[sqlite3.Connection] = None) -> bool:
+        """Adiciona um job; False se a chave já existe (idempotente). payload['host'] prende o job ao host"""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"tipo de job desconhecido: {kind}")
+        now = time.time()
+        sql = ("INSERT OR IGNORE INTO jobs (kind, key, payload, priority, max_attempts, host, created, updated) "
+               "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+        params = (kind, key, json.dumps(payload, ensure_ascii=False), priority, self.max_attempts,
+                  payload.get('host'), now, now)
+        if conn is not None:
+            return conn.execute(sql, params).rowcount == 1
+        with self._transaction() as conn:
+            return conn.execute(sql, params).rowcount == 1
+
+    def enqueue_many(self, jobs: List[Tuple[str, str, Dict, float]]) -> int:
+        """(kind, key, payload, priority) em uma transação; retorna quantos eram novos"""
+        with self._transaction() as conn:
+            return sum(self.enqueue(kind, key, payload, priority, conn) for kind, key, payload, priority in jobs)
+
+    def _expire_leases(self, conn: sqlite3.Connection, now: float) -> None:
+        """Leases vencidos voltam para pending (ou failed, sem tentativas restantes)"""
+        conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END, "
+            "error = COALESCE(error, 'lease expirado (' || lease_owner || ')'), "
+            "lease_owner = NULL, lease_expires = NULL, updated = ? "
+            "WHERE status = 'leased' AND lease_expires < ?",
+            (now, now)
+        )
+
+    def claim(self, owner: str, kinds: Optional[List[str]] = None, host: Optional[str] = None) -> Optional[Job]:
+        """Reivindica o job pending de maior prioridade (livre ou preso a `host`); None se não há nenhum"""
+        kinds = list(kinds or JOB_KINDS)
+        now = time.time()
+        with self._transaction() as conn:
+            self._expire_leases(conn, now)
+            row = conn.execute(
+                f"SELECT * FROM jobs WHERE status = 'pending' AND kind IN ({','.join('?' * len(kinds))}) "
+                "AND (host IS NULL OR host = ?) ORDER BY priority DESC, id LIMIT 1",
+                kinds + [host]
+            ).fetchone()
+            if row is None:
+                return None
+            expires = now + self.lease_seconds
+            conn.execute(
+                "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, "
+                "lease_expires = ?, updated = ? WHERE id = ?",
+                (owner, expires, now, row['id'])
+            )
+        return Job(row['id'], row['kind'], row['key'], json.loads(row['payload']), row['attempts'] + 1,
+                   owner, expires)
+
+    def heartbeat(self, job: Job) -> bool:
+        """Renova o lease; False se o job não é mais deste worker (lease perdido)"""
+        now = time.time()
+        expires = now + self.lease_seconds
+        with self._transaction() as conn:
+            renewed = conn.execute(
+                "UPDATE jobs SET lease_expires = ?, updated = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (expires, now, job.id, job.owner)
+            ).rowcount == 1
+        if renewed:
+            job.lease_expires = expires
+        return renewed
+
+    def complete(self, job: Job, result: Dict, follow_ups: Optional[List[Tuple[str, str, Dict, float]]] = None) -> bool:
+        """
+        Grava o resultado se este worker ainda é o dono do lease
+
+        Um lease vencido e reivindicado por outro worker (ou devolvido para
+        pending) descarta o resultado. follow_ups (kind, key, payload,
+        priority) são enfileirados na mesma transação: ou o resultado e os
+        próximos jobs existem, ou nenhum.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            recorded = conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_owner = NULL, "
+                "lease_expires = NULL, updated = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (json.dumps(result, ensure_ascii=False), now, job.id, job.owner)
+            ).rowcount == 1
+            if recorded:
+                for kind, key, payload, priority in follow_ups or []:
+                    self.enqueue(kind, key, payload, priority, conn)
+        return recorded
+
+    def fail(self, job: Job, error: str) -> str:
+        """Devolve o job para pending (ou failed sem tentativas restantes); retorna o novo status"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_owner = NULL, lease_expires = NULL, updated = ? "
+                "WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (error[:2000], now, job.id, job.owner)
+            )
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job.id,)).fetchone()
+        return row['status']
+
+    def retry_failed(self, kinds: Optional[List[str]] = None) -> int:
+        kinds = list(kinds or JOB_KINDS)
+        with self._transaction() as conn:
+            return conn.execute(
+                f"UPDATE jobs SET status = 'pending', attempts = 0, updated = ? "
+                f"WHERE status = 'failed' AND kind IN ({','.join('?' * len(kinds))})",
+                [time.time()] + kinds
+            ).rowcount
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """{kind: {status: n}}"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT kind, status, COUNT(*) AS n FROM jobs GROUP BY kind, status").fetchall()
+        finally:
+            conn.close()
+        counts: Dict[str, Dict[str, int]] = {}
+        for row in rows:
+            counts.setdefault(row['kind'], {})[row['status']] = row['n']
+        return counts
+
+    def has_open_jobs(self, kinds: Optional[List[str]] = None, host: Optional[str] = None) -> bool:
+        """Há jobs pending ou leased que `host` pode pegar (um lease pode vencer e voltar para a fila)"""
+        kinds = list(kinds or JOB_KINDS)
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                f"SELECT 1 FROM jobs WHERE status IN ('pending', 'leased') "
+                f"AND kind IN ({','.join('?' * len(kinds))}) AND (host IS NULL OR host = ?) LIMIT 1",
+                kinds + [host]
+            ).fetchone()
+        finally:
+            conn.close()
+        return row is not None
+
+    def failures(self, limit: int = 10) -> List[sqlite3.Row]:
+        conn = self._connect()
+        try:
+            return conn.execute("SELECT key, attempts, error FROM jobs WHERE status = 'failed' "
+                                "ORDER BY updated DESC LIMIT ?", (limit,)).fetchall()
+        finally:
+            conn.close()
+
+    def pinned(self) -> Dict[str, int]:
+        """Jobs abertos presos a cada host (só workers daquele host os pegam)"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT host, COUNT(*) AS n FROM jobs WHERE host IS NOT NULL "
+                                "AND status IN ('pending', 'leased') GROUP BY host").fetchall()
+        finally:
+            conn.close()
+        return {row['host']: row['n'] for row in rows}
+
+
+# ============================================================================
+# HANDLERS
+# ============================================================================
+
+def relative_path(path) -> str:
+    """Caminho relativo à raiz do projeto (independe do checkout de cada host)"""
+    return str(Path(path).resolve().relative_to(PROJECT_ROOT.resolve()))
+
+
+def project_path(relative: str) -> Path:
+    return PROJECT_ROOT / relative
+
+
+def generate_job(post: Dict, generator: str, variations: int, priority: float = 0.0) -> Tuple[str, str, Dict, float]:
+    return ('generate', f"generate:{generator}:post-{post['id']}",
+            {'post_id': post['id'], 'generator': generator, 'variations': variations}, priority)
+
+
+def master_follow_ups(files: List[str], post_id: Optional[int], formats: List[str],
+                      host: str) -> List[Tuple[str, str, Dict, float]]:
+    """Recortes e variantes ajustadas de cada master gerado, presos ao host que tem o arquivo"""
+    jobs = []
+    for file in files:
+        relative = relative_path(file)
+        name = Path(relative).name
+        jobs.append(('variants', f"variants:{name}", {'path': relative, 'post_id': post_id, 'host': host}, 0.0))
+        jobs.append(('encode', f"encode:{name}", {'path': relative, 'formats': formats, 'host': host}, 0.0))
+    return jobs
+
+
+class JobHandlers:
+    """Executa cada tipo de job; gerador e dados dos posts criados uma vez por processo"""
+
+    def __init__(self, rate_per_key: float, encode_formats: List[str]):
+        self.rate_per_key = rate_per_key
+        self.encode_formats = encode_formats
+        self._generators: Dict[str, object] = {}
+        self._posts: Optional[Dict[int, Dict]] = None
+        self._lock = threading.Lock()
+
+    def _generator(self, name: str):
+        with self._lock:
+            if name not in self._generators:
+                from api_key_pool import ApiKeyPool, load_api_keys
+                from cover_scheduler import build_generator
+                from hedged_requests import HedgedCaller
+                key_pool = ApiKeyPool(load_api_keys(), rate_per_minute=self.rate_per_key)
+                self._generators[name] = build_generator(name, key_pool, HedgedCaller())
+            return self._generators[name]
+
+    def _post(self, post_id: int) -> Dict:
+        with self._lock:
+            if self._posts is None:
+                from blog_data import load_blog_posts_data
+                self._posts = {p['id']: p for p in load_blog_posts_data(full=True)}
+        if post_id not in self._posts:
+            raise LookupError(f"post {post_id} não encontrado em blogPosts.js")
+        return self._posts[post_id]
+
+    def __call__(self, job: Job) -> Tuple[Dict, List[Tuple[str, str, Dict, float]]]:
+        """Retorna (resultado, jobs seguintes); exceção = falha do job (LeaseLost: abandonado)"""
+        job.check_lease()
+        return getattr(self, f"run_{job.kind}")(job)
+
+    def run_generate(self, job: Job):
+        payload = job.payload
+        generator = self._generator(payload['generator'])
+        post = self._post(payload['post_id'])
+        if payload['generator'] == 'imagen':
+            files = generator.generate_cover(post, num_variations=payload.get('variations', 2))
+        else:
+            files = generator.generate_cover(post)
+        if not files:
+            raise RuntimeError("nenhuma imagem gerada")
+        job.check_lease()
+        host = socket.gethostname()
+        result = {'files': [relative_path(f) for f in files], 'host': host}
+        return result, master_follow_ups(files, post['id'], self.encode_formats, host)
+
+    def run_variants(self, job: Job):
+        from smart_crop import derive_crops
+        payload = job.payload
+        crops = derive_crops(str(project_path(payload['path'])), post_id=payload.get('post_id'))
+        return {'files': [relative_path(c) for c in crops]}, []
+
+    def run_encode(self, job: Job):
+        from asset_manifest import record_assets
+        from encoder_tuning import (DEFAULT_TARGET_SSIM, DEFAULT_TARGET_SSIM_P01, VARIANT_WIDTH,
+                                    load_settings, save_settings, tune_image)
+        from staged_writes import promote_lock
+        payload = job.payload
+        width = payload.get('width', VARIANT_WIDTH)
+        target_ssim = payload.get('target_ssim', DEFAULT_TARGET_SSIM)
+        source = project_path(payload['path'])
+        result = tune_image(str(source), payload['formats'], width,
+                            target_ssim, payload.get('target_ssim_p01', DEFAULT_TARGET_SSIM_P01))
+        written = [str(source.parent / chosen['output']) for chosen in result['formats'].values()]
+        result.update({'target_ssim': target_ssim, 'width': width})
+        job.check_lease()
+        with promote_lock():
+            settings = load_settings()
+            settings[result['source']] = result
+            save_settings(settings)
+        record_assets(written)
+        return {'files': [relative_path(w) for w in written]}, []
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+class Heartbeat:
+    """Renova o lease do job em background enquanto o handler roda"""
+
+    def __init__(self, queue: WorkQueue, job: Job):
+        self.queue = queue
+        self.job = job
+        self.lost = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"heartbeat-{job.id}", daemon=True)
+
+    def _run(self):
+        interval = self.queue.lease_seconds / 3
+        while not self._stop.wait(interval):
+            try:
+                if not self.queue.heartbeat(self.job):
+                    self.lost = self.job.lost = True
+                    print(f"   ⚠️  {self.job.key}: lease perdido (outro worker pode refazer o job)")
+                    return
+            except sqlite3.Error as e:
+                print(f"   ⚠️  {self.job.key}: heartbeat falhou ({e}), tentando de novo")
+
+    def __enter__(self) -> 'Heartbeat':
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_worker(queue: WorkQueue, handler: Callable[[Job], Tuple[Dict, List]], owner: str,
+               kinds: Optional[List[str]] = None, forever: bool = False,
+               poll_seconds: float = DEFAULT_POLL_SECONDS, max_jobs: Optional[int] = None,
+               host: Optional[str] = None) -> Dict[str, int]:
+    """
+    Reivindica e executa jobs até a fila esvaziar (ou para sempre com forever)
+
+    Sem job disponível mas com leases de outros workers abertos, espera: um
+    deles pode vencer e voltar para a fila. host: pega também os jobs presos
+    a este host (follow-ups dos masters gerados aqui).
+    """
+    counts = {'done': 0, 'failed': 0, 'retry': 0, 'discarded': 0}
+    while max_jobs is None or sum(counts.values()) < max_jobs:
+        job = queue.claim(owner, kinds, host)
+        if job is None:
+            if not forever and not queue.has_open_jobs(kinds, host):
+                break
+            time.sleep(poll_seconds)
+            continue
+
+        print(f"\n▶ [{owner}] {job.key} (tentativa {job.attempts})")
+        started = time.monotonic()
+        with Heartbeat(queue, job) as heartbeat:
+            try:
+                result, follow_ups = handler(job)
+            except LeaseLost as e:
+                print(f"↩️  {e}: trabalho abandonado (outro worker refaz o job)")
+                counts['discarded'] += 1
+                continue
+            except Exception as e:
+                status = queue.fail(job, f"{type(e).__name__}: {e}")
+                print(f"✗ {job.key}: {e} → {status}")
+                counts['failed' if status == 'failed' else 'retry'] += 1
+                continue
+
+        result['seconds'] = round(time.monotonic() - started, 1)
+        result['worker'] = owner
+        if heartbeat.lost:
+            print(f"↩️  {job.key}: lease perdido durante o job, resultado descartado")
+            counts['discarded'] += 1
+        elif queue.complete(job, result, follow_ups):
+            print(f"✓ {job.key} em {result['seconds']}s"
+                  + (f" (+{len(follow_ups)} job(s) seguintes)" if follow_ups else ""))
+            counts['done'] += 1
+        else:
+            print(f"↩️  {job.key}: lease vencido e reivindicado por outro worker, resultado descartado")
+            counts['discarded'] += 1
+    return counts
+
+
+def print_status(queue: WorkQueue) -> None:
+    counts = queue.counts()
+    print("\n" + "="*70)
+    print(f"📋 Fila {queue.path}")
+    print("="*70)
+    for kind in JOB_KINDS:
+        statuses = counts.get(kind, {})
+        if statuses:
+            print(f"  {kind:9s} " + '  '.join(f"{status}: {n}" for status, n in sorted(statuses.items())))
+    for host, n in sorted(queue.pinned().items()):
+        print(f"  📌 {n} job(s) aberto(s) preso(s) a {host}")
+    failures = queue.failures()
+    if failures:
+        print("\n✗ Falhas recentes:")
+        for row in failures:
+            print(f"   {row['key']} ({row['attempts']} tentativa(s)): {(row['error'] or '')[:90]}")
+    print("="*70 + "\n")
+
+
+def main():
+    from api_key_pool import DEFAULT_RATE_PER_MINUTE
+
+    parser = argparse.ArgumentParser(
+        description='Fila SQLite compartilhada de geração, recortes e variantes (vários hosts)',
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+
+    parser.add_argument('--db', type=Path, default=Path(os.environ.get('COVER_QUEUE_DB', QUEUE_PATH)),
+                        help='Arquivo SQLite da fila (padrão: $COVER_QUEUE_DB ou .cache/blog-assets/work-queue.sqlite)')
+    parser.add_argument('--wal', action='store_true', help='Journal WAL (só em disco local)')
+    parser.add_argument('--enqueue', action='store_true', help='Enfileirar jobs de geração')
+    parser.add_argument('--all', action='store_true', help='Com --enqueue: todos os posts')
+    parser.add_argument('--category', type=str, help='Com --enqueue: posts da categoria')
+    parser.add_argument('--post-id', type=int, nargs='+', help='Com --enqueue: posts específicos')
+    parser.add_argument('--generator', choices=['imagen', 'flash'], default='imagen', help='Gerador dos jobs')
+    parser.add_argument('--variations', type=int, default=2, help='Imagens por post (Imagen)')
+    parser.add_argument('--worker', action='store_true', help='Executar jobs da fila')
+    parser.add_argument('--kinds', nargs='+', choices=JOB_KINDS, help='Tipos de job deste worker (padrão: todos)')
+    parser.add_argument('--concurrency', type=int, default=2, help='Jobs em paralelo neste processo')
+    parser.add_argument('--forever', action='store_true', help='Continuar esperando jobs com a fila vazia')
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL_SECONDS, help='Intervalo de espera (s)')
+    parser.add_argument('--lease', type=float, default=DEFAULT_LEASE_SECONDS, help='Duração do lease (s)')
+    parser.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS, help='Tentativas por job')
+    parser.add_argument('--encode-formats', nargs='+', default=['jpeg', 'webp'],
+                        help='Formatos dos jobs encode enfileirados após a geração')
+    parser.add_argument('--rate-per-key', type=float, default=DEFAULT_RATE_PER_MINUTE,
+                        help='Requisições/imagens por minuto por chave (por host)')
+    parser.add_argument('--status', action='store_true', help='Contagem por tipo e status')
+    parser.add_argument('--retry-failed', action='store_true', help='Devolver jobs failed para a fila')
+
+    args = parser.parse_args()
+    if not (args.enqueue or args.worker or args.status or args.retry_failed):
+        parser.print_help()
+        sys.exit(1)
+
+    queue = WorkQueue(args.db, wal=args.wal, lease_seconds=args.lease, max_attempts=args.max_attempts)
+
+    if args.enqueue:
+        from blog_data import load_blog_posts_data
+        from cover_scheduler import score_post
+
+        posts = load_blog_posts_data(full=True)
+        if args.post_id:
+            selected = [p for p in posts if p['id'] in args.post_id]
+        elif args.category:
+            selected = [p for p in posts if p['category'] == args.category]
+        elif args.all:
+            selected = posts
+        else:
+            print("✗ --enqueue requer --all, --category ou --post-id")
+            sys.exit(1)
+        # Mesma prioridade do agendador: capa ausente/genérica, destaque, recência
+        image_counts: Dict[str, int] = {}
+        for post in posts:
+            image_counts[post.get('image') or ''] = image_counts.get(post.get('image') or '', 0) + 1
+        jobs = [generate_job(p, args.generator, args.variations, score_post(p, image_counts)[0]) for p in selected]
+        added = queue.enqueue_many(jobs)
+        print(f"✓ {added} job(s) novos de {len(jobs)} ({len(jobs) - added} já estavam na fila)")
+
+    if args.retry_failed:
+        print(f"✓ {queue.retry_failed(args.kinds)} job(s) failed devolvidos para a fila")
+
+    if args.worker:
+        handler = JobHandlers(args.rate_per_key, args.encode_formats)
+        hostname = socket.gethostname()
+        host = f"{hostname}:{os.getpid()}"
+        print(f"\n🚀 Worker {host}: {args.concurrency} slot(s), tipos {', '.join(args.kinds or JOB_KINDS)}, "
+              f"lease {args.lease:.0f}s")
+        threads_counts: List[Dict[str, int]] = []
+
+        def slot(index: int) -> None:
+            threads_counts.append(run_worker(queue, handler, f"{host}:{index}", args.kinds,
+                                             args.forever, args.poll, host=hostname))
+
+        threads = [threading.Thread(target=slot, args=(i,), name=f"worker-{i}") for i in range(max(1, args.concurrency))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        totals = {k: sum(c[k] for c in threads_counts) for k in ('done', 'failed', 'retry', 'discarded')}
+        print("\n" + "="*70)
+        print(f"✅ {totals['done']} concluído(s), {totals['retry']} devolvido(s) para nova tentativa, "
+              f"{totals['failed']} falha(s) definitiva(s), {totals['discarded']} descartado(s)")
+        print("="*70)
+
+    if args.status:
+        print_status(queue)
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,9 @@
 
 import { useState, useEffect, useRef, useCallback } from 'react';
 import PropTypes from 'prop-types';
+// LQIP of each post cover keyed by post.image, generated before the build
+// (scripts/cover_placeholders.py --posts) so the preview is in the first render
+import coverPlaceholders from '@/data/coverPlaceholders.json';
 
 const OptimizedImage = ({
   src,
@@ -26,6 +29,7 @@ const OptimizedImage = ({
   fallbackSrc,
   onLoad,
   onError,
+  placeholder,
   disableOptimization = false,
   enableLogging = import.meta.env.DEV // Enable detailed logging in development
 }) => {
@@ -75,6 +79,9 @@ const OptimizedImage = ({
   const imagePath = src.substring(0, src.lastIndexOf('/') + 1);
   const originalExt = getExtension(src);
 
+  // Tiny inline WebP preview (LQIP), shown blurred while the cover loads
+  const lqip = placeholder || coverPlaceholders[src];
+
   // Standard responsive breakpoints - matching actual generated files
   // Available sizes: 480w, 768w, 1200w (generated by optimization script)
   const responsiveSizes = [480, 768, 1200];
@@ -282,8 +289,16 @@ const OptimizedImage = ({
       className={`relative overflow-hidden ${className}`}
       style={aspectRatio ? { aspectRatio } : undefined}
     >
-      {/* Loading placeholder */}
-      {!isLoaded && !hasError && (
+      {/* Loading placeholder: blurred LQIP when available, skeleton otherwise */}
+      {!isLoaded && !hasError && lqip && (
+        <img
+          src={lqip}
+          alt=""
+          aria-hidden="true"
+          className="absolute inset-0 w-full h-full object-cover blur-xl scale-110"
+        />
+      )}
+      {!isLoaded && !hasError && !lqip && (
         <div className="absolute inset-0 bg-gradient-to-br from-blue-50 to-purple-50 animate-pulse" />
       )}
 
@@ -381,6 +396,7 @@ OptimizedImage.propTypes = {
   fallbackSrc: PropTypes.string,
   onLoad: PropTypes.func,
   onError: PropTypes.func,
+  placeholder: PropTypes.string,
   disableOptimization: PropTypes.bool,
   enableLogging: PropTypes.bool
 };
@@ -43,6 +43,9 @@ const OptimizedImageV2 = ({
   const basename = getBasename(src);
   const imagePath = src.substring(0, src.lastIndexOf('/') + 1);
 
+  // Tiny inline WebP preview (LQIP) from the manifest, shown while the cover loads
+  const placeholder = imageManifest?.manifest?.[basename]?.placeholder;
+
   /**
    * Get available variants from manifest
    */
@@ -156,8 +159,16 @@ const OptimizedImageV2 = ({
       className={`relative overflow-hidden ${className}`}
       style={aspectRatio ? { aspectRatio } : undefined}
     >
-      {/* Loading placeholder with skeleton */}
-      {!isLoaded && !hasError && (
+      {/* Loading placeholder: blurred LQIP when available, skeleton otherwise */}
+      {!isLoaded && !hasError && placeholder?.lqip && (
+        <img
+          src={placeholder.lqip}
+          alt=""
+          aria-hidden="true"
+          className="absolute inset-0 w-full h-full object-cover blur-xl scale-110"
+        />
+      )}
+      {!isLoaded && !hasError && !placeholder?.lqip && (
         <div className="absolute inset-0 bg-gradient-to-br from-cyan-50 via-purple-50 to-pink-50 animate-pulse">
           <div className="absolute inset-0 flex items-center justify-center">
             <svg